@@ -51,6 +51,7 @@ class BaseBarFeed(feed.BaseFeed):
         self.__defaultInstrument = None
         self.__currentBars = None
         self.__lastBars = {}
+        self.__dataSeriesFactory = None
 
     def reset(self):
         self.__currentBars = None
@@ -88,8 +89,24 @@ class BaseBarFeed(feed.BaseFeed):
         """
         raise NotImplementedError()
 
+    def setDataSeriesFactory(self, factory):
+        """Sets the callable used to build the :class:`pyalgotrade.dataseries.bards.BarDataSeries` for each
+        instrument. It receives the instrument and the maximum length.
+
+        :param factory: The callable used to build dataseries, for example a
+            :class:`pyalgotrade.dataseries.memmap.BarDataSeriesFactory`, or None to use
+            :class:`pyalgotrade.dataseries.bards.BarDataSeries`.
+
+        .. note::
+            This only affects dataseries that are built after this call, so it should be set before loading bars.
+        """
+        self.__dataSeriesFactory = factory
+
     def createDataSeries(self, key, maxLen):
-        ret = bards.BarDataSeries(maxLen)
+        if self.__dataSeriesFactory is None:
+            ret = bards.BarDataSeries(maxLen)
+        else:
+            ret = self.__dataSeriesFactory(key, maxLen)
         ret.setUseAdjustedValues(self.__useAdjustedValues)
         return ret
 
@@ -0,0 +1,241 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+import pytz
+
+from pyalgotrade import bar
+from pyalgotrade.dataseries import bards
+from pyalgotrade.utils import dt
+
+
+class BarColumns(object):
+    """A sequence of bars stored as columns. Bars are only built when they are accessed, so loading many bars is cheap.
+
+    :param dateTimes: The number of nanoseconds since the epoch for each bar. If tzInfo is None, these are naive
+        datetimes as if they were in UTC.
+    :type dateTimes: numpy.array.
+    :param values: A 2D numpy.array with one row per bar and the columns in the order used by
+        :func:`pyalgotrade.dataseries.bards.get_column_values`. Missing adjusted close values are NaN.
+    :type values: numpy.array.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param tzInfo: The timezone for the bar datetimes, or None to build naive datetimes.
+    :type tzInfo: A pytz timezone.
+    :param extra: A dictionary that maps extra column names to a numpy.array with one value per bar.
+    :type extra: dict.
+    :param barClass: The class used to build bars.
+    :type barClass: class.
+    :param extraParser: A function used to convert extra column values as bars are built, or None to use them as they
+        are. This is useful to keep extra columns as strings and only parse the values that get used.
+    :type extraParser: function.
+    """
+
+    def __init__(self, dateTimes, values, frequency, tzInfo=None, extra=None, barClass=bar.BasicBar, extraParser=None):
+        assert len(dateTimes) == len(values), "There must be one datetime per bar"
+        self.__dateTimes = np.asarray(dateTimes, dtype=np.int64)
+        self.__values = np.asarray(values, dtype=float).reshape(len(self.__dateTimes), bards.COLUMN_COUNT)
+        self.__frequency = frequency
+        self.__tzInfo = tzInfo
+        self.__extra = extra if extra is not None else {}
+        self.__barClass = barClass
+        self.__extraParser = extraParser
+        # The last bar that was built, since the same bar is usually accessed many times in a row.
+        self.__lastPos = None
+        self.__lastBar = None
+
+    def __getstate__(self):
+        # Don't send the last bar that was built, since avoiding that is the point of sending columns.
+        ret = self.__dict__.copy()
+        ret["_BarColumns__lastPos"] = None
+        ret["_BarColumns__lastBar"] = None
+        return ret
+
+    def __len__(self):
+        return len(self.__dateTimes)
+
+    def __iter__(self):
+        for pos in xrange(len(self)):
+            yield self[pos]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.__subset(key)
+        elif isinstance(key, (int, long, np.integer)):
+            if key < 0:
+                key += len(self)
+            if key >= len(self) or key < 0:
+                raise IndexError("Index out of range")
+            if key != self.__lastPos:
+                self.__lastBar = self.__buildBar(key)
+                self.__lastPos = key
+            return self.__lastBar
+        else:
+            raise TypeError("Invalid argument type")
+
+    # Returns the bars selected by a slice or by an array of positions.
+    def __subset(self, key):
+        extra = dict((name, values[key]) for name, values in self.__extra.iteritems())
+        return BarColumns(
+            self.__dateTimes[key], self.__values[key], self.__frequency, self.__tzInfo, extra, self.__barClass,
+            self.__extraParser
+        )
+
+    def __buildBar(self, pos):
+        open_, close, high, low, volume, adjClose = self.__values[pos].tolist()
+        # Missing adjusted close values are stored as NaN.
+        if adjClose != adjClose:
+            adjClose = None
+        extra = {}
+        for name, values in self.__extra.iteritems():
+            value = values[pos]
+            if isinstance(value, np.generic):
+                value = value.item()
+            if self.__extraParser is not None:
+                value = self.__extraParser(value)
+            extra[name] = value
+        return self.__barClass(
+            self.getDateTime(pos), open_, high, low, close, volume, adjClose, self.__frequency, extra=extra
+        )
+
+    def getDateTime(self, pos):
+        """Returns the datetime for the bar at a given position."""
+        return dt.epoch_ns_to_datetime(self.__dateTimes[pos], self.__tzInfo)
+
+    def getDateTimes(self):
+        """Returns a list with the datetime for every bar."""
+        if self.__tzInfo is None:
+            ret = self.__dateTimes.astype("M8[ns]").astype("M8[us]").astype(object).tolist()
+        else:
+            ret = [self.getDateTime(pos) for pos in xrange(len(self))]
+        return ret
+
+    def getEpochNs(self):
+        """Returns a numpy.array with the number of nanoseconds since the epoch for every bar."""
+        return self.__dateTimes
+
+    def getValues(self):
+        """Returns a 2D numpy.array with one row per bar and the columns in the order used by
+        :func:`pyalgotrade.dataseries.bards.get_column_values`."""
+        return self.__values
+
+    def getExtra(self):
+        """Returns a dictionary that maps extra column names to a numpy.array with one value per bar."""
+        return self.__extra
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getTimeZone(self):
+        return self.__tzInfo
+
+    def getBarClass(self):
+        return self.__barClass
+
+    def getExtraParser(self):
+        return self.__extraParser
+
+    def checkValues(self):
+        """Raises the same exception that building bars would raise if some bar has invalid values, like a high
+        lower than the low, without building every bar."""
+        open_ = self.__values[:, bards.OPEN]
+        close = self.__values[:, bards.CLOSE]
+        high = self.__values[:, bards.HIGH]
+        low = self.__values[:, bards.LOW]
+        invalid = (high < low) | (high < open_) | (high < close) | (low > open_) | (low > close)
+        if invalid.any():
+            self.__buildBar(int(invalid.argmax()))
+
+    def compress(self, mask):
+        """Returns the bars for which mask is True.
+
+        :param mask: One value for each bar.
+        :type mask: numpy.array of booleans.
+        """
+        return self.__subset(np.flatnonzero(mask))
+
+    def sorted(self):
+        """Returns the bars sorted by datetime. Bars with the same datetime keep their order."""
+        if np.all(self.__dateTimes[1:] >= self.__dateTimes[:-1]):
+            return self
+        return self.__subset(np.argsort(self.__dateTimes, kind="mergesort"))
+
+
+def concatenate(barColumnsList):
+    """Returns a :class:`BarColumns` with the bars from many :class:`BarColumns` instances, or None if those don't have
+    the same frequency, timezone, extra columns, bar class and extra parser."""
+    first = barColumnsList[0]
+    for barColumns in barColumnsList[1:]:
+        if (
+            barColumns.getFrequency() != first.getFrequency() or
+            barColumns.getTimeZone() != first.getTimeZone() or
+            set(barColumns.getExtra().keys()) != set(first.getExtra().keys()) or
+            barColumns.getBarClass() != first.getBarClass() or
+            barColumns.getExtraParser() != first.getExtraParser()
+        ):
+            return None
+
+    extra = {}
+    for name in first.getExtra().keys():
+        extra[name] = np.concatenate([barColumns.getExtra()[name] for barColumns in barColumnsList])
+    return BarColumns(
+        np.concatenate([barColumns.getEpochNs() for barColumns in barColumnsList]),
+        np.concatenate([barColumns.getValues() for barColumns in barColumnsList]),
+        first.getFrequency(), first.getTimeZone(), extra, first.getBarClass(), first.getExtraParser()
+    )
+
+
+def from_bars(bars):
+    """Returns a :class:`BarColumns` with the values from a list of bars, or None if those can't be stored as columns.
+    That is the case if the list is empty, if bars have extra columns, or if bars don't share the same class, frequency
+    and pytz timezone.
+
+    :param bars: The bars.
+    :type bars: list of :class:`pyalgotrade.bar.Bar`.
+    """
+    if len(bars) == 0:
+        return None
+
+    first = bars[0]
+    barClass = type(first)
+    frequency = first.getFrequency()
+    tzInfo = first.getDateTime().tzinfo
+    zone = None
+    if tzInfo is not None:
+        zone = getattr(tzInfo, "zone", None)
+        if zone is None:
+            return None
+        tzInfo = pytz.timezone(zone)
+
+    dateTimes = np.empty(len(bars), dtype=np.int64)
+    values = np.empty((len(bars), bards.COLUMN_COUNT))
+    for pos, bar_ in enumerate(bars):
+        dateTime = bar_.getDateTime()
+        if (
+            type(bar_) is not barClass or bar_.getFrequency() != frequency or len(bar_.getExtraColumns()) or
+            getattr(dateTime.tzinfo, "zone", None) != zone
+        ):
+            return None
+        adjClose = bar_.getAdjClose()
+        dateTimes[pos] = dt.datetime_to_epoch_ns(dateTime)
+        values[pos] = [
+            bar_.getOpen(), bar_.getClose(), bar_.getHigh(), bar_.getLow(), bar_.getVolume(),
+            np.nan if adjClose is None else adjClose
+        ]
+    return BarColumns(dateTimes, values, frequency, tzInfo, barClass=barClass)
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import multiprocessing
+
 
 def sanitize_ohlc(open_, high, low, close):
     if low > open_:
@@ -29,3 +31,30 @@ def sanitize_ohlc(open_, high, low, close):
     if high < close:
         high = close
     return open_, high, low, close
+
+
+def parallel_map(function, args, workerCount=None):
+    """Calls a function for every item in args using a pool of processes, and returns the results in the same order.
+
+    :param function: A module level function, so it can be used from other processes.
+    :param args: The arguments for each call.
+    :type args: list.
+    :param workerCount: The number of processes to use. If None then as many processes as CPUs are used.
+    :type workerCount: int.
+    """
+    assert(workerCount is None or workerCount > 0)
+    if workerCount is None:
+        workerCount = multiprocessing.cpu_count()
+    workerCount = min(workerCount, len(args))
+
+    # Avoid starting processes if there is nothing to run in parallel.
+    if workerCount <= 1:
+        return map(function, args)
+
+    pool = multiprocessing.Pool(workerCount)
+    try:
+        ret = pool.map(function, args, chunksize=1)
+    finally:
+        pool.terminate()
+        pool.join()
+    return ret
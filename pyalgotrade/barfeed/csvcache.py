@@ -0,0 +1,229 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pytz
+
+from pyalgotrade.barfeed import columnar
+
+# Bump this if the cache format changes so old entries are not used.
+FORMAT_VERSION = 1
+
+
+class NotCacheable(Exception):
+    pass
+
+
+# Returns a value that identifies a parser setting, or raises NotCacheable if there is no stable way to identify it.
+def _key_value(value):
+    if isinstance(value, (tuple, list)):
+        ret = tuple(_key_value(item) for item in value)
+    elif isinstance(value, dict):
+        ret = tuple(sorted((key, _key_value(item)) for key, item in value.iteritems()))
+    elif isinstance(value, datetime.tzinfo):
+        ret = ("tz", get_zone(value))
+    elif isinstance(value, type) or callable(value):
+        ret = get_qualified_name(value)
+    elif value is None or isinstance(value, (bool, int, long, float, basestring, datetime.time)):
+        ret = value
+    else:
+        raise NotCacheable("%r can't be used as a cache key" % (value,))
+    return ret
+
+
+def get_zone(timeZone):
+    """Returns the name of a pytz timezone, or raises NotCacheable if it doesn't have one."""
+    zone = getattr(timeZone, "zone", None)
+    if zone is None:
+        raise NotCacheable("%r is not a pytz timezone" % (timeZone,))
+    return zone
+
+
+def get_qualified_name(obj):
+    """Returns the module:name string for a module level class or function, or raises NotCacheable if it can't be
+    imported back using that name."""
+    ret = "%s:%s" % (getattr(obj, "__module__", None), getattr(obj, "__name__", None))
+    if import_qualified_name(ret) is not obj:
+        raise NotCacheable("%r is not a module level class or function" % (obj,))
+    return ret
+
+
+def import_qualified_name(qualifiedName):
+    moduleName, name = qualifiedName.split(":")
+    try:
+        module = __import__(moduleName, fromlist=[name])
+        return getattr(module, name)
+    except (ImportError, AttributeError, ValueError):
+        return None
+
+
+def get_entry_name(path, parserKey):
+    """Returns the name of the cache entry for a file parsed with a given configuration, or None if it can't be cached.
+    The name changes if the size or the modification time of the file changes.
+
+    :param path: The path to the file.
+    :type path: string.
+    :param parserKey: The values that identify how the file is parsed. Check
+        :meth:`pyalgotrade.barfeed.csvfeed.RowParser.getCacheKey`.
+    """
+    if parserKey is None:
+        return None
+    try:
+        parserKey = _key_value(parserKey)
+    except NotCacheable:
+        return None
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    # Entries for the same file and configuration share a prefix so stale versions can be removed.
+    prefix = hashlib.sha1(repr((FORMAT_VERSION, path, parserKey))).hexdigest()
+    version = hashlib.sha1(repr((stat.st_size, stat.st_mtime))).hexdigest()
+    return "%s-%s" % (prefix, version[:16])
+
+
+def _get_path(cacheDir, entryName, suffix):
+    return os.path.join(cacheDir, entryName + suffix)
+
+
+# Writes a file and moves it to its final location at once, so that concurrent readers never see a partial file.
+def _write_file(path, writeFun):
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writeFun(f)
+        try:
+            os.rename(tmpPath, path)
+        except OSError:
+            # Renaming over an existing file fails on Windows.
+            os.remove(path)
+            os.rename(tmpPath, path)
+    except:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+
+def save(cacheDir, entryName, barColumns):
+    """Saves a :class:`pyalgotrade.barfeed.columnar.BarColumns` to a cache entry. Returns False if it can't be cached.
+
+    :param cacheDir: The directory where the cache is. It is created if it doesn't exist.
+    :type cacheDir: string.
+    :param entryName: The name returned by :func:`get_entry_name`.
+    :type entryName: string.
+    :param barColumns: The bars to save.
+    :type barColumns: :class:`pyalgotrade.barfeed.columnar.BarColumns`.
+    """
+    try:
+        timeZone = barColumns.getTimeZone()
+        metadata = {
+            "count": len(barColumns),
+            "frequency": barColumns.getFrequency(),
+            "timezone": None if timeZone is None else get_zone(timeZone),
+            "barClass": get_qualified_name(barColumns.getBarClass()),
+            "extraParser": None,
+            "extra": sorted(barColumns.getExtra().keys()),
+        }
+        if barColumns.getExtraParser() is not None:
+            metadata["extraParser"] = get_qualified_name(barColumns.getExtraParser())
+    except NotCacheable:
+        return False
+
+    # Extra columns are saved as strings so they can be memory mapped.
+    extra = []
+    for name in metadata["extra"]:
+        values = barColumns.getExtra()[name]
+        if values.dtype == object:
+            if not all(isinstance(value, str) for value in values):
+                return False
+            values = values.astype(str)
+        if values.dtype.hasobject:
+            return False
+        extra.append(values)
+
+    if not os.path.exists(cacheDir):
+        try:
+            os.makedirs(cacheDir)
+        except OSError:
+            # Some other process may have just created it.
+            if not os.path.isdir(cacheDir):
+                raise
+
+    _write_file(_get_path(cacheDir, entryName, ".datetimes.npy"), lambda f: np.save(f, barColumns.getEpochNs()))
+    _write_file(_get_path(cacheDir, entryName, ".values.npy"), lambda f: np.save(f, barColumns.getValues()))
+    for i, values in enumerate(extra):
+        _write_file(_get_path(cacheDir, entryName, ".extra%d.npy" % i), lambda f: np.save(f, values))
+    # The metadata is written last since entries without it are ignored.
+    _write_file(_get_path(cacheDir, entryName, ".json"), lambda f: json.dump(metadata, f))
+
+    # Remove the entries for previous versions of the same file.
+    prefix = entryName.split("-")[0]
+    for path in glob.glob(os.path.join(cacheDir, prefix + "-*")):
+        if not os.path.basename(path).startswith(entryName + "."):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return True
+
+
+def load(cacheDir, entryName):
+    """Loads a :class:`pyalgotrade.barfeed.columnar.BarColumns` from a cache entry. The arrays are memory mapped instead
+    of being read. Returns None if the entry is not available.
+
+    :param cacheDir: The directory where the cache is.
+    :type cacheDir: string.
+    :param entryName: The name returned by :func:`get_entry_name`.
+    :type entryName: string.
+    """
+    try:
+        with open(_get_path(cacheDir, entryName, ".json"), "r") as f:
+            metadata = json.load(f)
+        dateTimes = np.load(_get_path(cacheDir, entryName, ".datetimes.npy"), mmap_mode="r")
+        values = np.load(_get_path(cacheDir, entryName, ".values.npy"), mmap_mode="r")
+        extra = {}
+        for i, name in enumerate(metadata["extra"]):
+            extra[name] = np.load(_get_path(cacheDir, entryName, ".extra%d.npy" % i), mmap_mode="r")
+    except (IOError, OSError, ValueError):
+        # Missing, partially removed or corrupt entries are just not used.
+        return None
+
+    barClass = import_qualified_name(metadata["barClass"])
+    extraParser = None
+    if metadata["extraParser"] is not None:
+        extraParser = import_qualified_name(metadata["extraParser"])
+    if (
+        barClass is None or (metadata["extraParser"] is not None and extraParser is None) or
+        len(dateTimes) != metadata["count"] or len(values) != metadata["count"]
+    ):
+        return None
+
+    timeZone = None
+    if metadata["timezone"] is not None:
+        timeZone = pytz.timezone(metadata["timezone"])
+    return columnar.BarColumns(
+        dateTimes, values, metadata["frequency"], timeZone, extra, barClass, extraParser
+    )
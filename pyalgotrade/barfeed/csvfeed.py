@@ -21,9 +21,14 @@
 from pyalgotrade.utils import dt
 from pyalgotrade.utils import csvutils
 from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import common
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import csvcache
+from pyalgotrade.dataseries import bards
 from pyalgotrade import bar
 
 import datetime
+import numpy as np
 import pytz
 
 
@@ -38,12 +43,42 @@ class RowParser(object):
     def getDelimiter(self):
         raise NotImplementedError()
 
+    # Override to parse every row at once. Returns a columnar.BarColumns, or None if the file has to be parsed one row at
+    # a time.
+    def parseColumns(self, path):
+        return None
+
+    # Override to allow caching parsed files. Returns the settings that affect how bars are parsed (like the timezone,
+    # the daily bar time or the column names) in a tuple, or None if bars can't be cached.
+    def getCacheKey(self):
+        return None
+
+    # Called with the bars loaded from the cache, since those were not parsed.
+    def onCachedColumns(self, barColumns):
+        pass
+
 
 # Interface for bar filters.
 class BarFilter(object):
     def includeBar(self, bar_):
         raise NotImplementedError()
 
+    # Override to return True if includeColumns is implemented. Otherwise bars are parsed and filtered one at a time.
+    def supportsColumns(self):
+        return False
+
+    # Override to filter bars stored as columns without building them. Returns a numpy.array of booleans with one value
+    # for each bar in a columnar.BarColumns.
+    def includeColumns(self, barColumns):
+        raise NotImplementedError()
+
+
+def _datetime_to_epoch_ns(dateTime, tzInfo):
+    # Comparing bars with datetimes is not possible if only one of them is naive.
+    if dt.datetime_is_naive(dateTime) != (tzInfo is None):
+        raise TypeError("can't compare offset-naive and offset-aware datetimes")
+    return dt.datetime_to_epoch_ns(dateTime)
+
 
 class DateRangeFilter(BarFilter):
     def __init__(self, fromDate=None, toDate=None):
@@ -57,6 +92,19 @@ class DateRangeFilter(BarFilter):
             return False
         return True
 
+    def supportsColumns(self):
+        # Subclasses that override includeBar, like USEquitiesRTH, have to be applied one bar at a time.
+        return type(self).includeBar == DateRangeFilter.includeBar
+
+    def includeColumns(self, barColumns):
+        dateTimes = barColumns.getEpochNs()
+        ret = np.ones(len(dateTimes), dtype=bool)
+        if self.__toDate:
+            ret &= dateTimes <= _datetime_to_epoch_ns(self.__toDate, barColumns.getTimeZone())
+        if self.__fromDate:
+            ret &= dateTimes >= _datetime_to_epoch_ns(self.__fromDate, barColumns.getTimeZone())
+        return ret
+
 
 # US Equities Regular Trading Hours filter
 # Monday ~ Friday
@@ -99,6 +147,7 @@ class BarFeed(membf.BarFeed):
 
         self.__barFilter = None
         self.__dailyTime = datetime.time(0, 0, 0)
+        self.__cacheDir = None
 
     def getDailyBarTime(self):
         return self.__dailyTime
@@ -112,16 +161,145 @@ class BarFeed(membf.BarFeed):
     def setBarFilter(self, barFilter):
         self.__barFilter = barFilter
 
-    def addBarsFromCSV(self, instrument, path, rowParser):
-        # Load the csv file
-        loadedBars = []
-        reader = csvutils.FastDictReader(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
-        for row in reader:
-            bar_ = rowParser.parseBar(row)
-            if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
-                loadedBars.append(bar_)
+    def getCacheDir(self):
+        return self.__cacheDir
+
+    def setCacheDir(self, cacheDir):
+        """Sets a directory where parsed files are cached in a binary format, so loading them again doesn't require
+        parsing. Cached files are memory mapped, and the cache for a file is discarded if its size or modification time
+        changes. The same directory can be shared by many feeds and processes.
+
+        :param cacheDir: The path to the directory, or None to disable caching. It is created if it doesn't exist.
+        :type cacheDir: string.
+
+        .. note::
+            Cached bars are stored before the bar filter is applied, so the same cache is used with different filters.
+            Filters that don't support bars stored as columns, like :class:`USEquitiesRTH`, are applied as rows are
+            parsed, so the cache is not used with those.
+        """
+        self.__cacheDir = cacheDir
+
+    def createRowParser(self, timezone=None):
+        # Subclasses should implement this and return the row parser to use with addBarsFromCSV.
+        raise NotImplementedError()
+
+    def onBarsLoaded(self, instrument, rowParser):
+        # Called once the bars for an instrument were loaded using a row parser. Subclasses may override this to check
+        # the state of the row parser.
+        pass
 
+    def addBarsFromCSV(self, instrument, path, rowParser):
+        loadedBars = load_bars(path, rowParser, self.__barFilter, self.__cacheDir)
         self.addBarsFromSequence(instrument, loadedBars)
+        self.onBarsLoaded(instrument, rowParser)
+
+    def addBarsFromCSVs(self, paths, timezone=None, workerCount=None):
+        """Loads bars for many instruments from CSV formatted files, parsing files in parallel using many processes.
+        The instruments get registered in the bar feed.
+
+        :param paths: A dictionary that maps instrument identifiers to paths, or a list of (instrument, path) tuples if
+            there are many files for the same instrument.
+        :type paths: dict or list.
+        :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+        :type timezone: A pytz timezone.
+        :param workerCount: The number of files to parse in parallel. If None then as many workers as CPUs are used.
+        :type workerCount: int.
+
+        .. note::
+            Bars are sent back from the worker processes as columns, which is cheaper than sending
+            :class:`pyalgotrade.bar.Bar` instances.
+        """
+        if isinstance(paths, dict):
+            paths = paths.items()
+        args = [
+            (path, self.createRowParser(timezone), self.__barFilter, self.__cacheDir) for instrument, path in paths
+        ]
+        results = common.parallel_map(_load_compact_bars, args, workerCount)
+        for (instrument, path), (loadedBars, rowParser) in zip(paths, results):
+            self.addBarsFromSequence(instrument, loadedBars)
+            self.onBarsLoaded(instrument, rowParser)
+
+
+def _load_rows(path, rowParser, barFilter):
+    ret = []
+    reader = csvutils.FastDictReader(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
+    for row in reader:
+        bar_ = rowParser.parseBar(row)
+        if bar_ is not None and (barFilter is None or barFilter.includeBar(bar_)):
+            ret.append(bar_)
+    return ret
+
+
+# Returns every bar in the file, either from the cache or parsed and then cached.
+def _load_cached(path, rowParser, cacheDir, entryName):
+    ret = csvcache.load(cacheDir, entryName)
+    if ret is not None:
+        rowParser.onCachedColumns(ret)
+        return ret
+
+    ret = rowParser.parseColumns(path)
+    if ret is None:
+        ret = _load_rows(path, rowParser, None)
+        # Bars that can't be stored as columns are not cached.
+        barColumns = columnar.from_bars(ret)
+        if barColumns is not None:
+            ret = barColumns
+    if isinstance(ret, columnar.BarColumns):
+        csvcache.save(cacheDir, entryName, ret)
+    return ret
+
+
+def load_bars(path, rowParser, barFilter=None, cacheDir=None):
+    """Loads the bars from a CSV file. Returns a :class:`pyalgotrade.barfeed.columnar.BarColumns` if the row parser
+    supports parsing every row at once or if bars are cached, or a list of bars otherwise.
+
+    :param path: The path to the CSV file.
+    :type path: string.
+    :param rowParser: The parser for the rows.
+    :type rowParser: :class:`RowParser`.
+    :param barFilter: An optional filter for the bars.
+    :type barFilter: :class:`BarFilter`.
+    :param cacheDir: An optional directory to cache parsed files. Check :meth:`BarFeed.setCacheDir`.
+    :type cacheDir: string.
+
+    .. note::
+        Rows are only parsed all at once, and cached bars are only used, if the bar filter supports bars stored as
+        columns, like :class:`DateRangeFilter` does. Other filters, like :class:`USEquitiesRTH`, need every bar to be
+        built, so rows are parsed and filtered one at a time.
+    """
+    # Filters that don't support columns are applied as rows are parsed.
+    if barFilter is not None and not barFilter.supportsColumns():
+        return _load_rows(path, rowParser, barFilter)
+
+    entryName = None
+    if cacheDir is not None:
+        entryName = csvcache.get_entry_name(path, rowParser.getCacheKey())
+
+    if entryName is not None:
+        ret = _load_cached(path, rowParser, cacheDir, entryName)
+    else:
+        # Parse every row at once if the row parser supports it.
+        ret = rowParser.parseColumns(path)
+        if ret is None:
+            ret = _load_rows(path, rowParser, None)
+
+    if barFilter is not None:
+        if isinstance(ret, columnar.BarColumns):
+            ret = ret.compress(barFilter.includeColumns(ret))
+        else:
+            ret = [bar_ for bar_ in ret if barFilter.includeBar(bar_)]
+    return ret
+
+
+# Loads bars in a worker process. The row parser is returned since parsing may change its state.
+def _load_compact_bars(args):
+    path, rowParser, barFilter, cacheDir = args
+    ret = load_bars(path, rowParser, barFilter, cacheDir)
+    if not isinstance(ret, columnar.BarColumns):
+        barColumns = columnar.from_bars(ret)
+        if barColumns is not None:
+            ret = barColumns
+    return ret, rowParser
 
 
 class GenericRowParser(RowParser):
@@ -152,9 +330,22 @@ class GenericRowParser(RowParser):
             ret = dt.localize(ret, self.__timezone)
         return ret
 
+    def __checkAdjClose(self, barColumns):
+        if not np.isnan(barColumns.getValues()[:, bards.ADJ_CLOSE]).all():
+            self.__haveAdjClose = True
+
     def barsHaveAdjClose(self):
         return self.__haveAdjClose
 
+    def getCacheKey(self):
+        return (
+            type(self), self.__columnNames, self.__dateTimeFormat, self.__dailyBarTime, self.__frequency,
+            self.__timezone or None, self.__barClass
+        )
+
+    def onCachedColumns(self, barColumns):
+        self.__checkAdjClose(barColumns)
+
     def getFieldNames(self):
         # It is expected for the first row to have the field names.
         return None
@@ -162,6 +353,49 @@ class GenericRowParser(RowParser):
     def getDelimiter(self):
         return ","
 
+    def parseColumns(self, path):
+        csvColumns = csvutils.read_columns(path, self.getDelimiter())
+        if csvColumns is None:
+            return None
+        columns = dict(zip(*csvColumns))
+
+        # Parse the datetimes all at once.
+        dateTimes = dt.parse(columns[self.__dateTimeColName], self.__dateTimeFormat)
+        if self.__dailyBarTime is not None:
+            # Keep the date and set the time, like datetime.combine.
+            dayNs = 86400 * 10**9
+            timeNs = (
+                (self.__dailyBarTime.hour * 3600 + self.__dailyBarTime.minute * 60 + self.__dailyBarTime.second) *
+                10**6 + self.__dailyBarTime.microsecond
+            ) * 1000
+            dateTimes = dateTimes // dayNs * dayNs + timeNs
+        if self.__timezone:
+            dateTimes = dt.localize_epoch_ns(dateTimes, self.__timezone)
+
+        values = np.empty((len(dateTimes), bards.COLUMN_COUNT))
+        values[:, bards.OPEN] = columns[self.__openColName].astype(float)
+        values[:, bards.HIGH] = columns[self.__highColName].astype(float)
+        values[:, bards.LOW] = columns[self.__lowColName].astype(float)
+        values[:, bards.CLOSE] = columns[self.__closeColName].astype(float)
+        values[:, bards.VOLUME] = columns[self.__volumeColName].astype(float)
+        values[:, bards.ADJ_CLOSE] = np.nan
+        if self.__adjCloseColName is not None and self.__adjCloseColName in columns:
+            values[:, bards.ADJ_CLOSE] = csvutils.column_to_float(columns[self.__adjCloseColName])
+
+        # Extra columns are kept as strings and values are parsed as bars are built.
+        extra = {}
+        for name, column in columns.iteritems():
+            if name not in self.__columnNames:
+                extra[name] = column
+
+        ret = columnar.BarColumns(
+            dateTimes, values, self.__frequency, self.__timezone or None, extra, self.__barClass,
+            csvutils.float_or_string
+        )
+        ret.checkValues()
+        self.__checkAdjClose(ret)
+        return ret
+
     def parseBar(self, csvRowDict):
         dateTime = self._parseDate(csvRowDict[self.__dateTimeColName])
         open_ = float(csvRowDict[self.__openColName])
@@ -263,16 +497,18 @@ class GenericBarFeed(BarFeed):
         :type timezone: A pytz timezone.
         """
 
+        super(GenericBarFeed, self).addBarsFromCSV(instrument, path, self.createRowParser(timezone))
+
+    def createRowParser(self, timezone=None):
         if timezone is None:
             timezone = self.__timezone
 
-        rowParser = GenericRowParser(
+        return GenericRowParser(
             self.__columnNames, self.__dateTimeFormat, self.getDailyBarTime(), self.getFrequency(),
             timezone, self.__barClass
         )
 
-        super(GenericBarFeed, self).addBarsFromCSV(instrument, path, rowParser)
-
+    def onBarsLoaded(self, instrument, rowParser):
         if rowParser.barsHaveAdjClose():
             self.__haveAdjClose = True
         elif self.__haveAdjClose:
@@ -35,3 +35,7 @@ class Database(object):
 
     def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
         raise NotImplementedError()
+
+    # Override to return bars one at a time instead of loading them all at once.
+    def iterBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+        return iter(self.getBars(instrument, frequency, timezone, fromDateTime, toDateTime))
@@ -72,6 +72,9 @@ class RowParser(csvfeed.RowParser):
             ret = dt.localize(ret, self.__timezone)
         return ret
 
+    def getCacheKey(self):
+        return (type(self), self.__dailyBarTime, self.__frequency, self.__timezone, self.__sanitize)
+
     def getFieldNames(self):
         # It is expected for the first row to have the field names.
         return None
@@ -141,8 +144,10 @@ class Feed(csvfeed.BarFeed):
         :type timezone: A pytz timezone.
         """
 
+        super(Feed, self).addBarsFromCSV(instrument, path, self.createRowParser(timezone))
+
+    def createRowParser(self, timezone=None):
         if timezone is None:
             timezone = self.__timezone
 
-        rowParser = RowParser(self.getDailyBarTime(), self.getFrequency(), timezone, self.__sanitizeBars)
-        super(Feed, self).addBarsFromCSV(instrument, path, rowParser)
+        return RowParser(self.getDailyBarTime(), self.getFrequency(), timezone, self.__sanitizeBars)
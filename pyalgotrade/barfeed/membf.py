@@ -18,9 +18,15 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
+import numpy as np
+
 from pyalgotrade import barfeed
 from pyalgotrade import bar
-from pyalgotrade import utils
+from pyalgotrade import technical
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.dataseries import bards
 
 
 # A non real-time BarFeed responsible for:
@@ -36,13 +42,17 @@ class BarFeed(barfeed.BaseBarFeed):
 
         self.__bars = {}
         self.__nextPos = {}
+        # A heap with the (datetime, instrument) of the next bar for each instrument, built when first needed.
+        self.__heap = None
         self.__started = False
         self.__currDateTime = None
+        self.__precomputeIndicators = False
 
     def reset(self):
         self.__nextPos = {}
         for instrument in self.__bars.keys():
             self.__nextPos.setdefault(instrument, 0)
+        self.__heap = None
         self.__currDateTime = None
         super(BarFeed, self).reset()
 
@@ -52,6 +62,41 @@ class BarFeed(barfeed.BaseBarFeed):
     def start(self):
         super(BarFeed, self).start()
         self.__started = True
+        if self.__precomputeIndicators:
+            self.__precompute()
+
+    # Precomputes the indicators built on top of the field dataseries, since every bar is known beforehand.
+    def __precompute(self):
+        for instrument, bars in self.__bars.iteritems():
+            fieldDataSeries = [
+                ds for ds in self[instrument].getCreatedDataSeries() if isinstance(ds, bards.BarFieldDataSeries)
+            ]
+            bars = bars[self.__nextPos[instrument]:]
+            if len(fieldDataSeries) == 0 or len(bars) == 0:
+                continue
+
+            if isinstance(bars, columnar.BarColumns):
+                dateTimes = bars.getDateTimes()
+                columns = bars.getValues()
+            else:
+                dateTimes = [bar_.getDateTime() for bar_ in bars]
+                columns = np.array([bards.get_column_values(bar_) for bar_ in bars], dtype=float)
+            for ds in fieldDataSeries:
+                technical.precompute(ds, dateTimes, columns[:, ds.getColumn()])
+
+    def setPrecomputeIndicators(self, precompute):
+        """Sets whether indicators should be calculated for every bar when the feed starts, instead of one bar at a
+        time. Check :func:`pyalgotrade.technical.precompute` for details.
+
+        :param precompute: True to precompute indicators.
+        :type precompute: boolean.
+
+        .. note::
+            Precomputed values are the same as those calculated one at a time, except for moving averages and
+            statistics calculated over each window, like :class:`pyalgotrade.technical.ma.SMA`, that may differ
+            in the last digits (a relative difference smaller than 1e-9).
+        """
+        self.__precomputeIndicators = precompute
 
     def stop(self):
         pass
@@ -63,33 +108,61 @@ class BarFeed(barfeed.BaseBarFeed):
         if self.__started:
             raise Exception("Can't add more bars once you started consuming bars")
 
-        self.__bars.setdefault(instrument, [])
         self.__nextPos.setdefault(instrument, 0)
 
-        # Add and sort the bars
-        self.__bars[instrument].extend(bars)
-        barCmp = lambda x, y: cmp(x.getDateTime(), y.getDateTime())
-        self.__bars[instrument].sort(barCmp)
-
+        # Bars stored as columns are kept that way, so bars are only built as they are returned.
+        instrumentBars = self.__bars.get(instrument, [])
+        barColumns = None
+        if isinstance(bars, columnar.BarColumns):
+            if len(instrumentBars) == 0:
+                barColumns = bars
+            elif isinstance(instrumentBars, columnar.BarColumns):
+                barColumns = columnar.concatenate([instrumentBars, bars])
+
+        if barColumns is not None:
+            self.__bars[instrument] = barColumns.sorted()
+        else:
+            # Add and sort the bars
+            instrumentBars = list(instrumentBars)
+            instrumentBars.extend(bars)
+            barCmp = lambda x, y: cmp(x.getDateTime(), y.getDateTime())
+            instrumentBars.sort(barCmp)
+            self.__bars[instrument] = instrumentBars
+
+        self.__heap = None
         self.registerInstrument(instrument)
 
-    def eof(self):
-        ret = True
-        # Check if there is at least one more bar to return.
-        for instrument, bars in self.__bars.iteritems():
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = False
-                break
+    # Returns the datetime of the next bar for an instrument, or None if there are no more bars.
+    def __getNextDateTime(self, instrument):
+        bars = self.__bars[instrument]
+        nextPos = self.__nextPos[instrument]
+        ret = None
+        if nextPos < len(bars):
+            # Avoid building the bar if bars are stored as columns.
+            if isinstance(bars, columnar.BarColumns):
+                ret = bars.getDateTime(nextPos)
+            else:
+                ret = bars[nextPos].getDateTime()
         return ret
 
+    def __getHeap(self):
+        if self.__heap is None:
+            self.__heap = []
+            for instrument in self.__bars.iterkeys():
+                dateTime = self.__getNextDateTime(instrument)
+                if dateTime is not None:
+                    self.__heap.append((dateTime, instrument))
+            heapq.heapify(self.__heap)
+        return self.__heap
+
+    def eof(self):
+        return len(self.__getHeap()) == 0
+
     def peekDateTime(self):
         ret = None
-
-        for instrument, bars in self.__bars.iteritems():
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = utils.safe_min(ret, bars[nextPos].getDateTime())
+        heap = self.__getHeap()
+        if len(heap):
+            ret = heap[0][0]
         return ret
 
     def getNextBars(self):
@@ -99,13 +172,17 @@ class BarFeed(barfeed.BaseBarFeed):
         if smallestDateTime is None:
             return None
 
-        # Make a second pass to get all the bars that had the smallest datetime.
+        heap = self.__getHeap()
         ret = {}
-        for instrument, bars in self.__bars.iteritems():
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars) and bars[nextPos].getDateTime() == smallestDateTime:
-                ret[instrument] = bars[nextPos]
-                self.__nextPos[instrument] += 1
+        while len(heap) and heap[0][0] == smallestDateTime:
+            instrument = heapq.heappop(heap)[1]
+            ret[instrument] = self.__bars[instrument][self.__nextPos[instrument]]
+            self.__nextPos[instrument] += 1
+        # Instruments are pushed back once every bar was taken, so duplicate bars are returned in the next call.
+        for instrument in ret.iterkeys():
+            dateTime = self.__getNextDateTime(instrument)
+            if dateTime is not None:
+                heapq.heappush(heap, (dateTime, instrument))
 
         if self.__currDateTime == smallestDateTime:
             raise Exception("Duplicate bars found for %s on %s" % (ret.keys(), smallestDateTime))
@@ -84,6 +84,9 @@ class RowParser(csvfeed.RowParser):
             ret = dt.localize(ret, self.__timezone)
         return ret
 
+    def getCacheKey(self):
+        return (type(self), self.__frequency, self.__dailyBarTime, self.__timezone)
+
     def getFieldNames(self):
         return ["Date Time", "Open", "High", "Low", "Close", "Volume"]
 
@@ -139,11 +142,13 @@ class Feed(csvfeed.BarFeed):
         :type timezone: A pytz timezone.
         """
 
+        super(Feed, self).addBarsFromCSV(instrument, path, self.createRowParser(timezone))
+
+    def createRowParser(self, timezone=None):
         if isinstance(timezone, int):
             raise Exception("timezone as an int parameter is not supported anymore. Please use a pytz timezone instead.")
 
         if timezone is None:
             timezone = self.__timezone
 
-        rowParser = RowParser(self.getFrequency(), self.getDailyBarTime(), timezone)
-        super(Feed, self).addBarsFromCSV(instrument, path, rowParser)
+        return RowParser(self.getFrequency(), self.getDailyBarTime(), timezone)
@@ -20,6 +20,8 @@
 
 from pyalgotrade.barfeed import dbfeed
 from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import common
 from pyalgotrade import bar
 from pyalgotrade.utils import dt
 
@@ -109,6 +111,9 @@ class Database(dbfeed.Database):
             self.__connection.execute(sql, params)
 
     def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+        return list(self.iterBars(instrument, frequency, timezone, fromDateTime, toDateTime))
+
+    def iterBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
         instrument = normalize_instrument(instrument)
         sql = "select bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.adj_close, bar.frequency" \
             " from bar join instrument on (bar.instrument_id = instrument.instrument_id)" \
@@ -125,24 +130,40 @@ class Database(dbfeed.Database):
         sql += " order by bar.timestamp asc"
         cursor = self.__connection.cursor()
         cursor.execute(sql, args)
-        ret = []
-        for row in cursor:
-            dateTime = dt.timestamp_to_datetime(row[0])
-            if timezone:
-                dateTime = dt.localize(dateTime, timezone)
-            ret.append(bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7]))
-        cursor.close()
-        return ret
+        try:
+            for row in cursor:
+                dateTime = dt.timestamp_to_datetime(row[0])
+                if timezone:
+                    dateTime = dt.localize(dateTime, timezone)
+                yield bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7])
+        finally:
+            cursor.close()
 
     def disconnect(self):
         self.__connection.close()
         self.__connection = None
 
 
+# Loads bars in a worker process, using its own connection.
+def _load_compact_bars(args):
+    dbFilePath, instrument, frequency, timezone, fromDateTime, toDateTime = args
+    db = Database(dbFilePath)
+    try:
+        ret = db.getBars(instrument, frequency, timezone, fromDateTime, toDateTime)
+    finally:
+        db.disconnect()
+    # Bars are sent back as columns, which is cheaper than sending bar instances.
+    barColumns = columnar.from_bars(ret)
+    if barColumns is not None:
+        ret = barColumns
+    return ret
+
+
 class Feed(membf.BarFeed):
     def __init__(self, dbFilePath, frequency, maxLen=None):
         super(Feed, self).__init__(frequency, maxLen)
 
+        self.__dbFilePath = dbFilePath
         self.__db = Database(dbFilePath)
 
     def barsHaveAdjClose(self):
@@ -154,3 +175,32 @@ class Feed(membf.BarFeed):
     def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
         bars = self.__db.getBars(instrument, self.getFrequency(), timezone, fromDateTime, toDateTime)
         self.addBarsFromSequence(instrument, bars)
+
+    def loadBarsForInstruments(self, instruments, timezone=None, fromDateTime=None, toDateTime=None, workerCount=None):
+        """Loads bars for many instruments, reading them in parallel using many processes.
+
+        :param instruments: Instrument identifiers.
+        :type instruments: list.
+        :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+        :type timezone: A pytz timezone.
+        :param fromDateTime: An optional starting datetime.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: An optional ending datetime.
+        :type toDateTime: datetime.datetime.
+        :param workerCount: The number of instruments to load in parallel. If None then as many workers as CPUs are
+            used.
+        :type workerCount: int.
+        """
+        # An in-memory database can't be shared with other processes.
+        if self.__dbFilePath == ":memory:":
+            for instrument in instruments:
+                self.loadBars(instrument, timezone, fromDateTime, toDateTime)
+            return
+
+        args = [
+            (self.__dbFilePath, instrument, self.getFrequency(), timezone, fromDateTime, toDateTime)
+            for instrument in instruments
+        ]
+        results = common.parallel_map(_load_compact_bars, args, workerCount)
+        for instrument, bars in zip(instruments, results):
+            self.addBarsFromSequence(instrument, bars)
@@ -0,0 +1,227 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import heapq
+
+from pyalgotrade import barfeed
+from pyalgotrade import bar
+from pyalgotrade.utils import csvutils
+
+
+class CSVSource(object):
+    """Reads bars from a CSV file one row at a time. The file is opened every time the source is iterated.
+
+    :param path: The path to the CSV file.
+    :type path: string.
+    :param rowParser: The parser for the rows, like :class:`pyalgotrade.barfeed.yahoofeed.RowParser`.
+    :type rowParser: :class:`pyalgotrade.barfeed.csvfeed.RowParser`.
+    :param barFilter: An optional filter for the bars.
+    :type barFilter: :class:`pyalgotrade.barfeed.csvfeed.BarFilter`.
+    """
+
+    def __init__(self, path, rowParser, barFilter=None):
+        self.__path = path
+        self.__rowParser = rowParser
+        self.__barFilter = barFilter
+
+    def __iter__(self):
+        with open(self.__path, "r") as f:
+            reader = csvutils.FastDictReader(
+                f, fieldnames=self.__rowParser.getFieldNames(), delimiter=self.__rowParser.getDelimiter()
+            )
+            for row in reader:
+                bar_ = self.__rowParser.parseBar(row)
+                if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
+                    yield bar_
+
+
+class DatabaseSource(object):
+    """Reads bars from a database one at a time. The query is executed every time the source is iterated.
+
+    :param database: The database, like :class:`pyalgotrade.barfeed.sqlitefeed.Database`.
+    :type database: :class:`pyalgotrade.barfeed.dbfeed.Database`.
+    :param instrument: Instrument identifier.
+    :type instrument: string.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+    :type timezone: A pytz timezone.
+    :param fromDateTime: An optional starting datetime.
+    :type fromDateTime: datetime.datetime.
+    :param toDateTime: An optional ending datetime.
+    :type toDateTime: datetime.datetime.
+    """
+
+    def __init__(self, database, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+        self.__database = database
+        self.__args = (instrument, frequency, timezone, fromDateTime, toDateTime)
+
+    def __iter__(self):
+        return self.__database.iterBars(*self.__args)
+
+
+# The next bar from a source.
+class _SourceCursor(object):
+    def __init__(self, instrument, source):
+        self.__instrument = instrument
+        self.__iterator = iter(source)
+        self.__bar = None
+        self.advance()
+
+    def getBar(self):
+        return self.__bar
+
+    def advance(self):
+        prevBar = self.__bar
+        self.__bar = next(self.__iterator, None)
+        if prevBar is not None and self.__bar is not None and self.__bar.getDateTime() < prevBar.getDateTime():
+            raise Exception("Bars for %s are not sorted by datetime: %s comes after %s" % (
+                self.__instrument, self.__bar.getDateTime(), prevBar.getDateTime()
+            ))
+
+    def close(self):
+        # Release open files or cursors held by generators.
+        close = getattr(self.__iterator, "close", None)
+        if close is not None:
+            close()
+
+
+class Feed(barfeed.BaseBarFeed):
+    """A :class:`pyalgotrade.barfeed.BaseBarFeed` that reads bars from many sources as they are needed, instead of
+    loading them all in memory. Bars from different instruments are merged by datetime, and only the next bar from
+    each source is held, so memory usage doesn't depend on the number of bars.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Each source must return bars sorted by datetime, since bars are not sorted. For example, Yahoo! Finance
+          files are sorted in descending order, so they need to be loaded with
+          :class:`pyalgotrade.barfeed.yahoofeed.Feed` instead.
+        * Sources are opened when the feed starts, and again if the feed is reset.
+    """
+
+    def __init__(self, frequency, maxLen=None):
+        super(Feed, self).__init__(frequency, maxLen)
+
+        self.__sources = []
+        self.__cursors = None
+        # A heap of (datetime, source index) with the next bar from each source.
+        self.__heap = []
+        self.__currDateTime = None
+        self.__barsHaveAdjClose = False
+
+    def addBarSource(self, instrument, source):
+        """Adds a source of bars for a given instrument. The instrument gets registered in the bar feed.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param source: An iterable that returns the bars sorted by datetime, like :class:`CSVSource`,
+            :class:`DatabaseSource` or a :class:`pyalgotrade.barfeed.columnar.BarColumns`. It must be possible to
+            iterate it more than once if the feed is reset.
+        """
+        if self.__cursors is not None:
+            raise Exception("Can't add more bar sources once you started consuming bars")
+        self.__sources.append((instrument, source))
+        self.registerInstrument(instrument)
+
+    def __open(self):
+        if self.__cursors is not None:
+            return
+        self.__cursors = []
+        self.__heap = []
+        for instrument, source in self.__sources:
+            cursor = _SourceCursor(instrument, source)
+            if cursor.getBar() is not None:
+                self.__heap.append((cursor.getBar().getDateTime(), len(self.__cursors)))
+            self.__cursors.append(cursor)
+        heapq.heapify(self.__heap)
+        # Bars have adjusted close if the first bar from every source has it.
+        self.__barsHaveAdjClose = len(self.__heap) > 0 and all(
+            self.__cursors[index].getBar().getAdjClose() is not None for dateTime, index in self.__heap
+        )
+
+    def __close(self):
+        if self.__cursors is not None:
+            for cursor in self.__cursors:
+                cursor.close()
+        # Sources are not opened again unless the feed is reset.
+        self.__cursors = []
+        self.__heap = []
+
+    def reset(self):
+        self.__close()
+        self.__cursors = None
+        self.__currDateTime = None
+        super(Feed, self).reset()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        self.__open()
+        return self.__barsHaveAdjClose
+
+    def start(self):
+        super(Feed, self).start()
+        self.__open()
+
+    def stop(self):
+        self.__close()
+
+    def join(self):
+        pass
+
+    def eof(self):
+        self.__open()
+        return len(self.__heap) == 0
+
+    def peekDateTime(self):
+        self.__open()
+        ret = None
+        if len(self.__heap):
+            ret = self.__heap[0][0]
+        return ret
+
+    def getNextBars(self):
+        smallestDateTime = self.peekDateTime()
+        if smallestDateTime is None:
+            return None
+
+        # Pop every source whose next bar has the smallest datetime, and push them back with their following bar.
+        ret = {}
+        while len(self.__heap) and self.__heap[0][0] == smallestDateTime:
+            dateTime, index = heapq.heappop(self.__heap)
+            cursor = self.__cursors[index]
+            instrument = self.__sources[index][0]
+            if instrument in ret:
+                raise Exception("Duplicate bars found for %s on %s" % (instrument, smallestDateTime))
+            ret[instrument] = cursor.getBar()
+            cursor.advance()
+            if cursor.getBar() is not None:
+                heapq.heappush(self.__heap, (cursor.getBar().getDateTime(), index))
+
+        if self.__currDateTime == smallestDateTime:
+            raise Exception("Duplicate bars found for %s on %s" % (ret.keys(), smallestDateTime))
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars(ret)
@@ -64,6 +64,9 @@ class RowParser(csvfeed.RowParser):
             ret = dt.localize(ret, self.__timezone)
         return ret
 
+    def getCacheKey(self):
+        return (type(self), self.__dailyBarTime, self.__frequency, self.__timezone, self.__sanitize, self.__barClass)
+
     def getFieldNames(self):
         # It is expected for the first row to have the field names.
         return None
@@ -140,13 +143,15 @@ class Feed(csvfeed.BarFeed):
         :type timezone: A pytz timezone.
         """
 
+        super(Feed, self).addBarsFromCSV(instrument, path, self.createRowParser(timezone))
+
+    def createRowParser(self, timezone=None):
         if isinstance(timezone, int):
             raise Exception("timezone as an int parameter is not supported anymore. Please use a pytz timezone instead.")
 
         if timezone is None:
             timezone = self.__timezone
 
-        rowParser = RowParser(
+        return RowParser(
             self.getDailyBarTime(), self.getFrequency(), timezone, self.__sanitizeBars, self.__barClass
         )
-        super(Feed, self).addBarsFromCSV(instrument, path, rowParser)
@@ -20,6 +20,8 @@
 
 import abc
 
+import numpy as np
+
 from pyalgotrade import observer
 from pyalgotrade.utils import collections
 
@@ -74,6 +76,22 @@ class DataSeries(object):
         """Returns a list of :class:`datetime.datetime` associated with each value."""
         raise NotImplementedError()
 
+    def tail(self, n, dtype=float):
+        """Returns a numpy.array with the last n values, or less if there are not enough values.
+        None values are returned as NaN.
+
+        :param n: The number of values to return.
+        :type n: int.
+        :param dtype: The desired data-type for the array.
+        :type dtype: data-type.
+
+        .. note::
+            The returned array may be a read-only view that should not be kept around since it will not reflect the
+            values appended after this call.
+        """
+        assert n >= 0, "Invalid number of values"
+        return np.array(self[max(len(self) - n, 0):], dtype=dtype)
+
 
 class SequenceDataSeries(DataSeries):
     """A DataSeries that holds values in a sequence in memory.
@@ -82,21 +100,44 @@ class SequenceDataSeries(DataSeries):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If None, values are stored as Python objects. Otherwise, values are stored in a numpy.array using
+        this data-type, for example float, and None values are stored as NaN.
+    :type dtype: data-type.
+    :param indexDateTimes: True if datetimes should be stored as int64 nanoseconds since the epoch instead of
+        datetime.datetime instances. This uses less memory and speeds up datetime lookups, but datetimes are required
+        and are returned in the timezone of the first one.
+    :type indexDateTimes: boolean.
+
+    .. note::
+        When using a dtype, values and slices are returned as numpy types. Slices are read-only views that should not
+        be kept around since they will not reflect the values appended after slicing.
     """
 
-    def __init__(self, maxLen=None):
+    def __init__(self, maxLen=None, dtype=None, indexDateTimes=False):
         super(SequenceDataSeries, self).__init__()
         maxLen = get_checked_max_len(maxLen)
 
         self.__newValueEvent = observer.Event()
-        self.__values = collections.ListDeque(maxLen)
-        self.__dateTimes = collections.ListDeque(maxLen)
+        if dtype is None:
+            self.__values = collections.ListDeque(maxLen)
+        else:
+            self.__values = collections.NumPyDeque(maxLen, dtype)
+        if indexDateTimes:
+            self.__dateTimes = collections.DateTimeDeque(maxLen)
+        else:
+            self.__dateTimes = collections.ListDeque(maxLen)
+        self.__dtype = dtype
+        self.__indexDateTimes = indexDateTimes
 
     def __len__(self):
         return len(self.__values)
 
     def __getitem__(self, key):
-        return self.__values[key]
+        ret = self.__values[key]
+        # Slices are views of the values when using a dtype, so those must not be modified.
+        if isinstance(key, slice) and self.__dtype is not None:
+            ret.flags.writeable = False
+        return ret
 
     def setMaxLen(self, maxLen):
         """Sets the maximum number of values to hold and resizes accordingly if necessary."""
@@ -107,6 +148,37 @@ class SequenceDataSeries(DataSeries):
         """Returns the maximum number of values to hold."""
         return self.__values.getMaxLen()
 
+    def getDType(self):
+        """Returns the data-type used to store values, or None if values are stored as Python objects."""
+        return self.__dtype
+
+    def getMemoryUsage(self):
+        """Returns an estimate of the number of bytes used to hold values and datetimes."""
+        return self.__values.getMemoryUsage() + self.__dateTimes.getMemoryUsage()
+
+    def asarray(self):
+        """Returns a numpy.array with the values. None values are returned as NaN.
+
+        .. note::
+            If a dtype was set, this is a read-only view of the values (no copies are made) that should not be kept
+            around since it will not reflect the values appended after this call.
+        """
+        if self.__dtype is None:
+            ret = np.array(self.__values.data(), dtype=float)
+        else:
+            ret = self.__values.data()
+            ret.flags.writeable = False
+        return ret
+
+    def tail(self, n, dtype=float):
+        if self.__dtype is None or np.dtype(dtype) != self.__values.data().dtype:
+            return super(SequenceDataSeries, self).tail(n, dtype)
+
+        assert n >= 0, "Invalid number of values"
+        ret = self.__values[max(len(self) - n, 0):]
+        ret.flags.writeable = False
+        return ret
+
     # Event handler receives:
     # 1: Dataseries generating the event
     # 2: The datetime for the new value
@@ -132,7 +204,11 @@ class SequenceDataSeries(DataSeries):
             If dateTime is not None, it must be greater than the last one.
         """
 
-        if dateTime is not None and len(self.__dateTimes) != 0 and self.__dateTimes[-1] >= dateTime:
+        if self.__indexDateTimes:
+            if dateTime is None:
+                raise Exception("A datetime is required when datetimes are indexed")
+            # The datetime is checked while appending.
+        elif dateTime is not None and len(self.__dateTimes) != 0 and self.__dateTimes[-1] >= dateTime:
             raise Exception("Invalid datetime. It must be bigger than that last one")
 
         assert(len(self.__values) == len(self.__dateTimes))
@@ -143,3 +219,37 @@ class SequenceDataSeries(DataSeries):
 
     def getDateTimes(self):
         return self.__dateTimes.data()
+
+    def __bisect(self, dateTime, side):
+        return self.__dateTimes.searchsorted(dateTime, side)
+
+    def indexOf(self, dateTime):
+        """Returns the position of the value for a given datetime, or None if there is no value for that datetime.
+
+        .. note::
+            Datetimes are looked up using binary search, so None datetimes are not supported.
+        """
+        ret = self.__bisect(dateTime, "left")
+        if ret == len(self.__dateTimes) or self.__dateTimes[ret] != dateTime:
+            ret = None
+        return ret
+
+    def getValueAt(self, dateTime):
+        """Returns the value for a given datetime, or for the closest datetime before that one.
+        Returns None if there are no values for that datetime or before that.
+
+        .. note::
+            Datetimes are looked up using binary search, so None datetimes are not supported.
+        """
+        pos = self.__bisect(dateTime, "right") - 1
+        return self.getValueAbsolute(pos)
+
+    def between(self, fromDateTime, toDateTime):
+        """Returns the values whose datetimes are between fromDateTime and toDateTime, both inclusive.
+
+        .. note::
+            Datetimes are looked up using binary search, so None datetimes are not supported.
+        """
+        begin = self.__bisect(fromDateTime, "left")
+        end = self.__bisect(toDateTime, "right")
+        return self.__values[begin:max(begin, end)]
@@ -18,7 +18,10 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
+
 from pyalgotrade import dataseries
+from pyalgotrade.utils import collections as pyalgocollections
 
 
 def datetime_aligned(ds1, ds2, maxLen=None):
@@ -33,6 +36,10 @@ def datetime_aligned(ds1, ds2, maxLen=None):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+
+    .. note::
+        The returned dataseries are updated incrementally as new values are added to ds1 and ds2.
+        Use :func:`aligned_values` to align the values that are already in both dataseries.
     """
     aligned1 = dataseries.SequenceDataSeries(maxLen)
     aligned2 = dataseries.SequenceDataSeries(maxLen)
@@ -40,55 +47,84 @@ def datetime_aligned(ds1, ds2, maxLen=None):
     return (aligned1, aligned2)
 
 
+def aligned_values(ds1, ds2):
+    """
+    Returns a tuple with the datetimes that are in both dataseries, and two numpy.array with the values for those
+    datetimes. None values are returned as NaN.
+
+    :param ds1: A DataSeries instance.
+    :type ds1: :class:`DataSeries`.
+    :param ds2: A DataSeries instance.
+    :type ds2: :class:`DataSeries`.
+
+    .. note::
+        Datetimes are matched using binary search, so both dataseries should have datetimes and no None values.
+    """
+    dateTimes1 = ds1.getDateTimes()
+    ix1, ix2 = pyalgocollections.align_datetimes(dateTimes1, ds2.getDateTimes())
+    dateTimes = [dateTimes1[i] for i in ix1]
+    return (dateTimes, ds1.tail(len(ds1))[ix1], ds2.tail(len(ds2))[ix2])
+
+
+# Values from one of the source dataseries that are waiting for a value with the same datetime in the other one.
+# Values are indexed by datetime so looking one up is O(1), and since datetimes are sorted, values that can no longer
+# be matched are discarded from the front.
+class PendingValues(object):
+    def __init__(self):
+        self.__values = {}
+        self.__dateTimes = collections.deque()
+
+    def add(self, dateTime, value):
+        self.__values[dateTime] = value
+        self.__dateTimes.append(dateTime)
+
+    def contains(self, dateTime):
+        return dateTime in self.__values
+
+    # Returns the value for dateTime and discards that one and any older values.
+    def pop(self, dateTime):
+        ret = self.__values[dateTime]
+        while len(self.__dateTimes) and self.__dateTimes[0] <= dateTime:
+            self.__values.pop(self.__dateTimes.popleft(), None)
+        return ret
+
+    def clear(self):
+        self.__values.clear()
+        self.__dateTimes.clear()
+
+
 # This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
 class Syncer(object):
     def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2):
-        self.__values1 = []  # (datetime, value)
-        self.__values2 = []  # (datetime, value)
+        self.__values1 = PendingValues()
+        self.__values2 = PendingValues()
         self.__destDS1 = destDS1
         self.__destDS2 = destDS2
         sourceDS1.getNewValueEvent().subscribe(self.__onNewValue1)
         sourceDS2.getNewValueEvent().subscribe(self.__onNewValue2)
         # Source dataseries will keep a reference to self and that will prevent from getting this destroyed.
 
-    # Scan backwards for the position of dateTime in ds.
-    def __findPosForDateTime(self, values, dateTime):
-        ret = None
-        i = len(values) - 1
-        while i >= 0:
-            if values[i][0] == dateTime:
-                ret = i
-                break
-            elif values[i][0] < dateTime:
-                break
-            i -= 1
-        return ret
-
     def __onNewValue1(self, dataSeries, dateTime, value):
-        pos2 = self.__findPosForDateTime(self.__values2, dateTime)
         # If a value for dateTime was added to first dataseries, and a value for that same datetime is also in the second one
         # then append to both destination dataseries.
-        if pos2 is not None:
-            self.__append(dateTime, value, self.__values2[pos2][1])
+        if self.__values2.contains(dateTime):
+            self.__append(dateTime, value, self.__values2.pop(dateTime))
             # Reset buffers.
-            self.__values1 = []
-            self.__values2 = self.__values2[pos2+1:]
+            self.__values1.clear()
         else:
             # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values1.append((dateTime, value))
+            self.__values1.add(dateTime, value)
 
     def __onNewValue2(self, dataSeries, dateTime, value):
-        pos1 = self.__findPosForDateTime(self.__values1, dateTime)
         # If a value for dateTime was added to second dataseries, and a value for that same datetime is also in the first one
         # then append to both destination dataseries.
-        if pos1 is not None:
-            self.__append(dateTime, self.__values1[pos1][1], value)
+        if self.__values1.contains(dateTime):
+            self.__append(dateTime, self.__values1.pop(dateTime), value)
             # Reset buffers.
-            self.__values1 = self.__values1[pos1+1:]
-            self.__values2 = []
+            self.__values2.clear()
         else:
             # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values2.append((dateTime, value))
+            self.__values2.add(dateTime, value)
 
     def __append(self, dateTime, value1, value2):
         self.__destDS1.appendWithDateTime(dateTime, value1)
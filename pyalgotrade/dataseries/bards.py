@@ -18,7 +18,127 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import dataseries
+from pyalgotrade import observer
+from pyalgotrade.utils import collections
+
+# Columns used to store bar values. This is also the order in which field dataseries events are emitted.
+OPEN = 0
+CLOSE = 1
+HIGH = 2
+LOW = 3
+VOLUME = 4
+ADJ_CLOSE = 5
+COLUMN_COUNT = 6
+
+
+def get_column_values(bar):
+    return (bar.getOpen(), bar.getClose(), bar.getHigh(), bar.getLow(), bar.getVolume(), bar.getAdjClose())
+
+
+def get_column_value(bar, column):
+    """Returns one of the values returned by :func:`get_column_values`, without getting the others."""
+    if column == OPEN:
+        return bar.getOpen()
+    elif column == CLOSE:
+        return bar.getClose()
+    elif column == HIGH:
+        return bar.getHigh()
+    elif column == LOW:
+        return bar.getLow()
+    elif column == VOLUME:
+        return bar.getVolume()
+    else:
+        return bar.getAdjClose()
+
+
+class BarFieldDataSeries(dataseries.DataSeries):
+    """A DataSeries with the values for one of the fields in a :class:`BarDataSeries`.
+    Values are stored in a contiguous numpy.array, that is shared with the BarDataSeries.
+    Slices are returned as lists, just like in :class:`pyalgotrade.dataseries.SequenceDataSeries`. Use
+    :meth:`asarray` or :meth:`tail` to get read-only numpy.array views instead, with None values as NaN.
+
+    .. note::
+        This class should not be instantiated directly. Use the methods in :class:`BarDataSeries` instead.
+    """
+
+    def __init__(self, barDataSeries, values, column):
+        super(BarFieldDataSeries, self).__init__()
+        self.__barDataSeries = barDataSeries
+        self.__values = values
+        self.__column = column
+        self.__newValueEvent = observer.Event()
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if self.__column == VOLUME:
+                return [bar.getVolume() for bar in self.__barDataSeries[key]]
+            # Missing values (like an adjusted close) are stored as NaN.
+            return [None if value != value else value for value in self.__values[key].tolist()]
+        elif self.__column == VOLUME:
+            # Volume is stored as float, so it is read from the bar to keep its original type.
+            return self.__barDataSeries[key].getVolume()
+        else:
+            ret = self.__values[key].item()
+            # Missing values (like an adjusted close) are stored as NaN.
+            if ret != ret:
+                ret = None
+            return ret
+
+    def getMaxLen(self):
+        """Returns the maximum number of values to hold."""
+        return self.__values.getMaxLen()
+
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold in the :class:`BarDataSeries`, and hence in every field."""
+        self.__barDataSeries.setMaxLen(maxLen)
+
+    def getBarDataSeries(self):
+        """Returns the :class:`BarDataSeries` that holds the values."""
+        return self.__barDataSeries
+
+    def getColumn(self):
+        """Returns the position of the field in the values returned by :func:`get_column_values`."""
+        return self.__column
+
+    def getDType(self):
+        return self.__values.data().dtype
+
+    def asarray(self):
+        """Returns a read-only and contiguous numpy.array view with the values. None values are returned as NaN."""
+        ret = self.__values.data()
+        ret.flags.writeable = False
+        return ret
+
+    def tail(self, n, dtype=float):
+        if np.dtype(dtype) != self.__values.data().dtype:
+            return super(BarFieldDataSeries, self).tail(n, dtype)
+
+        assert n >= 0, "Invalid number of values"
+        ret = self.__values[max(len(self) - n, 0):]
+        ret.flags.writeable = False
+        return ret
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__values):
+            ret = self[pos]
+        return ret
+
+    def getDateTimes(self):
+        return self.__barDataSeries.getDateTimes()
 
 
 class BarDataSeries(dataseries.SequenceDataSeries):
@@ -32,25 +152,76 @@ class BarDataSeries(dataseries.SequenceDataSeries):
 
     def __init__(self, maxLen=None):
         super(BarDataSeries, self).__init__(maxLen)
-        self.__openDS = dataseries.SequenceDataSeries(maxLen)
-        self.__closeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__highDS = dataseries.SequenceDataSeries(maxLen)
-        self.__lowDS = dataseries.SequenceDataSeries(maxLen)
-        self.__volumeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__adjCloseDS = dataseries.SequenceDataSeries(maxLen)
+        # Open, close, high, low, volume and adjusted close values are stored in one contiguous numpy.array per field,
+        # so field dataseries can return views that are ready to use with numpy or TA-Lib.
+        # Each field dataseries, along with its column, and each extra column dataseries are built the first time they
+        # are requested, using the bars that are still available, so there is no cost for those that are not used.
+        self.__columns = {}
+        self.__fieldDS = {}
         self.__extraDS = {}
         self.__useAdjustedValues = False
 
+    def __getFieldDS(self, column):
+        ret = self.__fieldDS.get(column)
+        if ret is None:
+            ret = self.createFieldDataSeries(column)
+            self.__fieldDS[column] = ret
+        return ret
+
     def __getOrCreateExtraDS(self, name):
         ret = self.__extraDS.get(name)
         if ret is None:
             ret = dataseries.SequenceDataSeries(self.getMaxLen())
+            for dateTime, bar in zip(self.getDateTimes(), self[:]):
+                extraColumns = bar.getExtraColumns()
+                if name in extraColumns:
+                    ret.appendWithDateTime(dateTime, extraColumns[name])
             self.__extraDS[name] = ret
         return ret
 
+    def __emitFieldValues(self, dateTime, bar):
+        # Only emit events for those fields that someone is listening to, in column order.
+        for column, fieldDS in sorted(self.__fieldDS.items()):
+            event = fieldDS.getNewValueEvent()
+            if event.hasSubscribers():
+                event.emit(fieldDS, dateTime, get_column_value(bar, column))
+
+    def createFieldDataSeries(self, column):
+        """Returns the :class:`pyalgotrade.dataseries.DataSeries` for one of the fields. This is called once for each
+        field, the first time that its dataseries is requested.
+        Subclasses can override this to store field values somewhere else. In that case, those dataseries are
+        responsible for holding the values, and only their new value events are emitted by this class.
+
+        :param column: The position of the field in the values returned by :func:`get_column_values`.
+        :type column: int.
+        """
+        values = collections.NumPyDeque(self.getMaxLen(), float)
+        for bar in self[:]:
+            value = get_column_value(bar, column)
+            # None values are stored as NaN.
+            values.append(np.nan if value is None else value)
+        self.__columns[column] = values
+        return BarFieldDataSeries(self, values, column)
+
     def setUseAdjustedValues(self, useAdjusted):
         self.__useAdjustedValues = useAdjusted
 
+    def setMaxLen(self, maxLen):
+        super(BarDataSeries, self).setMaxLen(maxLen)
+        for values in self.__columns.itervalues():
+            values.resize(maxLen)
+
+    def getMemoryUsage(self):
+        ret = super(BarDataSeries, self).getMemoryUsage()
+        ret += sum(values.getMemoryUsage() for values in self.__columns.itervalues())
+        return ret
+
+    def getCreatedDataSeries(self):
+        """Returns a list with the field and extra column dataseries that were requested so far."""
+        ret = [fieldDS for column, fieldDS in sorted(self.__fieldDS.items())]
+        ret.extend(self.__extraDS.values())
+        return ret
+
     def append(self, bar):
         self.appendWithDateTime(bar.getDateTime(), bar)
 
@@ -59,50 +230,56 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         assert(bar is not None)
         bar.setUseAdjustedValue(self.__useAdjustedValues)
 
+        # Columns and dataseries built by event handlers while the bar is being appended will already include it.
+        columns = self.__columns.items()
+        extraDS = self.__extraDS.items()
+
         super(BarDataSeries, self).appendWithDateTime(dateTime, bar)
 
-        self.__openDS.appendWithDateTime(dateTime, bar.getOpen())
-        self.__closeDS.appendWithDateTime(dateTime, bar.getClose())
-        self.__highDS.appendWithDateTime(dateTime, bar.getHigh())
-        self.__lowDS.appendWithDateTime(dateTime, bar.getLow())
-        self.__volumeDS.appendWithDateTime(dateTime, bar.getVolume())
-        self.__adjCloseDS.appendWithDateTime(dateTime, bar.getAdjClose())
+        for column, values in columns:
+            value = get_column_value(bar, column)
+            # None values are stored as NaN.
+            values.append(np.nan if value is None else value)
+        if len(self.__fieldDS):
+            self.__emitFieldValues(dateTime, bar)
 
         # Process extra columns.
-        for name, value in bar.getExtraColumns().iteritems():
-            extraDS = self.__getOrCreateExtraDS(name)
-            extraDS.appendWithDateTime(dateTime, value)
+        if len(extraDS):
+            extraColumns = bar.getExtraColumns()
+            for name, ds in extraDS:
+                if name in extraColumns:
+                    ds.appendWithDateTime(dateTime, extraColumns[name])
 
     def getOpenDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the open prices."""
-        return self.__openDS
+        return self.__getFieldDS(OPEN)
 
     def getCloseDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close prices."""
-        return self.__closeDS
+        return self.__getFieldDS(CLOSE)
 
     def getHighDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the high prices."""
-        return self.__highDS
+        return self.__getFieldDS(HIGH)
 
     def getLowDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the low prices."""
-        return self.__lowDS
+        return self.__getFieldDS(LOW)
 
     def getVolumeDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the volume."""
-        return self.__volumeDS
+        return self.__getFieldDS(VOLUME)
 
     def getAdjCloseDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted close prices."""
-        return self.__adjCloseDS
+        return self.__getFieldDS(ADJ_CLOSE)
 
     def getPriceDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close or adjusted close prices."""
         if self.__useAdjustedValues:
-            return self.__adjCloseDS
+            return self.__getFieldDS(ADJ_CLOSE)
         else:
-            return self.__closeDS
+            return self.__getFieldDS(CLOSE)
 
     def getExtraDataSeries(self, name):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` for an extra column."""
@@ -0,0 +1,544 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import os
+
+import numpy as np
+import pytz
+
+from pyalgotrade import bar
+from pyalgotrade import dataseries
+from pyalgotrade import observer
+from pyalgotrade.dataseries import bards
+from pyalgotrade.utils import dt
+
+# The file starts with a fixed size header followed by (datetime, values) records.
+# The header holds a magic string, the name of the timezone used to build datetimes and the name of the value fields.
+HEADER_SIZE = 256
+MAGIC = "PYALGOTRADE-MEMMAP-1"
+# Used to store None datetimes.
+NO_DATETIME = np.iinfo(np.int64).min
+# The value fields stored for each bar. These match bards.get_column_values, plus the frequency.
+BAR_FIELDS = ("open", "close", "high", "low", "volume", "adjClose", "frequency")
+
+
+def build_header(tzInfo, fields):
+    zone = ""
+    if tzInfo is not None:
+        # Non pytz timezones can't be recreated by name, so datetimes will be returned in UTC.
+        zone = getattr(tzInfo, "zone", "UTC")
+    ret = "%s\n%s\n%s\n" % (MAGIC, zone, ",".join(fields))
+    if len(ret) > HEADER_SIZE:
+        raise Exception("Timezone name is too long")
+    return ret.ljust(HEADER_SIZE, "\0")
+
+
+def parse_header(header):
+    lines = header.rstrip("\0").split("\n")
+    if lines[0] != MAGIC:
+        raise Exception("Invalid file format")
+    tzInfo = None
+    if lines[1] != "":
+        tzInfo = pytz.timezone(lines[1])
+    return tzInfo, tuple(lines[2].split(","))
+
+
+class RecordFile(object):
+    """Holds (datetime, values) records in a file. The last records are held in memory and written to the file in
+    blocks. Values are stored as floats and datetimes as int64 nanoseconds since the epoch.
+
+    :param path: The path to the file where records are stored. If readOnly is False, the file will be overwritten.
+    :type path: string.
+    :param fields: The names of the value fields.
+    :type fields: tuple.
+    :param bufferLen: The number of records to hold in memory before writing them to the file.
+    :type bufferLen: int.
+    :param readOnly: True to open a file that was written before. New records can't be appended.
+    :type readOnly: boolean.
+
+    .. note::
+        Records held in memory are written to the file when :meth:`close` is called or when the instance is
+        garbage collected.
+    """
+
+    def __init__(self, path, fields, bufferLen, readOnly):
+        # Set first so __del__ works even if opening the file fails.
+        self.__file = None
+        self.__readOnly = True
+
+        self.__path = path
+        self.__fields = tuple(fields)
+        self.__dtype = np.dtype([("dateTime", "<i8")] + [(field, "<f8") for field in self.__fields])
+        self.__tail = np.empty(bufferLen, dtype=self.__dtype)
+        self.__tailLen = 0
+        self.__mmap = None
+        self.__lastEpochNs = None
+
+        if readOnly:
+            with open(path, "rb") as f:
+                self.__tzInfo, fields = parse_header(f.read(HEADER_SIZE))
+            if fields != self.__fields:
+                raise Exception("Invalid file format. Expected fields %s but found %s" % (self.__fields, fields))
+            self.__fileLen = (os.path.getsize(path) - HEADER_SIZE) / self.__dtype.itemsize
+        else:
+            self.__file = open(path, "w+b")
+            self.__readOnly = False
+            self.__tzInfo = None
+            self.__fileLen = 0
+            self.__file.write(build_header(None, self.__fields))
+
+    def __del__(self):
+        # Records held in memory would be lost otherwise.
+        self.close()
+
+    def __len__(self):
+        return self.__fileLen + self.__tailLen
+
+    def __flushTail(self):
+        if self.__tailLen:
+            self.__file.write(self.__tail[0:self.__tailLen].tobytes())
+            self.__fileLen += self.__tailLen
+            self.__tailLen = 0
+
+    def __getMMap(self):
+        if self.__mmap is None or len(self.__mmap) != self.__fileLen:
+            if self.__file is not None:
+                self.__file.flush()
+            self.__mmap = np.memmap(
+                self.__path, dtype=self.__dtype, mode="r", offset=HEADER_SIZE, shape=(self.__fileLen,)
+            )
+        return self.__mmap
+
+    def getPath(self):
+        return self.__path
+
+    def getMemoryUsage(self):
+        """Returns the number of bytes used to hold records in memory."""
+        return self.__tail.nbytes
+
+    def isReadOnly(self):
+        return self.__readOnly
+
+    def getRecords(self, begin, end):
+        """Returns the records in the range [begin, end). Records that are in memory are copied."""
+        if end <= begin:
+            ret = self.__tail[0:0]
+        elif end <= self.__fileLen:
+            ret = self.__getMMap()[begin:end]
+        elif begin >= self.__fileLen:
+            ret = self.__tail[begin - self.__fileLen:end - self.__fileLen].copy()
+        else:
+            ret = np.concatenate((self.__getMMap()[begin:], self.__tail[0:end - self.__fileLen]))
+        return ret
+
+    def getRecord(self, pos):
+        if pos >= self.__fileLen:
+            return self.__tail[pos - self.__fileLen]
+        return self.__getMMap()[pos]
+
+    def getSlice(self, key, field):
+        """Returns a numpy.array with the values of a field for a slice."""
+        start, stop, step = key.indices(len(self))
+        if step > 0:
+            ret = self.getRecords(start, stop)[field][::step]
+        else:
+            ret = self.getRecords(stop + 1, start + 1)[field][::step]
+        return ret
+
+    def getValue(self, pos, field):
+        """Returns the value of a field, or None if it is missing."""
+        ret = float(self.getRecord(pos)[field])
+        if ret != ret:
+            ret = None
+        return ret
+
+    def buildDateTime(self, epochNs):
+        ret = None
+        if epochNs != NO_DATETIME:
+            ret = dt.epoch_ns_to_datetime(epochNs, self.__tzInfo)
+        return ret
+
+    def getDateTimes(self):
+        return [self.buildDateTime(epochNs) for epochNs in self.getRecords(0, len(self))["dateTime"]]
+
+    def searchsorted(self, dateTime, side):
+        """Returns the position where a datetime would be inserted to keep records sorted."""
+        epochNs = dt.datetime_to_epoch_ns(dateTime)
+        ret = np.searchsorted(self.__tail[0:self.__tailLen]["dateTime"], epochNs, side)
+        if ret == 0 and self.__fileLen:
+            ret = np.searchsorted(self.__getMMap()["dateTime"], epochNs, side)
+        else:
+            ret += self.__fileLen
+        return int(ret)
+
+    def append(self, dateTime, values):
+        if self.__readOnly:
+            raise Exception("The dataseries is read-only")
+
+        if dateTime is None:
+            epochNs = NO_DATETIME
+        else:
+            epochNs = dt.datetime_to_epoch_ns(dateTime)
+            if self.__lastEpochNs is None:
+                if dateTime.tzinfo is not None:
+                    # Save the timezone so datetimes can be built when reopening the file.
+                    header = build_header(dateTime.tzinfo, self.__fields)
+                    self.__tzInfo = parse_header(header)[0]
+                    self.__file.seek(0)
+                    self.__file.write(header)
+                    self.__file.seek(0, os.SEEK_END)
+            elif self.__lastEpochNs >= epochNs:
+                raise Exception("Invalid datetime. It must be bigger than that last one")
+            self.__lastEpochNs = epochNs
+
+        if self.__tailLen == len(self.__tail):
+            self.__flushTail()
+        self.__tail[self.__tailLen] = (epochNs,) + tuple(np.nan if value is None else value for value in values)
+        self.__tailLen += 1
+
+    def flush(self):
+        """Writes the records held in memory to the file."""
+        if not self.__readOnly:
+            self.__flushTail()
+            self.__file.flush()
+
+    def close(self):
+        """Writes the records held in memory to the file and closes it. The records are still available."""
+        if not self.__readOnly and self.__file is not None:
+            self.flush()
+            self.__file.close()
+            self.__file = None
+            self.__readOnly = True
+
+
+def record(dataSeries, path, maxLen=None):
+    """Returns a :class:`MemMapDataSeries` that will hold every value appended to a DataSeries from now on.
+    This is useful to keep the full history of an indicator, no matter its maxLen.
+
+    :param dataSeries: The DataSeries to record.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param path: The path to the file where values will be stored.
+    :type path: string.
+    :param maxLen: The number of values to hold in memory before writing them to the file.
+    :type maxLen: int.
+    """
+    ret = MemMapDataSeries(path, maxLen)
+    dataSeries.getNewValueEvent().subscribe(ret.onNewValue)
+    return ret
+
+
+class MemMapDataSeries(dataseries.DataSeries):
+    """A DataSeries that holds every value in a file, so the history is not bounded by the available memory.
+    The last values are held in memory and are written to the file in blocks. Values are stored as floats and
+    datetimes as int64 nanoseconds since the epoch.
+
+    :param path: The path to the file where values are stored. If readOnly is False, the file will be overwritten.
+    :type path: string.
+    :param maxLen: The number of values to hold in memory before writing them to the file.
+        If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param readOnly: True to open a file that was written before. New values can't be appended.
+    :type readOnly: boolean.
+
+    .. note::
+        * Values are returned as floats and None values are returned as None. Slices are returned as numpy.array
+          instances, with None values as NaN.
+        * To use this with a :class:`pyalgotrade.feed.BaseFeed` override createDataSeries to return instances of this
+          class. For bar feeds use :class:`MemMapBarDataSeries` instead.
+        * Values held in memory are written to the file when :meth:`close` is called, when the instance is used as a
+          context manager and the block exits, or when it is garbage collected.
+    """
+
+    def __init__(self, path, maxLen=None, readOnly=False):
+        super(MemMapDataSeries, self).__init__()
+        maxLen = dataseries.get_checked_max_len(maxLen)
+        self.__records = RecordFile(path, ("value",), maxLen, readOnly)
+        self.__newValueEvent = observer.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.__records)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.__records.getSlice(key, "value")
+        elif isinstance(key, (int, long)):
+            if key < 0:
+                key += len(self)
+            if key >= len(self) or key < 0:
+                raise IndexError("Index out of range")
+            return self.getValueAbsolute(key)
+        else:
+            raise TypeError("Invalid argument type")
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self):
+            ret = self.__records.getValue(pos, "value")
+        return ret
+
+    def getDateTimes(self):
+        return self.__records.getDateTimes()
+
+    def tail(self, n, dtype=float):
+        assert n >= 0, "Invalid number of values"
+        return self.__records.getRecords(max(len(self) - n, 0), len(self))["value"].astype(dtype, copy=False)
+
+    def asarray(self):
+        """Returns a numpy.array with all the values. None values are returned as NaN."""
+        return self.__records.getRecords(0, len(self))["value"]
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getPath(self):
+        """Returns the path to the file where values are stored."""
+        return self.__records.getPath()
+
+    def append(self, value):
+        """Appends a value."""
+        self.appendWithDateTime(None, value)
+
+    def appendWithDateTime(self, dateTime, value):
+        """
+        Appends a value with an associated datetime.
+
+        .. note::
+            If dateTime is not None, it must be greater than the last one.
+        """
+        self.__records.append(dateTime, (value,))
+        self.getNewValueEvent().emit(self, dateTime, value)
+
+    def onNewValue(self, dataSeries, dateTime, value):
+        # Used to record the values of other dataseries.
+        self.appendWithDateTime(dateTime, value)
+
+    def flush(self):
+        """Writes the values held in memory to the file."""
+        self.__records.flush()
+
+    def close(self):
+        """Writes the values held in memory to the file and closes it. The values are still available."""
+        self.__records.close()
+
+
+class MemMapBarFieldDataSeries(dataseries.DataSeries):
+    """A DataSeries with the values for one of the fields in a :class:`MemMapBarDataSeries`, through the whole history.
+    Slices are returned as lists, just like in :class:`pyalgotrade.dataseries.bards.BarFieldDataSeries`. Use
+    :meth:`asarray` or :meth:`tail` to get numpy.array instances instead, with None values as NaN.
+
+    .. note::
+        This class should not be instantiated directly. Use the methods in :class:`MemMapBarDataSeries` instead.
+    """
+
+    def __init__(self, barDataSeries, records, field):
+        super(MemMapBarFieldDataSeries, self).__init__()
+        self.__barDataSeries = barDataSeries
+        self.__records = records
+        self.__field = field
+        self.__newValueEvent = observer.Event()
+
+    def __len__(self):
+        return len(self.__records)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [None if value != value else value for value in self.__records.getSlice(key, self.__field).tolist()]
+        return super(MemMapBarFieldDataSeries, self).__getitem__(key)
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self):
+            ret = self.__records.getValue(pos, self.__field)
+        return ret
+
+    def getMaxLen(self):
+        """Returns the maximum number of values held in memory."""
+        return self.__barDataSeries.getMaxLen()
+
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values held in memory by the :class:`MemMapBarDataSeries`."""
+        self.__barDataSeries.setMaxLen(maxLen)
+
+    def getBarDataSeries(self):
+        """Returns the :class:`MemMapBarDataSeries` that holds the values."""
+        return self.__barDataSeries
+
+    def getDateTimes(self):
+        return self.__records.getDateTimes()
+
+    def tail(self, n, dtype=float):
+        assert n >= 0, "Invalid number of values"
+        return self.__records.getRecords(max(len(self) - n, 0), len(self))[self.__field].astype(dtype, copy=False)
+
+    def asarray(self):
+        """Returns a numpy.array with all the values. None values are returned as NaN."""
+        return self.__records.getRecords(0, len(self))[self.__field]
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+
+class MemMapBarDataSeries(bards.BarDataSeries):
+    """A :class:`pyalgotrade.dataseries.bards.BarDataSeries` that holds every bar in a file, so the history is not
+    bounded by the available memory. The last maxLen bars are also held in memory, and random access and slicing work
+    across the whole history.
+
+    :param path: The path to the file where bars are stored. If readOnly is False, the file will be overwritten.
+    :type path: string.
+    :param maxLen: The number of bars to hold in memory. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param readOnly: True to open a file that was written before. New bars can't be appended.
+    :type readOnly: boolean.
+
+    .. note::
+        * Bars that are no longer held in memory are rebuilt from the file, so extra columns are not available and
+          volume is returned as a float.
+        * Field dataseries, like the one returned by getCloseDataSeries, also span the whole history.
+        * Use :class:`BarDataSeriesFactory` to have a bar feed store bars using this class.
+        * Bars held in memory are written to the file when :meth:`close` is called, when the instance is used as a
+          context manager and the block exits, or when it is garbage collected.
+    """
+
+    def __init__(self, path, maxLen=None, readOnly=False):
+        super(MemMapBarDataSeries, self).__init__(maxLen)
+        self.__records = RecordFile(path, BAR_FIELDS, self.getMaxLen(), readOnly)
+        self.__useAdjustedValues = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # Returns the number of bars that are only available in the file.
+    def __getOffset(self):
+        return len(self.__records) - super(MemMapBarDataSeries, self).__len__()
+
+    def __buildBar(self, pos):
+        record = self.__records.getRecord(pos)
+        adjClose = float(record["adjClose"])
+        if adjClose != adjClose:
+            adjClose = None
+        ret = bar.BasicBar(
+            self.__records.buildDateTime(record["dateTime"]),
+            float(record["open"]),
+            float(record["high"]),
+            float(record["low"]),
+            float(record["close"]),
+            float(record["volume"]),
+            adjClose,
+            int(record["frequency"])
+        )
+        ret.setUseAdjustedValue(self.__useAdjustedValues)
+        return ret
+
+    def __len__(self):
+        return len(self.__records)
+
+    def __getitem__(self, key):
+        return dataseries.DataSeries.__getitem__(self, key)
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        offset = self.__getOffset()
+        if pos >= offset:
+            ret = super(MemMapBarDataSeries, self).getValueAbsolute(pos - offset)
+        elif pos >= 0:
+            ret = self.__buildBar(pos)
+        return ret
+
+    def getDateTimes(self):
+        return self.__records.getDateTimes()
+
+    def indexOf(self, dateTime):
+        ret = self.__records.searchsorted(dateTime, "left")
+        if ret == len(self) or self.__records.buildDateTime(self.__records.getRecord(ret)["dateTime"]) != dateTime:
+            ret = None
+        return ret
+
+    def getValueAt(self, dateTime):
+        return self.getValueAbsolute(self.__records.searchsorted(dateTime, "right") - 1)
+
+    def between(self, fromDateTime, toDateTime):
+        begin = self.__records.searchsorted(fromDateTime, "left")
+        end = self.__records.searchsorted(toDateTime, "right")
+        return self[begin:max(begin, end)]
+
+    def getMemoryUsage(self):
+        return super(MemMapBarDataSeries, self).getMemoryUsage() + self.__records.getMemoryUsage()
+
+    def getPath(self):
+        """Returns the path to the file where bars are stored."""
+        return self.__records.getPath()
+
+    def setUseAdjustedValues(self, useAdjusted):
+        super(MemMapBarDataSeries, self).setUseAdjustedValues(useAdjusted)
+        self.__useAdjustedValues = useAdjusted
+
+    def createFieldDataSeries(self, column):
+        return MemMapBarFieldDataSeries(self, self.__records, BAR_FIELDS[column])
+
+    def appendWithDateTime(self, dateTime, bar):
+        assert(dateTime is not None)
+        assert(bar is not None)
+        self.__records.append(dateTime, bards.get_column_values(bar) + (bar.getFrequency(),))
+        super(MemMapBarDataSeries, self).appendWithDateTime(dateTime, bar)
+
+    def flush(self):
+        """Writes the bars held in memory to the file."""
+        self.__records.flush()
+
+    def close(self):
+        """Writes the bars held in memory to the file and closes it. The bars are still available."""
+        self.__records.close()
+
+
+class BarDataSeriesFactory(object):
+    """Builds a :class:`MemMapBarDataSeries` for each instrument in a bar feed, using one file per instrument.
+    Instances are callables with the same signature as :meth:`pyalgotrade.feed.BaseFeed.createDataSeries`, so they
+    can be set using :meth:`pyalgotrade.barfeed.BaseBarFeed.setDataSeriesFactory`.
+
+    :param directory: The directory where files are stored. Existing files for the same instruments are overwritten.
+    :type directory: string.
+    """
+
+    def __init__(self, directory):
+        self.__directory = directory
+
+    def getPath(self, instrument):
+        """Returns the path to the file where bars for an instrument are stored."""
+        return os.path.join(self.__directory, "%s.bars" % instrument)
+
+    def __call__(self, key, maxLen):
+        return MemMapBarDataSeries(self.getPath(key), maxLen)
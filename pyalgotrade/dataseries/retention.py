@@ -0,0 +1,148 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Sizing dataseries by hand. The number of values that will be read from a dataseries, for example from a strategy, is
+declared using :func:`require`, and :func:`fit` sets the maximum length of the declared dataseries to that number.
+Nothing is inferred from the indicators, and indicators don't declare the values they read themselves, since those
+declarations would then limit what user code can read.
+"""
+
+import weakref
+
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import bards
+
+# The number of values that were declared to be read from each dataseries.
+_requirements = weakref.WeakKeyDictionary()
+
+
+def require(dataSeries, count):
+    """Declares that the last count values of a DataSeries will be read, for example from a strategy, so at least that
+    many values have to be held. The maximum length of the DataSeries is increased if necessary.
+
+    :param dataSeries: The DataSeries that will be read.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param count: The number of values that will be read.
+    :type count: int.
+    """
+    assert count > 0, "Invalid number of values"
+    count = max(count, _requirements.get(dataSeries, 0))
+    _requirements[dataSeries] = count
+    if dataSeries.getMaxLen() < count:
+        dataSeries.setMaxLen(count)
+
+
+def get_consumers(dataSeries):
+    """Returns a list with the dataseries that are subscribed to new values from a DataSeries.
+    For a :class:`pyalgotrade.dataseries.bards.BarDataSeries` this includes the field and extra column dataseries.
+    """
+    ret = []
+    if isinstance(dataSeries, bards.BarDataSeries):
+        ret.extend(dataSeries.getCreatedDataSeries())
+    for handler in dataSeries.getNewValueEvent().getHandlers():
+        # Only bound methods can be traced back to the subscriber, using im_self. That attribute is Python 2 only, and
+        # would have to be __self__ in Python 3.
+        consumer = getattr(handler, "im_self", None)
+        if isinstance(consumer, dataseries.DataSeries) and consumer not in ret:
+            ret.append(consumer)
+    return ret
+
+
+def is_field_ds(dataSeries):
+    """Returns True if a DataSeries is a view over one of the fields in a
+    :class:`pyalgotrade.dataseries.bards.BarDataSeries`."""
+    return hasattr(dataSeries, "getBarDataSeries")
+
+
+def is_declared(dataSeries):
+    """Returns True if the number of values that will be read from a DataSeries was declared using :func:`require`."""
+    return dataSeries in _requirements
+
+
+def get_required_len(dataSeries):
+    """Returns the number of values that were declared to be read from a DataSeries using :func:`require`, or 1 if
+    nothing was declared.
+    For a :class:`pyalgotrade.dataseries.bards.BarDataSeries` this includes what was declared for the field
+    dataseries.
+    """
+    ret = max(1, _requirements.get(dataSeries, 0))
+    if isinstance(dataSeries, bards.BarDataSeries):
+        for consumer in dataSeries.getCreatedDataSeries():
+            if is_field_ds(consumer):
+                ret = max(ret, _requirements.get(consumer, 0))
+    return ret
+
+
+# Returns the dataseries in the list and those built on top of them.
+def _walk(dataSeriesList):
+    ret = []
+    visited = set()
+    pending = list(dataSeriesList)
+    while len(pending):
+        dataSeries = pending.pop()
+        if id(dataSeries) not in visited:
+            visited.add(id(dataSeries))
+            ret.append(dataSeries)
+            pending.extend(get_consumers(dataSeries))
+    return ret
+
+
+def fit(dataSeriesList):
+    """Goes through some dataseries, and the dataseries built on top of them, and sets the maximum length of those
+    that were declared using :func:`require` to the number of values that were declared.
+    Check :func:`get_required_len` for details.
+
+    :param dataSeriesList: The dataseries to start from. Usually those from a feed.
+    :type dataSeriesList: list.
+
+    .. note::
+        * This should be called once every indicator was built.
+        * Nothing is inferred from the indicators. Any dataseries may be read directly, for example using sma[-2]
+          from a strategy, and those reads can't be inferred. Dataseries that were not declared are never shrunk.
+        * A :class:`pyalgotrade.dataseries.bards.BarDataSeries` is only shrunk if it was declared itself, since that
+          affects every field.
+    """
+    for dataSeries in _walk(dataSeriesList):
+        # Field dataseries are views, so the BarDataSeries takes care of them.
+        if is_field_ds(dataSeries):
+            continue
+        if is_declared(dataSeries) and hasattr(dataSeries, "setMaxLen"):
+            maxLen = get_required_len(dataSeries)
+            if maxLen != dataSeries.getMaxLen():
+                dataSeries.setMaxLen(maxLen)
+
+
+def memory_report(dataSeriesList):
+    """Returns a list of (dataseries, maximum length, bytes) tuples, one for each of the dataseries and the dataseries
+    built on top of them, sorted by the number of bytes used. The number of bytes is an estimate, and the maximum length
+    is None for dataseries that are not bounded.
+
+    :param dataSeriesList: The dataseries to start from. Usually those from a feed.
+    :type dataSeriesList: list.
+    """
+    ret = []
+    for dataSeries in _walk(dataSeriesList):
+        getMemoryUsage = getattr(dataSeries, "getMemoryUsage", None)
+        # Dataseries that don't hold values themselves, like field dataseries, are reported with 0 bytes.
+        memoryUsage = 0 if getMemoryUsage is None else getMemoryUsage()
+        getMaxLen = getattr(dataSeries, "getMaxLen", None)
+        maxLen = None if getMaxLen is None else getMaxLen()
+        ret.append((dataSeries, maxLen, memoryUsage))
+    ret.sort(key=lambda item: item[2], reverse=True)
+    return ret
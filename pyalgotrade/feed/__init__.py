@@ -22,6 +22,7 @@ import abc
 
 from pyalgotrade import observer
 from pyalgotrade import dataseries
+from pyalgotrade.dataseries import retention
 
 
 def feed_iterator(feed):
@@ -111,6 +112,16 @@ class BaseFeed(observer.Subject):
     def getKeys(self):
         return self.__ds.keys()
 
+    def fitMaxLen(self):
+        """Sets the maximum length of the registered dataseries, and of the dataseries built on top of them, to the number
+        of values that were declared to be read. Dataseries that were not declared are left unchanged.
+        Check :func:`pyalgotrade.dataseries.retention.fit` for details.
+
+        .. note::
+            This should be called once every indicator was built, for example before running the strategy.
+        """
+        retention.fit(self.__ds.values())
+
     def __getitem__(self, key):
         """Returns the :class:`pyalgotrade.dataseries.DataSeries` for a given key."""
         return self.__ds[key]
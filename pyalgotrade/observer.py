@@ -54,6 +54,12 @@ class Event(object):
         else:
             self.__handlers.remove(handler)
 
+    def hasSubscribers(self):
+        return len(self.__handlers) > 0 or len(self.__toSubscribe) > 0
+
+    def getHandlers(self):
+        return self.__handlers + [handler for handler in self.__toSubscribe if handler not in self.__handlers]
+
     def emit(self, *args, **kwargs):
         try:
             self.__emitting = True
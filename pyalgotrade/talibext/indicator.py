@@ -26,11 +26,16 @@ import numpy
 def value_ds_to_numpy(ds, count):
     ret = None
     try:
-        values = ds[count*-1:]
-        ret = numpy.array([float(value) for value in values])
-    except IndexError:
+        values = ds.tail(count)
+        # None values are returned as NaN.
+        if not numpy.isnan(values).any():
+            ret = values
+            # Typed and bar field dataseries return read-only views, and those are not passed to TA-Lib.
+            if not ret.flags.writeable:
+                ret = ret.copy()
+    except ValueError:  # In case we try to convert a string to float.
         pass
-    except TypeError:  # In case we try to convert None to float.
+    except TypeError:
         pass
     return ret
 
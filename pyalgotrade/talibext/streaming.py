@@ -0,0 +1,135 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import weakref
+
+from pyalgotrade.utils import collections
+
+# Input buffers by dataseries, and then by count.
+_inputBuffers = weakref.WeakKeyDictionary()
+
+
+class InputBuffer(object):
+    """Holds the last values of a DataSeries in a preallocated numpy.array that is updated as new values are added to
+    the DataSeries, so only the newest value is written each time. Use :func:`get_input_buffer` to build instances.
+
+    :param dataSeries: The DataSeries to hold values from.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param count: The number of values to hold.
+    :type count: int.
+    """
+
+    def __init__(self, dataSeries, count):
+        assert count > 0, "Invalid number of values"
+        self.__values = collections.NumPyDeque(count)
+        # The number of NaN values in the buffer, so they don't have to be looked for every time.
+        self.__nanCount = 0
+        for value in dataSeries[max(len(dataSeries) - count, 0):]:
+            self.__append(value)
+        dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def __append(self, value):
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            # None values, or values that can't be converted to float, are stored as NaN.
+            value = float("nan")
+
+        values = self.__values.data()
+        if len(values) == self.__values.getMaxLen() and values[0] != values[0]:
+            self.__nanCount -= 1
+        if value != value:
+            self.__nanCount += 1
+        self.__values.append(value)
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        self.__append(value)
+
+    def getValues(self):
+        """Returns a numpy.array with the last values, or None if there are not enough values or some of them are None.
+
+        .. note::
+            The returned array is a read-only view that should not be kept around since it will not reflect the
+            values appended after this call.
+        """
+        ret = None
+        if self.__nanCount == 0 and len(self.__values.data()) == self.__values.getMaxLen():
+            ret = self.__values.data()
+            ret.flags.writeable = False
+        return ret
+
+
+def get_input_buffer(dataSeries, count):
+    """Returns an :class:`InputBuffer` with the last count values of a DataSeries. Buffers are shared, so there is
+    only one for each (DataSeries, count).
+
+    :param dataSeries: The DataSeries to hold values from.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param count: The number of values to hold.
+    :type count: int.
+    """
+    # Buffers are kept alive by their subscription to the DataSeries, so they are not referenced strongly here.
+    buffers = _inputBuffers.get(dataSeries)
+    if buffers is None:
+        buffers = weakref.WeakValueDictionary()
+        _inputBuffers[dataSeries] = buffers
+    ret = buffers.get(count)
+    if ret is None:
+        ret = InputBuffer(dataSeries, count)
+        buffers[count] = ret
+    return ret
+
+
+class StreamingCall(object):
+    """Calls a TA-Lib function with the last values of some dataseries. Unlike the functions in
+    :mod:`pyalgotrade.talibext.indicator`, values are not gathered every time. They are held in :class:`InputBuffer`
+    instances that are updated as new values are added, which is cheaper when calling the function on every bar.
+
+    :param talibFunc: The TA-Lib function to call, for example talib.SAR.
+    :type talibFunc: function.
+    :param dataSeriesList: The dataseries to use as inputs, in the order expected by talibFunc.
+    :type dataSeriesList: list.
+    :param count: The number of values to use from each dataseries.
+    :type count: int.
+    :param args: Additional positional parameters for talibFunc.
+    :param kwargs: Additional keyword parameters for talibFunc.
+
+    .. note::
+        This should be built before values are added to the dataseries since only the values that are still
+        available at that time are used.
+    """
+
+    def __init__(self, talibFunc, dataSeriesList, count, *args, **kwargs):
+        self.__talibFunc = talibFunc
+        self.__inputBuffers = [get_input_buffer(dataSeries, count) for dataSeries in dataSeriesList]
+        self.__args = args
+        self.__kwargs = kwargs
+
+    def __call__(self):
+        """Calls the function with the last values of the dataseries. Returns None if not enough values are available
+        or some of them are None."""
+        inputs = []
+        for inputBuffer in self.__inputBuffers:
+            values = inputBuffer.getValues()
+            if values is None:
+                return None
+            inputs.append(values)
+        inputs.extend(self.__args)
+        return self.__talibFunc(*inputs, **self.__kwargs)
@@ -18,8 +18,120 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import weakref
+
+import numpy as np
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
+from pyalgotrade.dataseries import retention
+
+
+# Yields (pos, windows) tuples where windows is a 2D numpy.array view with one sliding window per row, and pos is the
+# position in values of the last item in the first window. Windows are yielded in chunks so calculations over them
+# don't need to allocate memory for every window at once.
+def sliding_windows(values, windowSize, chunkSize=4096):
+    values = np.ascontiguousarray(values, dtype=float)
+    count = len(values) - windowSize + 1
+    for begin in xrange(0, max(count, 0), chunkSize):
+        end = min(begin + chunkSize, count)
+        chunk = values[begin:end + windowSize - 1]
+        windows = np.lib.stride_tricks.as_strided(chunk, shape=(end - begin, windowSize), strides=chunk.strides * 2)
+        yield (begin + windowSize - 1, windows)
+
+
+def precompute(dataSeries, dateTimes, values):
+    """Calculates the values for the :class:`EventBasedFilter` instances built on top of a DataSeries, and on top of
+    those, using the values that will be added to the DataSeries. Precomputed values are then added to the filters as
+    new values are added to the DataSeries, instead of calculating them one at a time.
+
+    This is only possible when every value is known beforehand, for example when backtesting, and only for filters
+    whose :class:`EventWindow` implements :meth:`EventWindow.computeAll`. Other filters are not affected.
+    Once the precomputed values are used up, the :class:`EventWindow` is restored using :meth:`EventWindow.restore`, so
+    filters continue as if every value had been added one at a time.
+
+    :param dataSeries: The DataSeries that will get the values.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param dateTimes: The datetimes for the values that will be added to the DataSeries.
+    :type dateTimes: list.
+    :param values: The values that will be added to the DataSeries, with None values as NaN.
+    :type values: numpy.array.
+
+    .. note::
+        Only leading None values are supported since those are skipped by event windows. If there are others,
+        filters are not precomputed.
+    """
+
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    first = int(missing.argmin()) if len(values) and not missing.all() else len(values)
+    if missing[first:].any():
+        return
+
+    for consumer in retention.get_consumers(dataSeries):
+        if not isinstance(consumer, EventBasedFilter) or len(consumer) or len(consumer.getEventWindow().getValues()):
+            continue
+        try:
+            computed = consumer.getEventWindow().computeAll(values[first:])
+        except NotImplementedError:
+            continue
+        consumerValues = np.empty(len(values))
+        consumerValues.fill(np.nan)
+        consumerValues[first:] = computed
+        consumer.setPrecomputedValues(dateTimes, consumerValues, values)
+        precompute(consumer, dateTimes, consumerValues)
+
+
+# Shared indicators by source dataseries, and then by (class, parameters). Indicators are kept alive by their
+# subscription to the source dataseries, so they are not referenced strongly here.
+_sharedIndicators = weakref.WeakKeyDictionary()
+
+
+# Returns a hashable version of the parameters used to build an indicator. Lists are converted to tuples.
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, np.ndarray):
+        return _freeze(value.tolist())
+    return value
+
+
+def shared(indicatorClass, dataSeries, *args, **kwargs):
+    """Returns an indicator built on top of a DataSeries, reusing an existing one if it was built with this function
+    using the same class and parameters. This avoids subscribing identical indicators to the same DataSeries when they
+    are needed in different places, for example from a strategy and an analyzer.
+
+    :param indicatorClass: The class of the indicator, for example :class:`pyalgotrade.technical.ma.SMA`.
+    :type indicatorClass: class.
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param args: Positional parameters for the indicator, after dataSeries.
+    :param kwargs: Keyword parameters for the indicator. maxLen is not used to look for an existing indicator, and if
+        an existing one holds fewer values, it is increased.
+
+    .. note::
+        * maxLen has to be passed as a keyword parameter.
+        * Parameters have to be hashable. Lists are supported.
+    """
+
+    maxLen = kwargs.pop("maxLen", None)
+    key = (indicatorClass, _freeze(args), _freeze(kwargs))
+    indicators = _sharedIndicators.get(dataSeries)
+    if indicators is None:
+        indicators = weakref.WeakValueDictionary()
+        _sharedIndicators[dataSeries] = indicators
+
+    ret = indicators.get(key)
+    if ret is None:
+        ret = indicatorClass(dataSeries, *args, maxLen=maxLen, **kwargs)
+        indicators[key] = ret
+    elif hasattr(ret, "setMaxLen"):
+        maxLen = dataseries.get_checked_max_len(maxLen)
+        if maxLen > ret.getMaxLen():
+            ret.setMaxLen(maxLen)
+    return ret
 
 
 class EventWindow(object):
@@ -62,6 +174,56 @@ class EventWindow(object):
         """Override to calculate a value using the values in the window."""
         raise NotImplementedError()
 
+    def computeAll(self, values):
+        """Override to calculate the values for a whole sequence at once. This is used by :func:`precompute`.
+
+        :param values: The values, without None values or NaN.
+        :type values: numpy.array.
+        :rtype: A numpy.array with the value that :meth:`getValue` would return after each value is added to an empty
+            window, with None values as NaN.
+        """
+        raise NotImplementedError()
+
+    def restore(self, values, lastValue):
+        """Sets the window up as if values had been added one at a time, after :meth:`computeAll` was used to calculate
+        the values for them. This is used by :class:`EventBasedFilter` once precomputed values are used up.
+        The default implementation adds the last windowSize values using :meth:`addValues`. Override it to restore
+        any other state that is kept between values.
+
+        :param values: Every value that was passed to :meth:`computeAll`, without None values or NaN.
+        :type values: numpy.array.
+        :param lastValue: The last value returned by :meth:`computeAll`, with NaN as None.
+        """
+        self.addValues(values[-self.__windowSize:].tolist())
+
+    def onNewValues(self, dateTimes, values):
+        """Adds many values at once and returns a list with the value that :meth:`getValue` would return after each one
+        is added. This is used by :class:`EventBasedFilter` when lazy and can be overridden to do it faster.
+
+        :param dateTimes: The datetimes for the values.
+        :type dateTimes: list.
+        :param values: The values, that may include None values.
+        :type values: list.
+        """
+        ret = []
+        for dateTime, value in zip(dateTimes, values):
+            self.onNewValue(dateTime, value)
+            ret.append(self.getValue())
+        return ret
+
+    def addValues(self, values):
+        """Adds values to the window without doing any calculations. Only the last windowSize values are added, and
+        None values are skipped if skipNone was True. Overrides of :meth:`onNewValues` use this to keep the window in
+        sync.
+
+        :param values: The values to add.
+        :type values: list.
+        """
+        if self.__skipNone:
+            values = [value for value in values if value is not None]
+        for value in values[-self.__windowSize:]:
+            self.__values.append(value)
+
 
 class EventBasedFilter(dataseries.SequenceDataSeries):
     """An EventBasedFilter class is responsible for capturing new values in a :class:`pyalgotrade.dataseries.DataSeries`
@@ -82,15 +244,150 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         self.__dataSeries = dataSeries
         self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
         self.__eventWindow = eventWindow
+        self.__precomputedDateTimes = []
+        self.__precomputedValues = []
+        self.__precomputedSourceValues = None
+        self.__precomputedPos = 0
+        self.__lazy = False
+        self.__pendingDateTimes = []
+        self.__pendingValues = []
 
     def __onNewValue(self, dataSeries, dateTime, value):
-        # Let the event window perform calculations.
-        self.__eventWindow.onNewValue(dateTime, value)
-        # Get the resulting value
-        newValue = self.__eventWindow.getValue()
+        # Values can only be deferred if nobody is waiting for new values from this filter.
+        if self.__lazy and not self.getNewValueEvent().hasSubscribers():
+            self.__pendingDateTimes.append(dateTime)
+            self.__pendingValues.append(value)
+            # Only the last maxLen values are held, so older pending values are only needed to update the event window.
+            # Those are processed in batches, so at most maxLen + windowSize values are pending.
+            if len(self.__pendingValues) > self.getMaxLen() + self.__eventWindow.getWindowSize():
+                self.__update(len(self.__pendingValues) - self.getMaxLen())
+        else:
+            self.__update()
+            self.__addValue(dateTime, value)
+
+    # Calculates the values that were deferred while lazy, or only the first count ones.
+    def __update(self, count=None):
+        if len(self.__pendingValues) == 0:
+            return
+
+        if count is None:
+            count = len(self.__pendingValues)
+        dateTimes = self.__pendingDateTimes[:count]
+        values = self.__pendingValues[:count]
+        del self.__pendingDateTimes[:count]
+        del self.__pendingValues[:count]
+
+        begin = 0
+        while begin < len(values) and self.__precomputedPos < len(self.__precomputedValues):
+            self.__addValue(dateTimes[begin], values[begin])
+            begin += 1
+        dateTimes = dateTimes[begin:]
+        newValues = self.__eventWindow.onNewValues(dateTimes, values[begin:])
+        for dateTime, newValue in zip(dateTimes, newValues):
+            self.appendWithDateTime(dateTime, newValue)
+
+    def __addValue(self, dateTime, value):
+        if self.__precomputedPos < len(self.__precomputedValues):
+            if self.__precomputedDateTimes[self.__precomputedPos] != dateTime:
+                raise Exception("Precomputed values are out of sync on %s" % (dateTime))
+            newValue = self.__precomputedValues[self.__precomputedPos]
+            self.__precomputedPos += 1
+            if self.__precomputedPos == len(self.__precomputedValues):
+                self.__endPrecomputed()
+        else:
+            # Let the event window perform calculations.
+            self.__eventWindow.onNewValue(dateTime, value)
+            # Get the resulting value
+            newValue = self.__eventWindow.getValue()
         # Add the new value.
         self.appendWithDateTime(dateTime, newValue)
 
+    # Precomputed values were not added to the event window, so it gets restored to continue from the last one.
+    # Precomputed values are released since they are no longer needed.
+    def __endPrecomputed(self):
+        sourceValues = self.__precomputedSourceValues
+        self.__eventWindow.restore(sourceValues[~np.isnan(sourceValues)], self.__precomputedValues[-1])
+        self.__precomputedDateTimes = []
+        self.__precomputedValues = []
+        self.__precomputedSourceValues = None
+        self.__precomputedPos = 0
+
+    def setPrecomputedValues(self, dateTimes, values, sourceValues):
+        """Sets the values to add as new values are added to the DataSeries being filtered, instead of using the
+        :class:`EventWindow`. Use :func:`precompute` instead of calling this directly.
+
+        :param dateTimes: The datetimes for the values that will be added to the DataSeries being filtered.
+        :type dateTimes: list.
+        :param values: The values for this filter, with None values as NaN.
+        :type values: numpy.array.
+        :param sourceValues: The values that will be added to the DataSeries being filtered, with None values as NaN.
+        :type sourceValues: numpy.array.
+
+        .. note::
+            The event window is not updated while precomputed values are used. It is restored once the last one is
+            used, using :meth:`EventWindow.restore`.
+        """
+        assert len(dateTimes) == len(values) == len(sourceValues)
+        self.__precomputedDateTimes = dateTimes
+        self.__precomputedValues = [None if value != value else value for value in np.asarray(values).tolist()]
+        self.__precomputedSourceValues = np.asarray(sourceValues, dtype=float)
+        self.__precomputedPos = 0
+
+    def setLazy(self, lazy):
+        """Sets whether values should be calculated only when they are read, instead of every time a new value is added
+        to the DataSeries being filtered. This saves work for filters that are only read on some bars.
+        Values are still calculated right away if something is subscribed to new values from this filter.
+
+        :param lazy: True to calculate values when they are read.
+        :type lazy: boolean.
+
+        .. note::
+            While lazy, the :class:`EventWindow` is updated when values are read, or when more than maxLen + windowSize
+            values are pending. In that case the oldest ones are calculated, and only the last maxLen remain pending.
+        """
+        self.__lazy = lazy
+        if not lazy:
+            self.__update()
+
+    def isLazy(self):
+        return self.__lazy
+
+    def __len__(self):
+        self.__update()
+        return super(EventBasedFilter, self).__len__()
+
+    def __getitem__(self, key):
+        self.__update()
+        return super(EventBasedFilter, self).__getitem__(key)
+
+    def getValueAbsolute(self, pos):
+        self.__update()
+        return super(EventBasedFilter, self).getValueAbsolute(pos)
+
+    def getDateTimes(self):
+        self.__update()
+        return super(EventBasedFilter, self).getDateTimes()
+
+    def asarray(self):
+        self.__update()
+        return super(EventBasedFilter, self).asarray()
+
+    def tail(self, n, dtype=float):
+        self.__update()
+        return super(EventBasedFilter, self).tail(n, dtype)
+
+    def indexOf(self, dateTime):
+        self.__update()
+        return super(EventBasedFilter, self).indexOf(dateTime)
+
+    def getValueAt(self, dateTime):
+        self.__update()
+        return super(EventBasedFilter, self).getValueAt(dateTime)
+
+    def between(self, fromDateTime, toDateTime):
+        self.__update()
+        return super(EventBasedFilter, self).between(fromDateTime, toDateTime)
+
     def getDataSeries(self):
         return self.__dataSeries
 
@@ -23,6 +23,19 @@ from pyalgotrade.technical import ma
 from pyalgotrade.technical import stats
 
 
+class MeanEventWindow(stats.MomentsEventWindow):
+    # computeAll is not implemented on purpose. This window is shared with the upper and lower bands, so it has to get
+    # every value.
+    def getValue(self):
+        return self.getMean()
+
+
+class MiddleBand(ma.SMA):
+    # An SMA that uses a MeanEventWindow, so the standard deviation can be calculated using the same window.
+    def createEventWindow(self, period):
+        return MeanEventWindow(period)
+
+
 class BollingerBands(object):
     """Bollinger Bands filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:bollinger_bands.
 
@@ -39,12 +52,13 @@ class BollingerBands(object):
     """
 
     def __init__(self, dataSeries, period, numStdDev, maxLen=None):
-        self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
-        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
+        # The mean and the standard deviation are calculated in a single pass, using the middle band window.
+        self.__middleBand = MiddleBand(dataSeries, period, maxLen=maxLen)
+        self.__eventWindow = self.__middleBand.getEventWindow()
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
         self.__numStdDev = numStdDev
-        # It is important to subscribe after sma and stddev since we'll use those values.
+        # It is important to subscribe after the middle band since we'll use its window.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def __onNewValue(self, dataSeries, dateTime, value):
@@ -52,11 +66,12 @@ class BollingerBands(object):
         lowerValue = None
 
         if value is not None:
-            sma = self.__sma[-1]
-            if sma is not None:
-                stdDev = self.__stdDev[-1]
-                upperValue = sma + stdDev * self.__numStdDev
-                lowerValue = sma + stdDev * self.__numStdDev * -1
+            # Reading the middle band makes sure that the window is up to date, even if the middle band is lazy.
+            middleValue = self.__middleBand[-1]
+            if middleValue is not None:
+                stdDev = self.__eventWindow.getStdDev(0)
+                upperValue = middleValue + stdDev * self.__numStdDev
+                lowerValue = middleValue + stdDev * self.__numStdDev * -1
 
         self.__upperBand.appendWithDateTime(dateTime, upperValue)
         self.__lowerBand.appendWithDateTime(dateTime, lowerValue)
@@ -69,9 +84,9 @@ class BollingerBands(object):
 
     def getMiddleBand(self):
         """
-        Returns the middle band as a :class:`pyalgotrade.dataseries.DataSeries`.
+        Returns the middle band as a :class:`pyalgotrade.technical.ma.SMA`.
         """
-        return self.__sma
+        return self.__middleBand
 
     def getLowerBand(self):
         """
@@ -18,6 +18,14 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import aligned
+
+# Ranges up to this size are checked using plain Python, since that is faster than converting them to numpy.array.
+SMALL_RANGE = 20
+
 
 def compute_diff(values1, values2):
     assert(len(values1) == len(values2))
@@ -53,13 +61,23 @@ def _cross_impl(values1, values2, start, end, signCheck):
 
     # Compute differences and check sign changes.
     ret = 0
-    diffs = compute_diff(values1, values2)
-    diffs = filter(lambda x: x != 0, diffs)
-    prevDiff = None
-    for diff in diffs:
-        if prevDiff is not None and not signCheck(prevDiff) and signCheck(diff):
-            ret += 1
-        prevDiff = diff
+    if len(values1) <= SMALL_RANGE:
+        diffs = compute_diff(values1, values2)
+        diffs = filter(lambda x: x != 0, diffs)
+        prevDiff = None
+        for diff in diffs:
+            if prevDiff is not None and not signCheck(prevDiff) and signCheck(diff):
+                ret += 1
+            prevDiff = diff
+    else:
+        diffs = np.array(values1, dtype=float) - np.array(values2, dtype=float)
+        diffs = diffs[diffs != 0]
+        missing = np.isnan(diffs)
+        # Differences with None values are None in compute_diff, and those are smaller than any number, just like
+        # -inf. They can't be the previous difference for a cross, since prevDiff would be None.
+        diffs[missing] = -np.inf
+        signs = signCheck(diffs)
+        ret = int(np.count_nonzero(signs[1:] & ~signs[:-1] & ~missing[:-1]))
     return ret
 
 
@@ -115,3 +133,42 @@ def cross_below(values1, values2, start=-2, end=None):
         The default start and end values check for cross below conditions over the last 2 values.
     """
     return _cross_impl(values1, values2, start, end, lambda x: x < 0)
+
+
+class CrossDetector(dataseries.SequenceDataSeries):
+    """A DataSeries that detects when a DataSeries crosses above or below another one, as new values get added to them.
+    Unlike :func:`cross_above` and :func:`cross_below`, previous values are not checked again every time, since the sign
+    of the last difference that was not zero is kept.
+
+    Values are 1 when values1 crossed above values2, -1 when values1 crossed below values2, and 0 otherwise.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Values are only compared for datetimes that are in both dataseries.
+        * None values are skipped.
+    """
+
+    def __init__(self, values1, values2, maxLen=None):
+        super(CrossDetector, self).__init__(maxLen)
+        self.__lastSign = 0
+        self.__values1, values2 = aligned.datetime_aligned(values1, values2, maxLen=1)
+        # Both aligned dataseries have a value for the datetime once the second one gets it.
+        values2.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def __onNewValue(self, dataSeries, dateTime, value2):
+        value1 = self.__values1[-1]
+        ret = 0
+        if value1 is not None and value2 is not None and value1 != value2:
+            sign = 1 if value1 > value2 else -1
+            if self.__lastSign != 0 and sign != self.__lastSign:
+                ret = sign
+            self.__lastSign = sign
+        self.appendWithDateTime(dateTime, ret)
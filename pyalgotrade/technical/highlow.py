@@ -19,21 +19,23 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade.utils import collections
 
 
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         super(HighLowEventWindow, self).__init__(windowSize)
-        self.__useMin = useMin
+        self.__extreme = collections.MonotonicWindow(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        super(HighLowEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__extreme.append(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__extreme.getValue()
         return ret
 
 
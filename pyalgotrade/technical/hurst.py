@@ -23,42 +23,98 @@ import numpy as np
 from pyalgotrade import technical
 
 
+# The weights used to fit the double-log graph, by (minLags, maxLags).
+_lagWeights = {}
+
+
+# Returns the weights that, multiplied by log10(tau) for each lag and added up, give the slope of the linear fit to the
+# double-log graph. These only depend on the lags, so they are calculated once.
+def get_lag_weights(minLags, maxLags):
+    key = (minLags, maxLags)
+    ret = _lagWeights.get(key)
+    if ret is None:
+        x = np.log10(np.arange(minLags, maxLags))
+        x = x - x.mean()
+        ret = x / (x * x).sum()
+        _lagWeights[key] = ret
+    return ret
+
+
+# Returns the mean and the sum of squared differences from the mean for p[lag:] - p[:-lag], for every lag in
+# [minLags, maxLags). All differences are calculated at once in a 2D array, with one row per lag.
+def lag_diff_moments(p, minLags, maxLags):
+    p = np.asarray(p, dtype=float)
+    lags = np.arange(minLags, maxLags)
+    counts = len(p) - lags
+    cols = np.arange(len(p) - minLags)
+    ends = cols + lags[:, np.newaxis]
+    valid = ends < len(p)
+    diffs = np.where(valid, p[np.minimum(ends, len(p) - 1)] - p[cols], 0)
+    means = diffs.sum(axis=1) / counts
+    deviations = np.where(valid, diffs - means[:, np.newaxis], 0)
+    return means, (deviations * deviations).sum(axis=1)
+
+
+# Calculates the hurst exponent using the sum of squared differences for every lag.
+def hurst_from_moments(m2s, minLags, maxLags, period):
+    # tau is the square root of the standard deviation of the differences for each lag.
+    logTau = 0.25 * np.log10(m2s / (period - np.arange(minLags, maxLags)))
+    # The hurst exponent is twice the slope of the linear fit to the double-log graph.
+    return 2 * np.dot(get_lag_weights(minLags, maxLags), logTau)
+
+
 # Code Tom Starke for the Hurst Exponent.
 def hurst_exp(p, minLags, maxLags):
-    tau = []
-    lagvec = []
-
-    #  Step through the different lags
-    for lag in range(minLags, maxLags):
-        #  produce price difference with lag
-        pp = np.subtract(p[lag:], p[:-lag])
-        #  Write the different lags into a vector
-        lagvec.append(lag)
-        #  Calculate the variance of the differnce vector
-        tau.append(np.sqrt(np.std(pp)))
-    # linear fit to double-log graph (gives power)
-    m = np.polyfit(np.log10(lagvec), np.log10(tau), 1)
-    # calculate hurst
-    hurst = m[0]*2
-    return hurst
+    _, m2s = lag_diff_moments(p, minLags, maxLags)
+    return hurst_from_moments(m2s, minLags, maxLags, len(p))
 
 
+# The mean and the sum of squared differences for every lag are updated in O(maxLags - minLags) as the window slides,
+# since only one difference per lag gets in and out of the window. To avoid accumulating rounding errors, they are
+# recalculated from the values in the window every period updates.
 class HurstExponentEventWindow(technical.EventWindow):
     def __init__(self, period, minLags, maxLags, logValues=True):
         super(HurstExponentEventWindow, self).__init__(period)
         self.__minLags = minLags
         self.__maxLags = maxLags
         self.__logValues = logValues
+        self.__lags = np.arange(minLags, maxLags)
+        self.__counts = period - self.__lags
+        self.__means = None
+        self.__m2s = None
+        self.__updates = 0
 
     def onNewValue(self, dateTime, value):
-        if value is not None and self.__logValues:
+        if value is None:
+            return
+        if self.__logValues:
             value = np.log10(value)
+
+        # The differences for each lag that will get out of the window.
+        oldDiffs = None
+        if self.windowFull():
+            values = self.getValues()
+            oldDiffs = values[self.__lags] - values[0]
+
         super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
 
+        if self.windowFull():
+            values = self.getValues()
+            if oldDiffs is None or self.__updates == self.getWindowSize():
+                self.__means, self.__m2s = lag_diff_moments(values, self.__minLags, self.__maxLags)
+                self.__updates = 0
+            else:
+                newDiffs = values[-1] - values[-1 - self.__lags]
+                delta = newDiffs - oldDiffs
+                means = self.__means + delta / self.__counts
+                self.__m2s = np.maximum(self.__m2s + delta * (newDiffs - means + oldDiffs - self.__means), 0)
+                self.__means = means
+                self.__updates += 1
+
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+            ret = hurst_from_moments(self.__m2s, self.__minLags, self.__maxLags, self.getWindowSize())
         return ret
 
 
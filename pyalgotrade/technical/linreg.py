@@ -23,49 +23,121 @@ from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
 
 import numpy as np
-from scipy import stats
 
 
-# Using scipy.stats.linregress instead of numpy.linalg.lstsq because of this:
-# http://stackoverflow.com/questions/20736255/numpy-linalg-lstsq-with-big-values
+# Values are centered before multiplying them to avoid losing precision with big values, like timestamps. This is the
+# same thing that scipy.stats.linregress does.
 def lsreg(x, y):
-    x = np.asarray(x)
-    y = np.asarray(y)
-    res = stats.linregress(x, y)
-    return res[0], res[1]
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xMean = x.mean()
+    yMean = y.mean()
+    xDiffs = x - xMean
+    slope = (xDiffs * (y - yMean)).sum() / (xDiffs * xDiffs).sum()
+    return slope, yMean - slope * xMean
+
+
+# Keeps the sums needed to calculate a least-squares regression over the last windowSize points, updating them in O(1)
+# as points get in and out of the window.
+# Points are stored relative to an origin to avoid losing precision with big values, like timestamps. Every windowSize
+# updates the origin is moved to the points in the window and the sums are recalculated, to get rid of rounding errors.
+class RollingRegression(object):
+    def __init__(self, windowSize):
+        self.__windowSize = windowSize
+        self.__x = collections.NumPyDeque(windowSize)
+        self.__y = collections.NumPyDeque(windowSize)
+        self.__x0 = None
+        self.__y0 = None
+        self.__sumX = None
+        self.__sumY = None
+        self.__sumXY = None
+        self.__sumXX = None
+        self.__updates = 0
+
+    def __recalculate(self):
+        x = self.__x.data()
+        y = self.__y.data()
+        self.__x0 = x[0]
+        self.__y0 = y.mean()
+        x = x - self.__x0
+        y = y - self.__y0
+        self.__sumX = x.sum()
+        self.__sumY = y.sum()
+        self.__sumXY = (x * y).sum()
+        self.__sumXX = (x * x).sum()
+        self.__updates = 0
+
+    def isFull(self):
+        return len(self.__x) == self.__windowSize
+
+    def append(self, x, y):
+        oldX = None
+        oldY = None
+        if self.isFull():
+            oldX = self.__x[0] - self.__x0
+            oldY = self.__y[0] - self.__y0
+
+        self.__x.append(x)
+        self.__y.append(y)
+
+        if self.isFull():
+            if oldX is None or self.__updates == self.__windowSize:
+                self.__recalculate()
+            else:
+                x = x - self.__x0
+                y = y - self.__y0
+                self.__sumX += x - oldX
+                self.__sumY += y - oldY
+                self.__sumXY += x * y - oldX * oldY
+                self.__sumXX += x * x - oldX * oldX
+                self.__updates += 1
+
+    def getXValues(self):
+        return self.__x
+
+    def getSlope(self):
+        n = float(self.__windowSize)
+        return (self.__sumXY - self.__sumX * self.__sumY / n) / (self.__sumXX - self.__sumX * self.__sumX / n)
+
+    # Returns the value of the regression line at x.
+    def getValueAt(self, x):
+        n = float(self.__windowSize)
+        slope = self.getSlope()
+        intercept = (self.__sumY - slope * self.__sumX) / n
+        return slope * (x - self.__x0) + intercept + self.__y0
 
 
 class LeastSquaresRegressionWindow(technical.EventWindow):
     def __init__(self, windowSize):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
-        self.__timestamps = collections.NumPyDeque(windowSize)
+        self.__regression = RollingRegression(windowSize)
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
         if value is not None:
-            timestamp = dt.datetime_to_timestamp(dateTime)
-            if len(self.__timestamps):
-                assert(timestamp > self.__timestamps[-1])
-            self.__timestamps.append(timestamp)
+            timestamp = dt.datetime_to_epoch_ns(dateTime) / 1e9
+            timestamps = self.__regression.getXValues()
+            if len(timestamps):
+                assert(timestamp > timestamps[-1])
+            self.__regression.append(timestamp, value)
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self.__timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            ret = self.__regression.getValueAt(timestamp)
         return ret
 
     def getTimeStamps(self):
-        return self.__timestamps
+        return self.__regression.getXValues()
 
     def getValueAt(self, dateTime):
-        return self.__getValueAtImpl(dt.datetime_to_timestamp(dateTime))
+        return self.__getValueAtImpl(dt.datetime_to_epoch_ns(dateTime) / 1e9)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.__getValueAtImpl(self.__timestamps.data()[-1])
+            ret = self.__getValueAtImpl(self.__regression.getXValues()[-1])
         return ret
 
 
@@ -97,13 +169,20 @@ class LeastSquaresRegression(technical.EventBasedFilter):
 class SlopeEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
         super(SlopeEventWindow, self).__init__(windowSize)
-        self.__x = np.asarray(range(windowSize))
+        # The x-axis is the position of each value, so it doesn't matter where it starts.
+        self.__regression = RollingRegression(windowSize)
+        self.__nextX = 0
+
+    def onNewValue(self, dateTime, value):
+        super(SlopeEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__regression.append(self.__nextX, value)
+            self.__nextX += 1
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            ret = self.__regression.getSlope()
         return ret
 
 
@@ -62,6 +62,17 @@ class SMAEventWindow(technical.EventWindow):
     def getValue(self):
         return self.__value
 
+    def computeAll(self, values):
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        for pos, windows in technical.sliding_windows(values, self.getWindowSize()):
+            ret[pos:pos + len(windows)] = windows.mean(axis=1)
+        return ret
+
+    def restore(self, values, lastValue):
+        super(SMAEventWindow, self).restore(values, lastValue)
+        self.__value = lastValue
+
 
 class SMA(technical.EventBasedFilter):
     """Simple Moving Average filter.
@@ -76,7 +87,17 @@ class SMA(technical.EventBasedFilter):
     :type maxLen: int.
     """
     def __init__(self, dataSeries, period, maxLen=None):
-        super(SMA, self).__init__(dataSeries, SMAEventWindow(period), maxLen)
+        super(SMA, self).__init__(dataSeries, self.createEventWindow(period), maxLen)
+
+    def createEventWindow(self, period):
+        """Returns the :class:`pyalgotrade.technical.EventWindow` used to calculate the values. This is called once,
+        before the filter is initialized.
+        Subclasses can override this to use a window that calculates the same values along with others.
+
+        :param period: The number of values to use to calculate the SMA.
+        :type period: int.
+        """
+        return SMAEventWindow(period)
 
 
 class EMAEventWindow(technical.EventWindow):
@@ -99,6 +120,45 @@ class EMAEventWindow(technical.EventWindow):
     def getValue(self):
         return self.__value
 
+    def onNewValues(self, dateTimes, values):
+        ret = []
+        # Values are added one at a time until the first EMA value is calculated.
+        begin = 0
+        while begin < len(values) and self.__value is None:
+            self.onNewValue(dateTimes[begin], values[begin])
+            ret.append(self.__value)
+            begin += 1
+
+        # Same calculations as in onNewValue, so the results are the same.
+        if begin < len(values):
+            value = self.__value
+            multiplier = self.__multiplier
+            for newValue in values[begin:]:
+                if newValue is not None:
+                    value = (newValue - value) * multiplier + value
+                ret.append(value)
+            self.__value = value
+            self.addValues(values[begin:])
+        return ret
+
+    def computeAll(self, values):
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        period = self.getWindowSize()
+        if len(values) >= period:
+            # Same calculations as in onNewValue, so the results are the same.
+            value = values[0:period].mean()
+            ret[period - 1] = value
+            value = float(value)
+            for i, newValue in enumerate(values[period:].tolist(), period):
+                value = (newValue - value) * self.__multiplier + value
+                ret[i] = value
+        return ret
+
+    def restore(self, values, lastValue):
+        super(EMAEventWindow, self).restore(values, lastValue)
+        self.__value = lastValue
+
 
 class EMA(technical.EventBasedFilter):
     """Exponential Moving Average filter.
@@ -117,18 +177,56 @@ class EMA(technical.EventBasedFilter):
         super(EMA, self).__init__(dataSeries, EMAEventWindow(period), maxLen)
 
 
+# If the weights are linear, that is an exact arithmetic progression like [1, 2, 3, ...] where every difference between
+# consecutive weights is the same float, the weighted sum is updated in O(1) using the sum of the values in the window,
+# since every value that stays in the window loses the same weight. To avoid accumulating rounding errors, both sums are
+# recalculated with a full dot product every windowSize updates, so that is O(1) amortized.
+# Otherwise the weighted sum is calculated with a dot product every time, in O(windowSize).
 class WMAEventWindow(technical.EventWindow):
     def __init__(self, weights):
         assert(len(weights) > 0)
         super(WMAEventWindow, self).__init__(len(weights))
-        self.__weights = np.asarray(weights)
+        self.__weights = np.asarray(weights, dtype=float)
+        self.__weightSum = self.__weights.sum()
+        self.__weightStep = None
+        steps = np.diff(self.__weights)
+        if len(steps) and (steps == steps[0]).all():
+            self.__weightStep = steps[0]
+        self.__sum = None
+        self.__weightedSum = None
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is None or self.__weightStep is None:
+            super(WMAEventWindow, self).onNewValue(dateTime, value)
+            return
+
+        firstValue = None
+        if self.windowFull():
+            firstValue = self.getValues()[0]
+
+        super(WMAEventWindow, self).onNewValue(dateTime, value)
+
+        if self.windowFull():
+            if firstValue is None or self.__updates == self.getWindowSize():
+                self.__sum = self.getValues().sum()
+                self.__weightedSum = np.dot(self.getValues(), self.__weights)
+                self.__updates = 0
+            else:
+                self.__sum -= firstValue
+                self.__weightedSum -= self.__weights[0] * firstValue + self.__weightStep * self.__sum
+                self.__weightedSum += self.__weights[-1] * value
+                self.__sum += value
+                self.__updates += 1
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            accum = (self.getValues() * self.__weights).sum()
-            weightSum = self.__weights.sum()
-            ret = accum / float(weightSum)
+            if self.__weightStep is None:
+                weightedSum = np.dot(self.getValues(), self.__weights)
+            else:
+                weightedSum = self.__weightedSum
+            ret = weightedSum / float(self.__weightSum)
         return ret
 
 
@@ -143,6 +241,11 @@ class WMA(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+
+    .. note::
+        Values are calculated in O(1) amortized only if the weights are an exact arithmetic progression, like
+        [1, 2, 3, ...]. In that case a full dot product is still calculated every len(weights) values to avoid
+        accumulating rounding errors. Other weights take O(len(weights)) for each value.
     """
 
     def __init__(self, dataSeries, weights, maxLen=None):
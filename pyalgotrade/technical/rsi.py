@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 
 
@@ -123,6 +125,73 @@ class RSIEventWindow(technical.EventWindow):
     def getValue(self):
         return self.__value
 
+    def onNewValues(self, dateTimes, values):
+        ret = []
+        # Values are added one at a time until the first averages are calculated.
+        begin = 0
+        while begin < len(values) and self.__prevGain is None:
+            self.onNewValue(dateTimes[begin], values[begin])
+            ret.append(self.__value)
+            begin += 1
+
+        # Same calculations as in onNewValue, so the results are the same.
+        if begin < len(values):
+            value = self.__value
+            avgGain = self.__prevGain
+            avgLoss = self.__prevLoss
+            prevValue = self.getValues()[-1]
+            for currValue in values[begin:]:
+                if currValue is not None:
+                    currGain, currLoss = gain_loss_one(prevValue, currValue)
+                    avgGain = (avgGain * (self.__period-1) + currGain) / float(self.__period)
+                    avgLoss = (avgLoss * (self.__period-1) + currLoss) / float(self.__period)
+                    if avgLoss == 0:
+                        value = 100
+                    else:
+                        rs = avgGain / avgLoss
+                        value = 100 - 100 / (1 + rs)
+                    prevValue = currValue
+                ret.append(value)
+            self.__value = value
+            self.__prevGain = avgGain
+            self.__prevLoss = avgLoss
+            self.addValues(values[begin:])
+        return ret
+
+    # Yields (pos, average gain, average loss) for every position where the averages can be calculated.
+    # Same calculations as in onNewValue, so the results are the same.
+    def __iterAverages(self, values):
+        if len(values) >= self.getWindowSize():
+            values = values.tolist()
+            avgGain, avgLoss = avg_gain_loss(values, 0, self.getWindowSize())
+            yield self.__period, avgGain, avgLoss
+            for i in xrange(self.__period + 1, len(values)):
+                currGain, currLoss = gain_loss_one(values[i-1], values[i])
+                avgGain = (avgGain * (self.__period-1) + currGain) / float(self.__period)
+                avgLoss = (avgLoss * (self.__period-1) + currLoss) / float(self.__period)
+                yield i, avgGain, avgLoss
+
+    def computeAll(self, values):
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        for i, avgGain, avgLoss in self.__iterAverages(values):
+            if avgLoss == 0:
+                ret[i] = 100
+            else:
+                rs = avgGain / avgLoss
+                ret[i] = 100 - 100 / (1 + rs)
+        return ret
+
+    def restore(self, values, lastValue):
+        super(RSIEventWindow, self).restore(values, lastValue)
+        # The averages can't be calculated from the last value, so they are calculated again.
+        for i, avgGain, avgLoss in self.__iterAverages(values):
+            pass
+        if lastValue is not None:
+            self.__value = lastValue
+            self.__prevGain = avgGain
+            self.__prevLoss = avgLoss
+
 
 class RSI(technical.EventBasedFilter):
     """Relative Strength Index filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:relative_strength_index_rsi.
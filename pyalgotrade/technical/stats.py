@@ -18,19 +18,101 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 
 
-class StdDevEventWindow(technical.EventWindow):
-    def __init__(self, period, ddof):
+# Keeps the mean and the sum of squared differences from the mean of the values in the window, updating them in O(1)
+# as values get in and out of the window.
+# To avoid accumulating rounding errors, both are recalculated from the values in the window every period updates,
+# which is still O(1) amortized. They are also recalculated when the sum of squared differences gets so small that it
+# may be just rounding errors, for example when every value in the window is the same and the standard deviation has
+# to be 0. That is, when it is below FLAT_EPSILON times the largest of mean ** 2 * period and the largest sum of squared
+# differences since the last time it was recalculated (rounding errors come from subtracting that one).
+class MomentsEventWindow(technical.EventWindow):
+    FLAT_EPSILON = 1e-12
+
+    def __init__(self, period):
         assert(period > 0)
+        super(MomentsEventWindow, self).__init__(period)
+        self.__mean = None
+        self.__m2 = None
+        self.__maxM2 = None
+        self.__updates = 0
+
+    def __recalculate(self):
+        values = self.getValues()
+        if (values == values[0]).all():
+            # The mean may not be exact otherwise.
+            self.__mean = values[0]
+            self.__m2 = 0.0
+        else:
+            self.__mean = values.mean()
+            diffs = values - self.__mean
+            self.__m2 = (diffs * diffs).sum()
+        self.__maxM2 = self.__m2
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            return
+
+        oldValue = None
+        if self.windowFull():
+            oldValue = self.getValues()[0]
+
+        super(MomentsEventWindow, self).onNewValue(dateTime, value)
+
+        if self.windowFull():
+            if oldValue is None or self.__updates == self.getWindowSize():
+                self.__recalculate()
+            else:
+                # The window size doesn't change, so both the mean and the sum of squared differences can be updated
+                # in a single step.
+                diff = value - oldValue
+                mean = self.__mean + diff / float(self.getWindowSize())
+                self.__m2 = self.__m2 + diff * (value - mean + oldValue - self.__mean)
+                self.__mean = mean
+                self.__maxM2 = max(self.__maxM2, self.__m2)
+                self.__updates += 1
+                scale = max(mean * mean * self.getWindowSize(), self.__maxM2)
+                if self.__m2 <= MomentsEventWindow.FLAT_EPSILON * scale:
+                    self.__recalculate()
+
+    def restore(self, values, lastValue):
+        super(MomentsEventWindow, self).restore(values, lastValue)
+        if self.windowFull():
+            self.__recalculate()
+
+    def getMean(self):
+        """Returns the mean of the values in the window, or None if the window is not full."""
+        ret = None
+        if self.windowFull():
+            ret = self.__mean
+        return ret
+
+    def getStdDev(self, ddof):
+        """Returns the standard deviation of the values in the window, or None if the window is not full."""
+        ret = None
+        if self.windowFull():
+            ret = np.sqrt(self.__m2 / float(self.getWindowSize() - ddof))
+        return ret
+
+
+class StdDevEventWindow(MomentsEventWindow):
+    def __init__(self, period, ddof):
         super(StdDevEventWindow, self).__init__(period)
         self.__ddof = ddof
 
     def getValue(self):
-        ret = None
-        if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+        return self.getStdDev(self.__ddof)
+
+    def computeAll(self, values):
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        for pos, windows in technical.sliding_windows(values, self.getWindowSize()):
+            ret[pos:pos + len(windows)] = windows.std(axis=1, ddof=self.__ddof)
         return ret
 
 
@@ -53,7 +135,7 @@ class StdDev(technical.EventBasedFilter):
         super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
 
 
-class ZScoreEventWindow(technical.EventWindow):
+class ZScoreEventWindow(MomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
@@ -62,11 +144,15 @@ class ZScoreEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
-            ret = (lastValue - mean) / float(std)
+            lastValue = self.getValues()[-1]
+            ret = (lastValue - self.getMean()) / float(self.getStdDev(self.__ddof))
+        return ret
+
+    def computeAll(self, values):
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        for pos, windows in technical.sliding_windows(values, self.getWindowSize()):
+            ret[pos:pos + len(windows)] = (windows[:, -1] - windows.mean(axis=1)) / windows.std(axis=1, ddof=self.__ddof)
         return ret
 
 
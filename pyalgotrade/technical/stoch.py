@@ -21,17 +21,17 @@
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 from pyalgotrade.technical import ma
+from pyalgotrade.utils import collections
 
 
 def get_low_high_values(useAdjusted, bars):
-    currBar = bars[0]
-    lowestLow = currBar.getLow(useAdjusted)
-    highestHigh = currBar.getHigh(useAdjusted)
-    for i in range(len(bars)):
-        currBar = bars[i]
-        lowestLow = min(lowestLow, currBar.getLow(useAdjusted))
-        highestHigh = max(highestHigh, currBar.getHigh(useAdjusted))
-    return (lowestLow, highestHigh)
+    # Kept for backwards compatibility. SOEventWindow updates the lowest low and the highest high as bars arrive.
+    lowestLow = collections.MonotonicWindow(len(bars), True)
+    highestHigh = collections.MonotonicWindow(len(bars), False)
+    for bar in bars:
+        lowestLow.append(bar.getLow(useAdjusted))
+        highestHigh.append(bar.getHigh(useAdjusted))
+    return (lowestLow.getValue(), highestHigh.getValue())
 
 
 class SOEventWindow(technical.EventWindow):
@@ -39,11 +39,20 @@ class SOEventWindow(technical.EventWindow):
         assert(period > 1)
         super(SOEventWindow, self).__init__(period, dtype=object)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = collections.MonotonicWindow(period, True)
+        self.__highestHigh = collections.MonotonicWindow(period, False)
+
+    def onNewValue(self, dateTime, value):
+        super(SOEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__lowestLow.append(value.getLow(self.__useAdjusted))
+            self.__highestHigh.append(value.getHigh(self.__useAdjusted))
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
             currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
             closeDelta = currentClose - lowestLow
             if closeDelta:
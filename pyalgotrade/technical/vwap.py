@@ -22,25 +22,51 @@ from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 
 
+# The price * volume and volume sums are updated as bars get in and out of the window, starting with the first bar, so
+# every bar is processed in O(1). To avoid accumulating rounding errors, they are recalculated from the bars in the
+# window every windowSize updates, which is still O(1) amortized.
 class VWAPEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useTypicalPrice):
         super(VWAPEventWindow, self).__init__(windowSize, dtype=object)
         self.__useTypicalPrice = useTypicalPrice
+        self.__cumTotal = 0
+        self.__cumVolume = 0
+        self.__updates = 0
 
-    def getValue(self):
-        ret = None
+    def __getPrice(self, bar):
+        if self.__useTypicalPrice:
+            return bar.getTypicalPrice()
+        return bar.getPrice()
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            return
+
+        firstBar = None
         if self.windowFull():
-            cumTotal = 0
-            cumVolume = 0
+            firstBar = self.getValues()[0]
 
+        super(VWAPEventWindow, self).onNewValue(dateTime, value)
+
+        if self.__updates == self.getWindowSize():
+            self.__cumTotal = 0
+            self.__cumVolume = 0
             for bar in self.getValues():
-                if self.__useTypicalPrice:
-                    cumTotal += bar.getTypicalPrice() * bar.getVolume()
-                else:
-                    cumTotal += bar.getPrice() * bar.getVolume()
-                cumVolume += bar.getVolume()
+                self.__cumTotal += self.__getPrice(bar) * bar.getVolume()
+                self.__cumVolume += bar.getVolume()
+            self.__updates = 0
+        else:
+            self.__cumTotal += self.__getPrice(value) * value.getVolume()
+            self.__cumVolume += value.getVolume()
+            if firstBar is not None:
+                self.__cumTotal -= self.__getPrice(firstBar) * firstBar.getVolume()
+                self.__cumVolume -= firstBar.getVolume()
+            self.__updates += 1
 
-            ret = cumTotal / float(cumVolume)
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.__cumTotal / float(self.__cumVolume)
         return ret
 
 
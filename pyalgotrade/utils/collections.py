@@ -18,8 +18,16 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from __future__ import absolute_import
+
+import bisect
+import sys
+from collections import deque
+
 import numpy as np
 
+from pyalgotrade.utils import dt
+
 
 def lt(v1, v2):
     if v1 is None:
@@ -56,65 +64,160 @@ def intersect(values1, values2, skipNone=False):
     return (values, ix1, ix2)
 
 
+# Like intersect but for numpy.arrays, like int64 datetimes, using binary search instead of a Python loop.
+# Returns (values, ix1, ix2) as numpy.arrays.
+# values1 and values2 are assumed to be sorted. Repeated values are matched in order, just like in intersect.
+def intersect_sorted(values1, values2):
+    values1 = np.asarray(values1)
+    values2 = np.asarray(values2)
+
+    # The position of each value within its run of repeated values.
+    ranks = np.arange(len(values1)) - values1.searchsorted(values1, "left")
+    ix2 = values2.searchsorted(values1, "left") + ranks
+    matched = ix2 < values2.searchsorted(values1, "right")
+
+    ix1 = np.flatnonzero(matched)
+    return (values1[ix1], ix1, ix2[matched])
+
+
+def datetimes_to_epoch_ns(dateTimes):
+    # int64 arrays are returned as is.
+    if isinstance(dateTimes, np.ndarray) and dateTimes.dtype == np.int64:
+        return dateTimes
+    return np.array([dt.datetime_to_epoch_ns(dateTime) for dateTime in dateTimes], dtype=np.int64)
+
+
+# Returns (ix1, ix2) with the positions of the datetimes that are in both sequences.
+# dateTimes1 and dateTimes2 can be lists of datetimes or int64 arrays with nanoseconds since the epoch.
+# They are assumed to be sorted, and should not have None values.
+def align_datetimes(dateTimes1, dateTimes2):
+    _, ix1, ix2 = intersect_sorted(datetimes_to_epoch_ns(dateTimes1), datetimes_to_epoch_ns(dateTimes2))
+    return (ix1, ix2)
+
+
 # Like a collections.deque but using a numpy.array.
+# Values are stored in a ring buffer that is twice the maximum length. Every value is written twice, at pos and at
+# pos + maxLen, so the last maxLen values are always available as a contiguous slice (no copies) and appending is O(1).
+# If itemShape is set, each value is a row with that shape (for example, a tuple with many fields).
 class NumPyDeque(object):
-    def __init__(self, maxLen, dtype=float):
+    def __init__(self, maxLen, dtype=float, itemShape=()):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__values = np.empty((maxLen * 2,) + itemShape, dtype=dtype)
         self.__maxLen = maxLen
         self.__nextPos = 0
+        self.__len = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
-        else:
-            # Shift items to the left and put the last value.
-            # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+        self.__values[self.__nextPos] = value
+        self.__values[self.__nextPos + self.__maxLen] = value
+        self.__nextPos += 1
+        if self.__nextPos == self.__maxLen:
+            self.__nextPos = 0
+        if self.__len < self.__maxLen:
+            self.__len += 1
 
     def data(self):
         # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
+        if self.__len < self.__maxLen:
+            ret = self.__values[0:self.__len]
         else:
-            ret = self.__values
+            ret = self.__values[self.__nextPos:self.__nextPos + self.__maxLen]
         return ret
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        lastValues = self.data()[self.__len - min(maxLen, self.__len):]
+        values = np.empty((maxLen * 2,) + self.__values.shape[1:], dtype=self.__values.dtype)
+        values[0:len(lastValues)] = lastValues
+        values[maxLen:maxLen + len(lastValues)] = lastValues
         self.__values = values
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__len = len(lastValues)
+        self.__nextPos = self.__len % self.__maxLen
+
+    # Returns the number of bytes used to hold the values.
+    def getMemoryUsage(self):
+        return self.__values.nbytes
 
     def __len__(self):
-        return self.__nextPos
+        return self.__len
 
     def __getitem__(self, key):
         return self.data()[key]
 
 
+# Keeps the minimum, or the maximum, of the last windowSize values in O(1) amortized per value.
+# Candidates are kept in a deque, sorted from the oldest to the newest, along with their positions. When a value is
+# appended, candidates that are not smaller (or bigger) than it can't be the result anymore, so they are popped from the
+# back. Candidates that fall out of the window are popped from the front.
+class MonotonicWindow(object):
+    def __init__(self, windowSize, useMin):
+        assert windowSize > 0, "Invalid window size"
+
+        self.__windowSize = windowSize
+        self.__useMin = useMin
+        self.__values = deque()
+        self.__positions = deque()
+        self.__nextPos = 0
+
+    def getWindowSize(self):
+        return self.__windowSize
+
+    def append(self, value):
+        values = self.__values
+        positions = self.__positions
+        if self.__useMin:
+            while len(values) and values[-1] >= value:
+                values.pop()
+                positions.pop()
+        else:
+            while len(values) and values[-1] <= value:
+                values.pop()
+                positions.pop()
+        values.append(value)
+        positions.append(self.__nextPos)
+        self.__nextPos += 1
+
+        if positions[0] <= self.__nextPos - 1 - self.__windowSize:
+            values.popleft()
+            positions.popleft()
+
+    # Returns the minimum (or maximum) of the values in the window, or None if there are no values.
+    def getValue(self):
+        ret = None
+        if len(self.__values):
+            ret = self.__values[0]
+        return ret
+
+    def __len__(self):
+        return min(self.__nextPos, self.__windowSize)
+
+
 # I'm not using collections.deque because:
 # 1: Random access is slower.
 # 2: Slicing is not supported.
+# Values that fall out of the window are not removed right away (list.pop(0) is O(n)). Instead, the position of the
+# first valid value is tracked and discarded values are deleted in bulk once there are maxLen of them, so appending is
+# O(1) amortized. That only happens while appending, so reads never pay for it.
 class ListDeque(object):
     def __init__(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         self.__values = []
         self.__maxLen = maxLen
+        self.__start = 0
+
+    def __compact(self):
+        if self.__start:
+            del self.__values[0:self.__start]
+            self.__start = 0
 
     def getMaxLen(self):
         return self.__maxLen
@@ -122,20 +225,102 @@ class ListDeque(object):
     def append(self, value):
         self.__values.append(value)
         # Check bounds
-        if len(self.__values) > self.__maxLen:
-            self.__values.pop(0)
+        if len(self.__values) - self.__start > self.__maxLen:
+            self.__start += 1
+            if self.__start >= self.__maxLen:
+                self.__compact()
 
+    # Returns a list with the values. This is a copy if there are discarded values that were not deleted yet.
     def data(self):
+        if self.__start:
+            return self.__values[self.__start:]
         return self.__values
 
+    # Returns the position where value would be inserted to keep the values sorted, like numpy.searchsorted.
+    def searchsorted(self, value, side="left"):
+        if side == "left":
+            ret = bisect.bisect_left(self.__values, value, lo=self.__start)
+        else:
+            ret = bisect.bisect_right(self.__values, value, lo=self.__start)
+        return ret - self.__start
+
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
+        self.__compact()
         self.__maxLen = maxLen
         self.__values = self.__values[-1*maxLen:]
 
+    # Returns an estimate of the number of bytes used to hold the values. Objects referenced more than once are counted
+    # every time, so this is an upper bound.
+    def getMemoryUsage(self):
+        return sys.getsizeof(self.__values) + sum(sys.getsizeof(value) for value in self.__values)
+
+    def __len__(self):
+        return len(self.__values) - self.__start
+
+    def __getitem__(self, key):
+        if self.__start == 0:
+            return self.__values[key]
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            start += self.__start
+            if stop >= 0:
+                stop += self.__start
+            else:
+                # Only possible with negative steps, meaning that the slice goes up to the first valid value.
+                stop = self.__start - 1
+            return self.__values[start:stop:step]
+        else:
+            if key < 0:
+                key += len(self)
+            if key < 0 or key >= len(self):
+                raise IndexError("Index out of range")
+            return self.__values[key + self.__start]
+
+
+# A bounded sequence of datetimes stored as int64 nanoseconds since the epoch. datetime.datetime instances are only
+# built when values are accessed, and lookups can be done using binary search over the numpy.array.
+# All datetimes are returned in the timezone of the first one that was appended.
+class DateTimeDeque(object):
+    def __init__(self, maxLen):
+        self.__values = NumPyDeque(maxLen, np.int64)
+        self.__tzInfo = None
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    def append(self, dateTime):
+        epochNs = dt.datetime_to_epoch_ns(dateTime)
+        if len(self.__values) == 0:
+            self.__tzInfo = dateTime.tzinfo
+        elif self.__values[-1] >= epochNs:
+            raise Exception("Invalid datetime. It must be bigger than that last one")
+        self.__values.append(epochNs)
+
+    def asarray(self):
+        # Returns the int64 values. This is a view, no copies are made.
+        return self.__values.data()
+
+    def data(self):
+        return [dt.epoch_ns_to_datetime(epochNs, self.__tzInfo) for epochNs in self.__values.data()]
+
+    def resize(self, maxLen):
+        self.__values.resize(maxLen)
+
+    # Returns the position where dateTime would be inserted to keep the values sorted.
+    # side should be "left" or "right" just like in numpy.searchsorted.
+    def searchsorted(self, dateTime, side="left"):
+        return int(self.__values.data().searchsorted(dt.datetime_to_epoch_ns(dateTime), side))
+
+    def getMemoryUsage(self):
+        return self.__values.getMemoryUsage()
+
     def __len__(self):
         return len(self.__values)
 
     def __getitem__(self, key):
-        return self.__values[key]
+        if isinstance(key, slice):
+            return [dt.epoch_ns_to_datetime(epochNs, self.__tzInfo) for epochNs in self.__values[key]]
+        return dt.epoch_ns_to_datetime(self.__values[key], self.__tzInfo)
@@ -19,6 +19,8 @@
 """
 
 import csv
+
+import numpy as np
 import requests
 
 import logging
@@ -53,6 +55,88 @@ class FastDictReader(object):
         return self.__dict
 
 
+def read_columns(path, delimiter=","):
+    """Reads a CSV file that has the column names in the first row, parsing every row at once.
+    Returns a tuple with the column names and a list with a numpy.array of strings for each column, or None if the file
+    has quoted values since those are not supported, or if it has no column names. Empty rows are skipped.
+
+    :param path: The path to the CSV file.
+    :type path: string.
+    :param delimiter: The character used to separate values.
+    :type delimiter: string.
+
+    .. note::
+        The file is split into values by numpy working on the raw bytes, so no Python string is built per value.
+        A ValueError is raised if a row doesn't have the same number of values as the first one.
+    """
+    data = np.fromfile(path, dtype=np.uint8)
+    if (data == ord('"')).any():
+        return None
+    # The last line may not end with a new line.
+    if len(data) == 0 or data[-1] != ord("\n"):
+        data = np.append(data, np.uint8(ord("\n")))
+
+    # Every value ends at a separator, and a line ends at each new line.
+    separators = np.flatnonzero((data == ord(delimiter)) | (data == ord("\n")))
+    starts = np.concatenate(([0], separators[:-1] + 1))
+    ends = separators
+    lineEnds = np.flatnonzero(data[separators] == ord("\n"))
+    # Don't include carriage returns.
+    ends[lineEnds] -= (ends[lineEnds] > starts[lineEnds]) & (data[ends[lineEnds] - 1] == ord("\r"))
+
+    # Skip empty lines, but keep line numbers to report errors.
+    valueCounts = np.diff(np.concatenate(([-1], lineEnds)))
+    empty = (valueCounts == 1) & (ends[lineEnds] == starts[lineEnds])
+    if empty.any():
+        keep = np.ones(len(separators), dtype=bool)
+        keep[lineEnds[empty]] = False
+        starts = starts[keep]
+        ends = ends[keep]
+        valueCounts = valueCounts[~empty]
+    lineNumbers = np.flatnonzero(~empty) + 1
+    if len(valueCounts) == 0:
+        return None
+
+    fieldNames = data[starts[0]:ends[valueCounts[0] - 1]].tobytes().split(delimiter)
+    starts = starts[valueCounts[0]:]
+    ends = ends[valueCounts[0]:]
+    valueCounts = valueCounts[1:]
+    lineNumbers = lineNumbers[1:]
+    rowCount = len(valueCounts)
+
+    # Check that every row has the right number of columns.
+    wrongRows = np.flatnonzero(valueCounts != len(fieldNames))
+    if len(wrongRows):
+        row = wrongRows[0]
+        raise ValueError("Row %d has %d values but %d were expected" % (
+            lineNumbers[row], valueCounts[row], len(fieldNames)
+        ))
+
+    starts = starts.reshape(rowCount, len(fieldNames))
+    lengths = ends.reshape(rowCount, len(fieldNames)) - starts
+    # Pad the data so values can be copied with a fixed width without going past the end.
+    data = np.concatenate((data, np.zeros(lengths.max() if rowCount else 0, dtype=np.uint8)))
+
+    columns = []
+    for i in range(len(fieldNames)):
+        # Copy the values into a 2D array of bytes padded with zeros, and view each row as a string.
+        width = max(lengths[:, i].max() if rowCount else 0, 1)
+        offsets = np.arange(width)
+        chars = data.take(starts[:, i, np.newaxis] + offsets)
+        chars *= offsets < lengths[:, i, np.newaxis]
+        columns.append(chars.view("S%d" % width).reshape(rowCount))
+    return fieldNames, columns
+
+
+def column_to_float(values):
+    """Converts a column returned by :func:`read_columns` to a numpy.array of floats.
+    Empty values are converted to NaN."""
+    empty = values == ""
+    if empty.any():
+        values = np.where(empty, "nan", values)
+    return values.astype(float)
+
+
 def download_csv(url, url_params=None, content_type="text/csv"):
     response = requests.get(url, params=url_params)
 
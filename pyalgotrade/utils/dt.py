@@ -19,8 +19,13 @@
 """
 
 import datetime
+
+import numpy as np
 import pytz
 
+# The width of the strptime directives supported by parse_fixed_width.
+FIXED_WIDTH_DIRECTIVES = {"%Y": 4, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2}
+
 
 def datetime_is_naive(dateTime):
     """ Returns True if dateTime is naive."""
@@ -66,6 +71,137 @@ def timestamp_to_datetime(timeStamp, localized=True):
     return ret
 
 
+def datetime_to_epoch_ns(dateTime):
+    """ Converts a datetime.datetime to the number of nanoseconds since the epoch. Naive datetimes are assumed to be in
+    UTC."""
+    if datetime_is_naive(dateTime):
+        diff = dateTime.replace(tzinfo=None) - epoch_naive
+    else:
+        diff = dateTime - epoch_utc
+    return ((diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds) * 1000
+
+
+def epoch_ns_to_datetime(epochNs, tzInfo=None):
+    """ Converts a number of nanoseconds since the epoch to a datetime.datetime.
+    If tzInfo is None a naive datetime in UTC is returned."""
+    ret = epoch_naive + datetime.timedelta(microseconds=int(epochNs) // 1000)
+    if tzInfo is not None:
+        ret = pytz.utc.localize(ret).astimezone(tzInfo)
+    return ret
+
+
+def parse_fixed_width(dateTimeStrings, dateTimeFormat):
+    """Parses many datetimes with a fixed layout, like %Y-%m-%d %H:%M:%S, at once.
+    Returns a numpy.array with the number of nanoseconds since the epoch for each one, as if they were in UTC, or None
+    if the format is not supported or some string doesn't match it.
+
+    :param dateTimeStrings: The strings to parse.
+    :type dateTimeStrings: numpy.array of strings.
+    :param dateTimeFormat: A strptime format with %Y, %m and %d, and optionally %H, %M and %S, besides literal characters.
+    :type dateTimeFormat: string.
+    """
+
+    # Build the layout. Each field is (directive, position, width).
+    fields = []
+    literals = []
+    i = 0
+    width = 0
+    while i < len(dateTimeFormat):
+        directive = dateTimeFormat[i:i+2]
+        if directive in FIXED_WIDTH_DIRECTIVES:
+            fields.append((directive, width, FIXED_WIDTH_DIRECTIVES[directive]))
+            width += FIXED_WIDTH_DIRECTIVES[directive]
+            i += 2
+        elif dateTimeFormat[i] == "%":
+            return None
+        else:
+            literals.append((width, dateTimeFormat[i]))
+            width += 1
+            i += 1
+    fields = dict((directive, (pos, size)) for directive, pos, size in fields)
+    if not set(["%Y", "%m", "%d"]).issubset(fields.keys()):
+        return None
+
+    dateTimeStrings = np.asarray(dateTimeStrings, dtype=str)
+    if len(dateTimeStrings) == 0:
+        return np.empty(0, dtype=np.int64)
+    if dateTimeStrings.dtype.itemsize != width:
+        return None
+    chars = np.ascontiguousarray(dateTimeStrings).view(np.uint8).reshape(len(dateTimeStrings), width)
+    for pos, char in literals:
+        if (chars[:, pos] != ord(char)).any():
+            return None
+
+    values = {}
+    for directive, (pos, size) in fields.iteritems():
+        digits = chars[:, pos:pos+size].astype(np.int64) - ord("0")
+        if ((digits < 0) | (digits > 9)).any():
+            return None
+        values[directive] = digits.dot(10 ** np.arange(size - 1, -1, -1))
+    hours = values.get("%H", 0)
+    minutes = values.get("%M", 0)
+    seconds = values.get("%S", 0)
+    if (
+        (values["%m"] < 1).any() or (values["%m"] > 12).any() or (values["%d"] < 1).any() or
+        (np.asarray(hours) > 23).any() or (np.asarray(minutes) > 59).any() or (np.asarray(seconds) > 59).any()
+    ):
+        return None
+
+    months = (values["%Y"] - 1970) * 12 + values["%m"] - 1
+    days = months.astype("M8[M]").astype("M8[D]") + (values["%d"] - 1).astype("m8[D]")
+    # Days that are past the end of the month.
+    if (days.astype("M8[M]").astype(np.int64) != months).any():
+        return None
+    return ((days.astype(np.int64) * 86400 + hours * 3600 + minutes * 60 + seconds) * 10**9).astype(np.int64)
+
+
+def parse(dateTimeStrings, dateTimeFormat):
+    """Parses many datetimes at once. Check :func:`parse_fixed_width` for the returned values.
+    If the layout is not fixed, datetime.datetime.strptime is used once for every different string.
+    """
+    ret = parse_fixed_width(dateTimeStrings, dateTimeFormat)
+    if ret is None:
+        uniqueStrings, inverse = np.unique(np.asarray(dateTimeStrings, dtype=str), return_inverse=True)
+        epochNs = np.array(
+            [datetime_to_epoch_ns(datetime.datetime.strptime(value, dateTimeFormat)) for value in uniqueStrings],
+            dtype=np.int64
+        )
+        ret = epochNs[inverse]
+    return ret
+
+
+def _utc_offset_ns(epochNs, timeZone):
+    offset = localize(epoch_ns_to_datetime(epochNs), timeZone).utcoffset()
+    return ((offset.days * 86400 + offset.seconds) * 1000000 + offset.microseconds) * 1000
+
+
+def localize_epoch_ns(epochNs, timeZone):
+    """Takes a numpy.array with the number of nanoseconds since the epoch for naive datetimes in a timezone, and returns
+    the number of nanoseconds since the epoch in UTC. This gives the same results as :func:`localize`, but instead of
+    localizing every datetime, the UTC offset is calculated once for every different hour.
+
+    :param epochNs: The number of nanoseconds since the epoch for naive datetimes, as if they were in UTC.
+    :type epochNs: numpy.array.
+    :param timeZone: The timezone for the naive datetimes.
+    :type timeZone: A pytz timezone.
+    """
+    hourNs = 3600 * 10**9
+    epochNs = np.asarray(epochNs, dtype=np.int64)
+    uniqueHours, inverse = np.unique(epochNs // hourNs, return_inverse=True)
+    offsets = np.empty(len(uniqueHours), dtype=np.int64)
+    partialHours = []
+    for i, hour in enumerate(uniqueHours.tolist()):
+        offsets[i] = _utc_offset_ns(hour * hourNs, timeZone)
+        # Offsets don't always change on the hour, so if the offset changes within the hour, each datetime is localized.
+        if _utc_offset_ns((hour + 1) * hourNs - 1000, timeZone) != offsets[i]:
+            partialHours.append(i)
+
+    ret = epochNs - offsets[inverse]
+    for i in np.flatnonzero(np.in1d(inverse, partialHours)):
+        ret[i] = epochNs[i] - _utc_offset_ns(epochNs[i], timeZone)
+    return ret
+
+
 def get_first_monday(year):
     ret = datetime.date(year, 1, 1)
     if ret.weekday() != 0:
@@ -82,4 +218,5 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = as_utc(epoch_naive)
@@ -24,6 +24,8 @@ import common
 
 from pyalgotrade import barfeed
 from pyalgotrade.barfeed import common as bfcommon
+from pyalgotrade.barfeed import membf
+from pyalgotrade.dataseries import memmap
 from pyalgotrade import bar
 from pyalgotrade import dispatcher
 
@@ -81,6 +83,65 @@ class OptimizerBarFeedTestCase(common.TestCase):
         self.assertEquals(barFeed.barsHaveAdjClose(), False)
 
 
+class MemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class MemBarFeedTestCase(common.TestCase):
+    def testMergeManyInstruments(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        expected = {}
+        for i in range(50):
+            instrument = "inst%d" % i
+            # Each instrument has bars every i + 1 days.
+            dateTimes = [datetime.datetime(2001, 1, 1) + datetime.timedelta(days=day) for day in range(i, 200, i + 1)]
+            barFeed.addBarsFromSequence(instrument, [
+                bar.BasicBar(dateTime, i, i, i, i, i, None, bar.Frequency.DAY) for dateTime in dateTimes
+            ])
+            for dateTime in dateTimes:
+                expected.setdefault(dateTime, set()).add(instrument)
+
+        for i in range(2):
+            self.assertFalse(barFeed.eof())
+            self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2001, 1, 1))
+            loaded = [(dateTime, set(bars.getInstruments())) for dateTime, bars in barFeed]
+            self.assertEqual(loaded, sorted(expected.items()))
+            self.assertTrue(barFeed.eof())
+            self.assertEqual(barFeed.peekDateTime(), None)
+            self.assertEqual(barFeed.getNextBars(), None)
+            barFeed.reset()
+
+    def testDuplicateBars(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", [
+            bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+            bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+        ])
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+            for dateTime, bars in barFeed:
+                pass
+
+    def testBarFeedFactory(self):
+        with common.TmpDir() as tmpPath:
+            factory = memmap.BarDataSeriesFactory(tmpPath)
+            barFeed = MemBarFeed(bar.Frequency.DAY, maxLen=2)
+            barFeed.setDataSeriesFactory(factory)
+            firstDt = datetime.datetime(2000, 1, 1)
+            barFeed.addBarsFromSequence("orcl", [
+                bar.BasicBar(firstDt + datetime.timedelta(days=i), i, i, i, i, i, None, bar.Frequency.DAY)
+                for i in range(5)
+            ])
+            for dateTime, bars in barFeed:
+                pass
+            ds = barFeed["orcl"]
+            self.assertTrue(isinstance(ds, memmap.MemMapBarDataSeries))
+            self.assertEqual(ds.getPath(), factory.getPath("orcl"))
+            self.assertEqual(ds.getCloseDataSeries()[:], range(5))
+            ds.close()
+            self.assertEqual(len(memmap.MemMapBarDataSeries(factory.getPath("orcl"), readOnly=True)), 5)
+
+
 class CommonTestCase(common.TestCase):
     def testSanitize(self):
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 9, 10), (10, 12, 9, 10))
@@ -0,0 +1,179 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+import shutil
+
+import pytz
+
+import common
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import csvcache
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import ninjatraderfeed
+
+
+def load_bars(feed, path, cacheDir=None, barFilter=None):
+    feed.setCacheDir(cacheDir)
+    feed.setBarFilter(barFilter)
+    feed.addBarsFromCSV("spy", path)
+    return [bars["spy"] for dateTime, bars in feed]
+
+
+def get_entry_names(cacheDir):
+    return set(fileName.split(".")[0] for fileName in os.listdir(cacheDir))
+
+
+class CacheTestCase(common.TestCase):
+    def __assertSameBars(self, bars1, bars2):
+        self.assertEqual(len(bars1), len(bars2))
+        for bar1, bar2 in zip(bars1, bars2):
+            self.assertEqual(bar1.getDateTime(), bar2.getDateTime())
+            self.assertEqual(str(bar1.getDateTime()), str(bar2.getDateTime()))
+            self.assertEqual(bar1.getOpen(), bar2.getOpen())
+            self.assertEqual(bar1.getHigh(), bar2.getHigh())
+            self.assertEqual(bar1.getLow(), bar2.getLow())
+            self.assertEqual(bar1.getClose(), bar2.getClose())
+            self.assertEqual(bar1.getVolume(), bar2.getVolume())
+            self.assertEqual(bar1.getAdjClose(), bar2.getAdjClose())
+            self.assertEqual(bar1.getFrequency(), bar2.getFrequency())
+            self.assertEqual(bar1.getExtraColumns(), bar2.getExtraColumns())
+
+    def __testFeed(self, buildFeed, path):
+        with common.TmpDir() as tmpPath:
+            cacheDir = os.path.join(tmpPath, "cache")
+            expected = load_bars(buildFeed(), path)
+            # The first time bars are parsed and then saved.
+            self.__assertSameBars(load_bars(buildFeed(), path, cacheDir), expected)
+            self.assertEqual(len(get_entry_names(cacheDir)), 1)
+            # The second time bars are loaded from the cache.
+            self.__assertSameBars(load_bars(buildFeed(), path, cacheDir), expected)
+            self.assertEqual(len(get_entry_names(cacheDir)), 1)
+
+    def testYahoo(self):
+        self.__testFeed(yahoofeed.Feed, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        self.__testFeed(
+            lambda: yahoofeed.Feed(timezone=pytz.timezone("US/Eastern")),
+            common.get_data_file_path("orcl-2000-yahoofinance.csv")
+        )
+
+    def testNinjaTrader(self):
+        self.__testFeed(
+            lambda: ninjatraderfeed.Feed(bar.Frequency.MINUTE),
+            common.get_data_file_path("nt-spy-minute-2011-03.csv")
+        )
+
+    def testGeneric(self):
+        def buildFeed():
+            ret = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            ret.setDateTimeFormat("%Y-%m-%d %H:%M:%S")
+            return ret
+
+        self.__testFeed(buildFeed, common.get_data_file_path("30min-bitstampUSD-2.csv"))
+
+    def testAdjCloseFromCache(self):
+        path = common.get_data_file_path("orcl-2000-yahoofinance.csv")
+        with common.TmpDir() as tmpPath:
+            for i in range(2):
+                feed = csvfeed.GenericBarFeed(bar.Frequency.DAY)
+                feed.setDateTimeFormat("%Y-%m-%d")
+                feed.setColumnName("datetime", "Date")
+                feed.setCacheDir(tmpPath)
+                feed.addBarsFromCSV("orcl", path)
+                self.assertTrue(feed.barsHaveAdjClose())
+
+    def testFilter(self):
+        path = common.get_data_file_path("orcl-2000-yahoofinance.csv")
+        barFilter = csvfeed.DateRangeFilter(datetime.datetime(2000, 3, 1), datetime.datetime(2000, 3, 31))
+        expected = load_bars(yahoofeed.Feed(), path, barFilter=barFilter)
+        with common.TmpDir() as tmpPath:
+            for i in range(2):
+                self.__assertSameBars(load_bars(yahoofeed.Feed(), path, tmpPath, barFilter), expected)
+            # Bars are cached before filtering, so the cache is shared.
+            self.assertEqual(len(load_bars(yahoofeed.Feed(), path, tmpPath)), 252)
+            self.assertEqual(len(get_entry_names(tmpPath)), 1)
+
+    def testFilterOnColumns(self):
+        path = common.get_data_file_path("orcl-2000-yahoofinance.csv")
+
+        class DateRangeFilter(csvfeed.DateRangeFilter):
+            def supportsColumns(self):
+                return True
+
+            def includeBar(self, bar_):
+                raise Exception("Bars should not be built to filter them")
+
+        with common.TmpDir() as tmpPath:
+            load_bars(yahoofeed.Feed(), path, tmpPath)
+            barFilter = DateRangeFilter(datetime.datetime(2000, 3, 1), datetime.datetime(2000, 3, 31))
+            bars = load_bars(yahoofeed.Feed(), path, tmpPath, barFilter)
+            self.assertEqual(bars[0].getDateTime(), datetime.datetime(2000, 3, 1))
+            self.assertEqual(bars[-1].getDateTime(), datetime.datetime(2000, 3, 31))
+
+    def testFilterNotOnColumns(self):
+        path = common.get_data_file_path("nt-spy-minute-2011-03.csv")
+        barFilter = csvfeed.USEquitiesRTH()
+        expected = load_bars(ninjatraderfeed.Feed(bar.Frequency.MINUTE), path, barFilter=barFilter)
+        with common.TmpDir() as tmpPath:
+            cacheDir = os.path.join(tmpPath, "cache")
+            bars = load_bars(ninjatraderfeed.Feed(bar.Frequency.MINUTE), path, cacheDir, barFilter)
+            self.__assertSameBars(bars, expected)
+            # The cache is not used with filters that need every bar to be built.
+            self.assertFalse(os.path.exists(cacheDir))
+
+    def testInvalidation(self):
+        with common.TmpDir() as tmpPath:
+            cacheDir = os.path.join(tmpPath, "cache")
+            path = os.path.join(tmpPath, "orcl.csv")
+            shutil.copy(common.get_data_file_path("orcl-2000-yahoofinance.csv"), path)
+            self.assertEqual(load_bars(yahoofeed.Feed(), path, cacheDir)[0].getClose(), 118.12)
+            entryNames = get_entry_names(cacheDir)
+
+            with open(path, "r") as f:
+                lines = f.read().splitlines()
+            with open(path, "w") as f:
+                f.write("\n".join(lines[:2]))
+            bars = load_bars(yahoofeed.Feed(), path, cacheDir)
+            self.assertEqual(len(bars), 1)
+            self.assertEqual(bars[0].getClose(), 29.06)
+            # The previous entry was replaced.
+            self.assertEqual(len(get_entry_names(cacheDir)), 1)
+            self.assertNotEqual(get_entry_names(cacheDir), entryNames)
+
+    def testNotCacheable(self):
+        path = common.get_data_file_path("orcl-2000-yahoofinance.csv")
+
+        class RowParser(yahoofeed.RowParser):
+            def getCacheKey(self):
+                return None
+
+        self.assertEqual(csvcache.get_entry_name(path, None), None)
+        self.assertEqual(csvcache.get_entry_name(path, (RowParser,)), None)
+        self.assertEqual(csvcache.get_entry_name(path, (object(),)), None)
+        self.assertNotEqual(csvcache.get_entry_name(path, (yahoofeed.RowParser,)), None)
+        with common.TmpDir() as tmpPath:
+            feed = yahoofeed.Feed()
+            feed.setCacheDir(tmpPath)
+            csvfeed.BarFeed.addBarsFromCSV(feed, "orcl", path, RowParser(None, bar.Frequency.DAY))
+            self.assertEqual(len([bars for dateTime, bars in feed]), 252)
+            self.assertEqual(os.listdir(tmpPath), [])
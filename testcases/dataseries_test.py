@@ -19,13 +19,22 @@
 """
 
 import datetime
+import os
+
+import numpy as np
+import pytz
 
 import common
 
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 from pyalgotrade.dataseries import aligned
+from pyalgotrade.dataseries import memmap
+from pyalgotrade.dataseries import retention
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import linebreak
 from pyalgotrade import bar
+from pyalgotrade.utils import dt
 
 
 class TestSequenceDataSeries(common.TestCase):
@@ -140,6 +149,274 @@ class TestSequenceDataSeries(common.TestCase):
         self.assertEqual(ds[0], 90)
         self.assertEqual(ds[-1], 99)
 
+    def testAsArray(self):
+        ds = dataseries.SequenceDataSeries()
+        self.assertEqual(ds.getDType(), None)
+        for value in [1, None, 3]:
+            ds.append(value)
+        values = ds.asarray()
+        self.assertEqual(values.dtype, float)
+        self.assertEqual(values[0], 1)
+        self.assertTrue(np.isnan(values[1]))
+        self.assertEqual(values[2], 3)
+
+    def testTail(self):
+        ds = dataseries.SequenceDataSeries()
+        self.assertEqual(len(ds.tail(2)), 0)
+        for value in [1, None, 3]:
+            ds.append(value)
+        self.assertEqual(ds.tail(1).tolist(), [3])
+        self.assertEqual(ds.tail(0).tolist(), [])
+        values = ds.tail(10)
+        self.assertEqual(len(values), 3)
+        self.assertTrue(np.isnan(values[1]))
+
+
+class TestTypedSequenceDataSeries(common.TestCase):
+    def testEmpty(self):
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        self.assertEqual(len(ds), 0)
+        self.assertEqual(len(ds.asarray()), 0)
+        with self.assertRaises(IndexError):
+            ds[-1]
+        with self.assertRaises(IndexError):
+            ds[0]
+
+    def testNonEmpty(self):
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        for value in range(10):
+            ds.append(value)
+        self.assertEqual(len(ds), 10)
+        self.assertEqual(ds[-1], 9)
+        self.assertEqual(ds[0], 0)
+        self.assertEqual(ds.getValueAbsolute(1), 1)
+        self.assertEqual(ds.getValueAbsolute(10), None)
+        self.assertEqual(ds[-2:].tolist(), [8, 9])
+        self.assertEqual(ds[1:4].tolist(), [1, 2, 3])
+        self.assertEqual(ds.asarray().sum(), 45)
+
+    def testSlicesAreReadOnly(self):
+        ds = dataseries.SequenceDataSeries(maxLen=4, dtype=float)
+        for value in range(6):
+            ds.append(value)
+        values = ds[-2:]
+        with self.assertRaises(ValueError):
+            values[0] = 99
+        self.assertEqual(ds[:].tolist(), [2, 3, 4, 5])
+
+    def testNoneIsNaN(self):
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        ds.append(None)
+        ds.append(1)
+        self.assertTrue(np.isnan(ds[0]))
+        self.assertEqual(ds[1], 1)
+
+    def testBoundedAndResize(self):
+        ds = dataseries.SequenceDataSeries(maxLen=3, dtype=float)
+        for i in xrange(100):
+            ds.append(i)
+        self.assertEqual(len(ds), 3)
+        self.assertEqual(len(ds.getDateTimes()), 3)
+        self.assertEqual(ds.asarray().tolist(), [97, 98, 99])
+
+        ds.setMaxLen(5)
+        ds.append(100)
+        self.assertEqual(ds.asarray().tolist(), [97, 98, 99, 100])
+        ds.setMaxLen(2)
+        self.assertEqual(ds.asarray().tolist(), [99, 100])
+
+    def testAsArrayIsReadOnly(self):
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        ds.append(1)
+        with self.assertRaises(ValueError):
+            ds.asarray()[0] = 2
+        ds.append(2)
+        self.assertEqual(ds.asarray().tolist(), [1, 2])
+
+    def testTail(self):
+        ds = dataseries.SequenceDataSeries(maxLen=3, dtype=float)
+        for i in xrange(10):
+            ds.append(i)
+        values = ds.tail(2)
+        self.assertEqual(values.tolist(), [8, 9])
+        with self.assertRaises(ValueError):
+            values[0] = 1
+        self.assertEqual(ds.tail(5).tolist(), [7, 8, 9])
+        self.assertEqual(ds.tail(2, dtype=int).dtype, int)
+
+
+class TestDateTimeLookups(common.TestCase):
+    def __buildDataSeries(self, indexDateTimes, maxLen=None, tzInfo=None):
+        ret = dataseries.SequenceDataSeries(maxLen=maxLen, indexDateTimes=indexDateTimes)
+        for i in range(10):
+            dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i*2)
+            if tzInfo is not None:
+                dateTime = dt.localize(dateTime, tzInfo)
+            ret.appendWithDateTime(dateTime, i)
+        return ret
+
+    def __testLookups(self, indexDateTimes):
+        ds = self.__buildDataSeries(indexDateTimes)
+
+        self.assertEqual(ds.indexOf(datetime.datetime(2000, 1, 1)), 0)
+        self.assertEqual(ds.indexOf(datetime.datetime(2000, 1, 3)), 1)
+        self.assertEqual(ds.indexOf(datetime.datetime(2000, 1, 19)), 9)
+        self.assertEqual(ds.indexOf(datetime.datetime(2000, 1, 2)), None)
+        self.assertEqual(ds.indexOf(datetime.datetime(1999, 1, 1)), None)
+        self.assertEqual(ds.indexOf(datetime.datetime(2001, 1, 1)), None)
+
+        self.assertEqual(ds.getValueAt(datetime.datetime(1999, 12, 31)), None)
+        self.assertEqual(ds.getValueAt(datetime.datetime(2000, 1, 1)), 0)
+        self.assertEqual(ds.getValueAt(datetime.datetime(2000, 1, 2)), 0)
+        self.assertEqual(ds.getValueAt(datetime.datetime(2000, 1, 3)), 1)
+        self.assertEqual(ds.getValueAt(datetime.datetime(2001, 1, 1)), 9)
+
+        self.assertEqual(list(ds.between(datetime.datetime(2000, 1, 3), datetime.datetime(2000, 1, 7))), [1, 2, 3])
+        self.assertEqual(list(ds.between(datetime.datetime(2000, 1, 2), datetime.datetime(2000, 1, 6))), [1, 2])
+        self.assertEqual(list(ds.between(datetime.datetime(1999, 1, 1), datetime.datetime(2001, 1, 1))), range(10))
+        self.assertEqual(list(ds.between(datetime.datetime(2000, 1, 7), datetime.datetime(2000, 1, 3))), [])
+        self.assertEqual(list(ds.between(datetime.datetime(2001, 1, 7), datetime.datetime(2001, 1, 9))), [])
+
+    def testLookups(self):
+        self.__testLookups(False)
+
+    def testLookupsWithIndex(self):
+        self.__testLookups(True)
+
+    def testBoundedWithIndex(self):
+        ds = self.__buildDataSeries(True, maxLen=3)
+        self.assertEqual(len(ds.getDateTimes()), 3)
+        self.assertEqual(ds.getDateTimes()[0], datetime.datetime(2000, 1, 15))
+        self.assertEqual(ds.indexOf(datetime.datetime(2000, 1, 15)), 0)
+        self.assertEqual(ds.getValueAt(datetime.datetime(2000, 1, 14)), None)
+        self.assertEqual(ds.getValueAt(datetime.datetime(2000, 1, 20)), 9)
+
+    def testIndexedDateTimes(self):
+        for tzInfo in [None, pytz.utc, pytz.timezone("US/Eastern")]:
+            ds1 = self.__buildDataSeries(False, tzInfo=tzInfo)
+            ds2 = self.__buildDataSeries(True, tzInfo=tzInfo)
+            self.assertEqual(ds1.getDateTimes(), ds2.getDateTimes())
+            for dateTime1, dateTime2 in zip(ds1.getDateTimes(), ds2.getDateTimes()):
+                self.assertEqual(str(dateTime1), str(dateTime2))
+
+    def testIndexedDateTimesRequired(self):
+        ds = dataseries.SequenceDataSeries(indexDateTimes=True)
+        with self.assertRaisesRegexp(Exception, "A datetime is required"):
+            ds.append(1)
+        ds.appendWithDateTime(datetime.datetime(2000, 1, 1), 1)
+        with self.assertRaisesRegexp(Exception, "Invalid datetime"):
+            ds.appendWithDateTime(datetime.datetime(2000, 1, 1), 1)
+        self.assertEqual(len(ds), 1)
+
+
+class TestMemMapDataSeries(common.TestCase):
+    def testAppendAndReopen(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "values.dat")
+            ds = memmap.MemMapDataSeries(path, maxLen=3)
+            firstDt = dt.localize(datetime.datetime(2000, 1, 1), pytz.timezone("US/Eastern"))
+            for i in range(10):
+                ds.appendWithDateTime(firstDt + datetime.timedelta(days=i), i if i != 5 else None)
+
+                self.assertEqual(len(ds), i + 1)
+                self.assertEqual(ds[-1], i if i != 5 else None)
+                self.assertEqual(ds[0], 0)
+
+            self.assertEqual(ds[4], 4)
+            self.assertEqual(ds[5], None)
+            self.assertEqual(ds[2:4].tolist(), [2, 3])
+            self.assertEqual(ds[-3:].tolist(), [7, 8, 9])
+            self.assertEqual(ds[1:9:3].tolist(), [1, 4, 7])
+            values = ds[8:1:-3]
+            self.assertEqual(len(values), 3)
+            self.assertEqual(values[0], 8)
+            self.assertTrue(np.isnan(values[1]))
+            self.assertEqual(values[2], 2)
+            self.assertEqual(ds[-1:-4:-1].tolist(), [9, 8, 7])
+            self.assertEqual(ds.tail(4).tolist(), [6, 7, 8, 9])
+            with self.assertRaises(IndexError):
+                ds[10]
+            with self.assertRaisesRegexp(Exception, "Invalid datetime"):
+                ds.appendWithDateTime(firstDt, 1)
+
+            dateTimes = [firstDt + datetime.timedelta(days=i) for i in range(10)]
+            self.assertEqual(ds.getDateTimes(), dateTimes)
+            ds.close()
+            self.assertEqual(ds[-1], 9)
+
+            ds = memmap.MemMapDataSeries(path, readOnly=True)
+            self.assertEqual(len(ds), 10)
+            self.assertEqual(ds[0], 0)
+            self.assertEqual(ds[-1], 9)
+            self.assertTrue(np.isnan(ds.asarray()[5]))
+            self.assertEqual(ds.getDateTimes(), dateTimes)
+            self.assertEqual(str(ds.getDateTimes()[0]), str(firstDt))
+            with self.assertRaisesRegexp(Exception, "read-only"):
+                ds.append(1)
+
+    def testRecord(self):
+        with common.TmpDir() as tmpPath:
+            source = dataseries.SequenceDataSeries(maxLen=2)
+            ds = memmap.record(source, os.path.join(tmpPath, "values.dat"), maxLen=2)
+            for i in range(5):
+                source.append(i)
+            self.assertEqual(len(source), 2)
+            self.assertEqual(ds.asarray().tolist(), range(5))
+            self.assertEqual(ds.getDateTimes(), [None] * 5)
+            ds.close()
+
+    def testFlushWithoutClose(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "values.dat")
+            with memmap.MemMapDataSeries(path, maxLen=10) as ds:
+                ds.append(1)
+            self.assertEqual(memmap.MemMapDataSeries(path, readOnly=True)[:].tolist(), [1])
+
+            ds = memmap.MemMapDataSeries(path, maxLen=10)
+            ds.append(2)
+            del ds
+            self.assertEqual(memmap.MemMapDataSeries(path, readOnly=True)[:].tolist(), [2])
+
+    def testBarDataSeries(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.dat")
+            firstDt = dt.localize(datetime.datetime(2000, 1, 1), pytz.timezone("US/Eastern"))
+            dateTimes = [firstDt + datetime.timedelta(days=i) for i in range(10)]
+            closes = []
+            with memmap.MemMapBarDataSeries(path, maxLen=3) as ds:
+                ds.getCloseDataSeries().getNewValueEvent().subscribe(lambda ds, dateTime, value: closes.append(value))
+                for i, dateTime in enumerate(dateTimes):
+                    ds.append(bar.BasicBar(dateTime, i, i + 1, i, i, i * 10, None, bar.Frequency.DAY))
+
+                self.assertEqual(len(ds), 10)
+                self.assertEqual(ds.getMaxLen(), 3)
+                self.assertEqual(closes, range(10))
+                self.assertEqual(ds[0].getDateTime(), firstDt)
+                self.assertEqual(ds[0].getHigh(), 1)
+                self.assertEqual(ds[0].getVolume(), 0)
+                self.assertEqual(ds[0].getAdjClose(), None)
+                self.assertEqual(ds[0].getFrequency(), bar.Frequency.DAY)
+                self.assertEqual([item.getClose() for item in ds[5:8]], [5, 6, 7])
+                self.assertEqual(ds.getDateTimes(), dateTimes)
+                self.assertEqual(ds.indexOf(dateTimes[4]), 4)
+                self.assertEqual(ds.getValueAt(dateTimes[4] + datetime.timedelta(hours=1)).getClose(), 4)
+                self.assertEqual([item.getClose() for item in ds.between(dateTimes[1], dateTimes[8])], range(1, 9))
+                self.assertEqual(ds.getCloseDataSeries()[:], range(10))
+                self.assertEqual(ds.getVolumeDataSeries()[-1], 90)
+                self.assertEqual(ds.getAdjCloseDataSeries()[0:2], [None, None])
+                self.assertEqual(ds.getHighDataSeries().tail(2).tolist(), [9, 10])
+                self.assertEqual(ds.getCloseDataSeries().getDateTimes(), dateTimes)
+
+            ds = memmap.MemMapBarDataSeries(path, readOnly=True)
+            self.assertEqual(len(ds), 10)
+            self.assertEqual([item.getOpen() for item in ds[:]], range(10))
+            self.assertEqual(ds.getDateTimes(), dateTimes)
+            self.assertEqual(ds.getLowDataSeries()[-1], 9)
+            with self.assertRaisesRegexp(Exception, "read-only"):
+                ds.append(bar.BasicBar(dateTimes[-1] + datetime.timedelta(days=1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY))
+            with self.assertRaisesRegexp(Exception, "Invalid file format"):
+                memmap.MemMapDataSeries(path, readOnly=True)
+
 
 class TestBarDataSeries(common.TestCase):
     def testEmpty(self):
@@ -212,6 +489,115 @@ class TestBarDataSeries(common.TestCase):
             self.assertEqual(ds[i].getDateTime(), ds.getDateTimes()[i])
             self.assertEqual(ds.getDateTimes()[i], firstDt + datetime.timedelta(seconds=i))
 
+    def testFieldDataSeries(self):
+        ds = bards.BarDataSeries(maxLen=5)
+        firstDt = datetime.datetime.now()
+        for i in range(10):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i + 2, i, i + 1, 10 * i, None, bar.Frequency.SECOND))
+
+        closeDS = ds.getCloseDataSeries()
+        self.assertEqual(len(closeDS), 5)
+        self.assertEqual(closeDS.getMaxLen(), 5)
+        self.assertEqual(closeDS[0], 6)
+        self.assertEqual(closeDS[-1], 10)
+        self.assertEqual(closeDS[-2:], [9, 10])
+        self.assertEqual(closeDS.getValueAbsolute(5), None)
+        self.assertEqual(closeDS.asarray().tolist(), [6, 7, 8, 9, 10])
+        self.assertEqual(ds.getVolumeDataSeries().asarray().tolist(), [50, 60, 70, 80, 90])
+        # Field values are contiguous, and volume keeps the type it has in the bars.
+        self.assertTrue(closeDS.asarray().flags.c_contiguous)
+        self.assertTrue(closeDS.tail(3).flags.c_contiguous)
+        self.assertTrue(isinstance(ds.getVolumeDataSeries()[-1], int))
+        self.assertEqual(ds.getHighDataSeries()[:], [7, 8, 9, 10, 11])
+        self.assertEqual(closeDS.getDateTimes(), ds.getDateTimes())
+        # Missing values are returned as None.
+        self.assertEqual(ds.getAdjCloseDataSeries()[-1], None)
+        self.assertEqual(ds.getAdjCloseDataSeries()[-2:], [None, None])
+        self.assertEqual(ds.getVolumeDataSeries()[-2:], [80, 90])
+        self.assertTrue(np.isnan(ds.getAdjCloseDataSeries().tail(2)).all())
+        with self.assertRaises(IndexError):
+            closeDS[5]
+
+        ds.setMaxLen(2)
+        self.assertEqual(len(closeDS), 2)
+        self.assertEqual(closeDS[:], [9, 10])
+        self.assertEqual(closeDS.tail(1).tolist(), [10])
+        with self.assertRaises(ValueError):
+            closeDS.asarray()[0] = 1
+
+    def testFieldDataSeriesEvents(self):
+        values = []
+
+        def onNewValue(dataSeries, dateTime, value):
+            self.assertEqual(dataSeries[-1], value)
+            values.append(value)
+
+        ds = bards.BarDataSeries()
+        ds.getHighDataSeries().getNewValueEvent().subscribe(onNewValue)
+        firstDt = datetime.datetime.now()
+        for i in range(3):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), 2, 4 + i, 1, 3, 10, 3, bar.Frequency.SECOND))
+        self.assertEqual(values, [4, 5, 6])
+        self.assertFalse(ds.getCloseDataSeries().getNewValueEvent().hasSubscribers())
+
+    def testLazyFieldAndExtraDataSeries(self):
+        ds = bards.BarDataSeries(maxLen=3)
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in range(5):
+            extra = {"bid": i} if i % 2 == 0 else {}
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i, i, i, i, i, bar.Frequency.SECOND, extra))
+
+        # Back-filled from the bars still available.
+        self.assertEqual(ds.getCloseDataSeries()[:], [2, 3, 4])
+        self.assertEqual(ds.getExtraDataSeries("bid")[:], [2, 4])
+        self.assertEqual(ds.getExtraDataSeries("bid").getDateTimes(), [firstDt + datetime.timedelta(seconds=2), firstDt + datetime.timedelta(seconds=4)])
+        self.assertEqual(ds.getExtraDataSeries("ask")[:], [])
+
+        ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=5), 5, 5, 5, 5, 5, 5, bar.Frequency.SECOND, {"bid": 5, "ask": 6}))
+        self.assertEqual(ds.getCloseDataSeries()[:], [3, 4, 5])
+        self.assertEqual(ds.getOpenDataSeries()[:], [3, 4, 5])
+        self.assertEqual(ds.getExtraDataSeries("bid")[:], [2, 4, 5])
+        self.assertEqual(ds.getExtraDataSeries("ask")[:], [6])
+
+    def testOnlyRequestedFieldsAreBuilt(self):
+        ds = bards.BarDataSeries(maxLen=3)
+        emptyMemoryUsage = ds.getMemoryUsage()
+        closeDS = ds.getCloseDataSeries()
+        self.assertEqual(ds.getCreatedDataSeries(), [closeDS])
+        columnMemoryUsage = ds.getMemoryUsage() - emptyMemoryUsage
+        self.assertTrue(columnMemoryUsage > 0)
+
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in range(4):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i + 1, 0, i, i, None, bar.Frequency.SECOND))
+        self.assertEqual(closeDS[:], [1, 2, 3])
+        # Fields requested later are back-filled on their own.
+        memoryUsage = ds.getMemoryUsage()
+        highDS = ds.getHighDataSeries()
+        self.assertEqual(ds.getCreatedDataSeries(), [closeDS, highDS])
+        self.assertEqual(highDS[:], [2, 3, 4])
+        self.assertEqual(ds.getMemoryUsage() - memoryUsage, columnMemoryUsage)
+        self.assertEqual(ds.getAdjCloseDataSeries()[:], [None, None, None])
+
+    def testFieldDataSeriesRequestedWhileAppending(self):
+        ds = bards.BarDataSeries()
+        closes = []
+
+        def onNewClose(dataSeries, dateTime, value):
+            closes.append(value)
+
+        def onNewBar(dataSeries, dateTime, value):
+            ds.getCloseDataSeries().getNewValueEvent().subscribe(onNewClose)
+            ds.getExtraDataSeries("bid")
+
+        ds.getNewValueEvent().subscribe(onNewBar)
+        firstDt = datetime.datetime(2000, 1, 1)
+        for i in range(3):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i, i, i, i, i, bar.Frequency.SECOND, {"bid": i}))
+        self.assertEqual(ds.getCloseDataSeries()[:], [0, 1, 2])
+        self.assertEqual(ds.getExtraDataSeries("bid")[:], [0, 1, 2])
+        self.assertEqual(closes, [0, 1, 2])
+
 
 class TestDateAlignedDataSeries(common.TestCase):
     def testNotAligned(self):
@@ -404,6 +790,114 @@ class TestDateAlignedDataSeries(common.TestCase):
         self.assertEqual(ads1[:], [2, 3])
         self.assertEqual(ads2[:], [2, 3])
 
+    def testDuplicatedDateTimes(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        ads1, ads2 = aligned.datetime_aligned(ds1, ds2)
+
+        # Values without datetimes can't be checked for order.
+        ds1.append(1)
+        ds1.append(2)
+        ds2.append(3)
+        ds2.append(4)
+        self.assertEqual(ads1[:], [2])
+        self.assertEqual(ads2[:], [3])
+
+    def testAlignedValues(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries(dtype=float, indexDateTimes=True)
+        now = datetime.datetime(2000, 1, 1)
+        for i in range(10):
+            if i % 2 == 0:
+                ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+            if i % 3 == 0:
+                ds2.appendWithDateTime(now + datetime.timedelta(seconds=i), i * 10)
+
+        dateTimes, values1, values2 = aligned.aligned_values(ds1, ds2)
+        self.assertEqual(dateTimes, [now, now + datetime.timedelta(seconds=6)])
+        self.assertEqual(values1.tolist(), [0, 6])
+        self.assertEqual(values2.tolist(), [0, 60])
+
+        dateTimes, values1, values2 = aligned.aligned_values(ds1, dataseries.SequenceDataSeries())
+        self.assertEqual(dateTimes, [])
+        self.assertEqual(len(values1), 0)
+        self.assertEqual(len(values2), 0)
+
+
+class TestRetention(common.TestCase):
+    def testFit(self):
+        barDS = bards.BarDataSeries()
+        sma = ma.SMA(barDS.getCloseDataSeries(), 20)
+        bigSMA = ma.SMA(sma, 2000)
+        volumeDS = barDS.getVolumeDataSeries()
+        retention.require(volumeDS, 5)
+        retention.require(barDS, 3)
+        retention.require(bigSMA, 2)
+        source = dataseries.SequenceDataSeries()
+
+        self.assertEqual(retention.get_required_len(barDS), 5)
+        self.assertEqual(retention.get_required_len(sma), 1)
+        self.assertEqual(retention.get_required_len(source), 1)
+        retention.fit([barDS, source])
+        self.assertEqual(barDS.getMaxLen(), 5)
+        self.assertEqual(volumeDS.getMaxLen(), 5)
+        self.assertEqual(bigSMA.getMaxLen(), 2)
+        # Dataseries that were not declared keep their maximum length.
+        self.assertEqual(sma.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
+        self.assertEqual(source.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
+
+    def testFitKeepsUndeclared(self):
+        barDS = bards.BarDataSeries()
+        sma = ma.SMA(barDS.getCloseDataSeries(), 2, maxLen=10)
+        retention.require(barDS.getVolumeDataSeries(), 5)
+        for i in range(10):
+            barDS.append(bar.BasicBar(datetime.datetime(2000, 1, 1 + i), i, i, i, i, i, None, bar.Frequency.DAY))
+        retention.fit([barDS])
+        self.assertEqual(barDS.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
+        self.assertEqual(sma.getMaxLen(), 10)
+        self.assertEqual(sma[-2:], [7.5, 8.5])
+
+    def testFitKeepsIndicators(self):
+        barDS = bards.BarDataSeries()
+        lineBreak = linebreak.LineBreak(barDS, 3)
+        retention.require(barDS, 5)
+        for i in range(20):
+            barDS.append(bar.BasicBar(datetime.datetime(2000, 1, 1 + i), i, i, i, i, i, None, bar.Frequency.DAY))
+        retention.fit([barDS])
+        # Indicators don't declare what they read themselves, so reading older values is still possible.
+        self.assertEqual(lineBreak.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
+        self.assertEqual(lineBreak[-10].getHigh(), 10)
+
+    def testFitWithoutIndicators(self):
+        barDS = bards.BarDataSeries(maxLen=2)
+        retention.require(barDS.getVolumeDataSeries(), 5)
+        self.assertEqual(barDS.getMaxLen(), 5)
+        for i in range(10):
+            barDS.append(bar.BasicBar(datetime.datetime(2000, 1, 1 + i), i, i, i, i, i, None, bar.Frequency.DAY))
+        retention.fit([barDS])
+        self.assertEqual(barDS.getMaxLen(), 5)
+        self.assertEqual(barDS.getVolumeDataSeries()[:], [5, 6, 7, 8, 9])
+
+    def testRequire(self):
+        ds = dataseries.SequenceDataSeries(maxLen=10)
+        retention.require(ds, 5)
+        self.assertEqual(ds.getMaxLen(), 10)
+        retention.require(ds, 20)
+        self.assertEqual(ds.getMaxLen(), 20)
+        retention.require(ds, 5)
+        self.assertEqual(retention.get_required_len(ds), 20)
+
+    def testMemoryReport(self):
+        barDS = bards.BarDataSeries(maxLen=10)
+        ma.SMA(barDS.getCloseDataSeries(), 5, maxLen=10)
+        typedDS = dataseries.SequenceDataSeries(maxLen=10, dtype=float, indexDateTimes=True)
+        report = retention.memory_report([barDS, typedDS])
+        # Only the close dataseries was built.
+        self.assertEqual(len(report), 4)
+        self.assertEqual([maxLen for _, maxLen, _ in report], [10] * len(report))
+        self.assertEqual(dict((ds, memoryUsage) for ds, _, memoryUsage in report)[typedDS], 10 * 2 * (8 + 8))
+        self.assertEqual(report[-1][2], 0)
+
 
 class TestUpdatedDefaultMaxLen(common.TestCase):
     def setUp(self):
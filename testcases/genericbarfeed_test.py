@@ -0,0 +1,235 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+import numpy as np
+import pytz
+
+import common
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.utils import csvutils
+from pyalgotrade.utils import dt
+
+
+class IncludeAllFilter(csvfeed.BarFilter):
+    def includeBar(self, bar_):
+        return True
+
+
+class RowByRowDateRangeFilter(csvfeed.DateRangeFilter):
+    def includeBar(self, bar_):
+        return super(RowByRowDateRangeFilter, self).includeBar(bar_)
+
+
+def load_bars(path, timezone=None, rowByRow=False, barFilter=None):
+    feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE, timezone)
+    if rowByRow:
+        # Bars are parsed one row at a time when the filter doesn't support columns.
+        feed.setBarFilter(IncludeAllFilter() if barFilter is None else barFilter)
+    elif barFilter is not None:
+        feed.setBarFilter(barFilter)
+    feed.addBarsFromCSV("spy", path)
+    ret = []
+    for dateTime, bars in feed:
+        ret.append(bars["spy"])
+    return feed, ret
+
+
+def write_file(path, lines):
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+
+class BulkLoadTestCase(common.TestCase):
+    def __assertSameBars(self, bars1, bars2):
+        self.assertEqual(len(bars1), len(bars2))
+        for bar1, bar2 in zip(bars1, bars2):
+            self.assertEqual(bar1.getDateTime(), bar2.getDateTime())
+            self.assertEqual(str(bar1.getDateTime()), str(bar2.getDateTime()))
+            self.assertEqual(bar1.getOpen(), bar2.getOpen())
+            self.assertEqual(bar1.getHigh(), bar2.getHigh())
+            self.assertEqual(bar1.getLow(), bar2.getLow())
+            self.assertEqual(bar1.getClose(), bar2.getClose())
+            self.assertEqual(bar1.getVolume(), bar2.getVolume())
+            self.assertEqual(bar1.getAdjClose(), bar2.getAdjClose())
+            self.assertEqual(bar1.getFrequency(), bar2.getFrequency())
+            self.assertEqual(bar1.getExtraColumns(), bar2.getExtraColumns())
+
+    def testSameBars(self):
+        path = common.get_data_file_path("30min-bitstampUSD-2.csv")
+        for timezone in [None, pytz.timezone("US/Eastern")]:
+            feed, bars = load_bars(path, timezone)
+            rowByRowFeed, rowByRowBars = load_bars(path, timezone, True)
+            self.__assertSameBars(bars, rowByRowBars)
+            self.assertEqual(feed.barsHaveAdjClose(), rowByRowFeed.barsHaveAdjClose())
+
+    def testDateRangeFilter(self):
+        path = common.get_data_file_path("30min-bitstampUSD-2.csv")
+        fromDate = datetime.datetime(2014, 6, 25, 10)
+        toDate = datetime.datetime(2014, 6, 26, 10, 30)
+        for timezone in [None, pytz.utc]:
+            if timezone is not None:
+                fromDate = dt.localize(fromDate, timezone)
+                toDate = dt.localize(toDate, timezone)
+            barFilter = csvfeed.DateRangeFilter(fromDate, toDate)
+            self.assertTrue(barFilter.supportsColumns())
+            feed, bars = load_bars(path, timezone, barFilter=barFilter)
+            rowByRowFeed, rowByRowBars = load_bars(path, timezone, True, RowByRowDateRangeFilter(fromDate, toDate))
+            self.__assertSameBars(bars, rowByRowBars)
+            self.assertEqual(bars[0].getDateTime(), fromDate)
+            self.assertEqual(bars[-1].getDateTime(), toDate)
+
+    def testDateRangeFilterTimezoneMismatch(self):
+        path = common.get_data_file_path("30min-bitstampUSD-2.csv")
+        barFilter = csvfeed.DateRangeFilter(dt.localize(datetime.datetime(2014, 6, 25), pytz.utc))
+        with self.assertRaises(TypeError):
+            load_bars(path, barFilter=barFilter)
+
+    def testUSEquitiesRTHDoesNotSupportColumns(self):
+        self.assertFalse(csvfeed.USEquitiesRTH().supportsColumns())
+
+    def testBarsAreColumns(self):
+        feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+        rowParser = csvfeed.GenericRowParser(
+            {
+                "datetime": "Date Time", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+                "volume": "Volume", "adj_close": "Adj Close"
+            },
+            "%Y-%m-%d %H:%M:%S", None, bar.Frequency.MINUTE, None
+        )
+        barColumns = rowParser.parseColumns(common.get_data_file_path("30min-bitstampUSD-2.csv"))
+        self.assertTrue(isinstance(barColumns, columnar.BarColumns))
+        self.assertEqual(barColumns[0].getDateTime(), datetime.datetime(2014, 6, 23, 22))
+        self.assertEqual(barColumns[0].getOpen(), 585.46)
+        self.assertEqual(barColumns[0].getAdjClose(), None)
+        feed.addBarsFromSequence("spy", barColumns)
+        self.assertEqual(feed.getNextBars()["spy"].getOpen(), 585.46)
+
+    def testExtraColumnsAndAdjClose(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_file(path, [
+                "Date Time,Open,High,Low,Close,Volume,Adj Close,Extra",
+                "2000-01-03 00:00:00,1,2,1,2,10,,abc",
+                "",
+                "2000-01-01 00:00:00,1,2,1,2,10,1.5,1.5",
+                "2000-01-02 00:00:00,1,2,1,2,10,,",
+            ])
+            feed, bars = load_bars(path)
+            rowByRowFeed, rowByRowBars = load_bars(path, rowByRow=True)
+            self.__assertSameBars(bars, rowByRowBars)
+            self.assertTrue(feed.barsHaveAdjClose())
+            self.assertEqual([bar_.getExtraColumns()["Extra"] for bar_ in bars], [1.5, "", "abc"])
+
+    def testInvalidBars(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_file(path, [
+                "Date Time,Open,High,Low,Close,Volume,Adj Close",
+                "2000-01-01 00:00:00,1,2,1,2,10,",
+                "2000-01-02 00:00:00,1,2,3,2,10,",
+            ])
+            with self.assertRaisesRegexp(Exception, "high < low on 2000-01-02 00:00:00"):
+                load_bars(path)
+
+    def testInvalidRows(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_file(path, [
+                "Date Time,Open,High,Low,Close,Volume,Adj Close",
+                "2000-01-01 00:00:00,1,2,1,2,10",
+                "2000-01-02 00:00:00,1,2,1,2,10,,",
+            ])
+            with self.assertRaisesRegexp(ValueError, "Row 2 has 6 values but 7 were expected"):
+                load_bars(path)
+
+    def testEmptyFiles(self):
+        rowParser = csvfeed.GenericBarFeed(bar.Frequency.MINUTE).createRowParser()
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_file(path, ["Date Time,Open,High,Low,Close,Volume,Adj Close", ""])
+            self.assertEqual(len(rowParser.parseColumns(path)), 0)
+            feed, bars = load_bars(path)
+            self.assertEqual(bars, [])
+
+            # Files without column names are left to the row by row parser.
+            for lines in [[], ["", ""]]:
+                write_file(path, lines)
+                self.assertEqual(csvutils.read_columns(path), None)
+                self.assertEqual(rowParser.parseColumns(path), None)
+
+    def testWindowsNewLines(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "wb") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close,Extra\r\n")
+                f.write("2000-01-01 00:00:00,1,2,1,2,10,1.5,abc\r\n\r\n")
+                f.write("2000-01-02 00:00:00,1,2,1,2,10,,")
+            feed, bars = load_bars(path)
+            rowByRowFeed, rowByRowBars = load_bars(path, rowByRow=True)
+            self.__assertSameBars(bars, rowByRowBars)
+            self.assertEqual([bar_.getAdjClose() for bar_ in bars], [1.5, None])
+            self.assertEqual([bar_.getExtraColumns()["Extra"] for bar_ in bars], ["abc", ""])
+
+    def testDateTimeFormatNotFixed(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_file(path, [
+                "Date Time,Open,High,Low,Close,Volume,Adj Close",
+                "Jan 1 2000 3:00,1,2,1,2,10,",
+                "Jan 10 2000 14:00,1,2,1,2,10,",
+            ])
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            feed.setDateTimeFormat("%b %d %Y %H:%M")
+            feed.addBarsFromCSV("spy", path)
+            dateTimes = [dateTime for dateTime, bars in feed]
+            self.assertEqual(dateTimes, [datetime.datetime(2000, 1, 1, 3), datetime.datetime(2000, 1, 10, 14)])
+
+
+class BarColumnsTestCase(common.TestCase):
+    def __buildBarColumns(self, days, extra=None):
+        dateTimes = [
+            dt.datetime_to_epoch_ns(datetime.datetime(2000, 1, 1) + datetime.timedelta(days=day)) for day in days
+        ]
+        values = [[day, day, day + 1, day, 10, float("nan")] for day in days]
+        return columnar.BarColumns(dateTimes, values, bar.Frequency.DAY, extra=extra)
+
+    def testSorted(self):
+        barColumns = self.__buildBarColumns([2, 0, 1, 0]).sorted()
+        self.assertEqual(
+            barColumns.getDateTimes(),
+            [datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 2),
+             datetime.datetime(2000, 1, 3)]
+        )
+        self.assertEqual(barColumns[-1].getHigh(), 3)
+        self.assertEqual(barColumns[-1].getAdjClose(), None)
+
+    def testConcatenate(self):
+        barColumns = columnar.concatenate([self.__buildBarColumns([0, 1]), self.__buildBarColumns([2])])
+        self.assertEqual(len(barColumns), 3)
+        self.assertEqual([bar_.getOpen() for bar_ in barColumns], [0, 1, 2])
+        # Bars with different extra columns can't be concatenated.
+        extra = {"Extra": np.array([1])}
+        self.assertEqual(columnar.concatenate([self.__buildBarColumns([0]), self.__buildBarColumns([1], extra)]), None)
@@ -0,0 +1,131 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import os
+import pickle
+
+import pytz
+
+import common
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import columnar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.barfeed import sqlitefeed
+from pyalgotrade.barfeed import yahoofeed
+
+
+def get_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        for instrument in sorted(bars.getInstruments()):
+            bar_ = bars[instrument]
+            ret.append((
+                instrument, bar_.getDateTime(), bar_.getOpen(), bar_.getHigh(), bar_.getLow(), bar_.getClose(),
+                bar_.getVolume(), bar_.getAdjClose(), bar_.getExtraColumns()
+            ))
+    return ret
+
+
+class ParallelLoadTestCase(common.TestCase):
+    def __testFeed(self, buildFeed, paths, timezone=None):
+        expected = buildFeed()
+        for instrument, path in (paths.items() if isinstance(paths, dict) else paths):
+            expected.addBarsFromCSV(instrument, path, timezone)
+        expected = get_bars(expected)
+        self.assertTrue(len(expected) > 0)
+
+        for workerCount in [1, 2]:
+            feed = buildFeed()
+            feed.addBarsFromCSVs(paths, timezone, workerCount)
+            self.assertEqual(get_bars(feed), expected)
+        return feed
+
+    def testYahoo(self):
+        paths = [
+            ("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv")),
+            ("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv")),
+            ("spy", common.get_data_file_path("spy-2010-yahoofinance.csv")),
+        ]
+        self.__testFeed(yahoofeed.Feed, paths)
+        self.__testFeed(yahoofeed.Feed, paths, pytz.timezone("US/Eastern"))
+
+    def testNinjaTrader(self):
+        paths = {"spy": common.get_data_file_path("nt-spy-minute-2011-03.csv")}
+        self.__testFeed(lambda: ninjatraderfeed.Feed(bar.Frequency.MINUTE), paths)
+
+    def testGeneric(self):
+        paths = {
+            "btc1": common.get_data_file_path("30min-bitstampUSD-2.csv"),
+            "btc2": common.get_data_file_path("30min-bitstampUSD-2.csv"),
+        }
+        feed = self.__testFeed(lambda: csvfeed.GenericBarFeed(bar.Frequency.MINUTE), paths)
+        self.assertFalse(feed.barsHaveAdjClose())
+
+        # Bars filtered one row at a time, with extra columns, are sent back as bar instances.
+        def buildFeed():
+            ret = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            ret.setBarFilter(csvfeed.DateRangeFilter())
+            return ret
+        self.__testFeed(buildFeed, paths)
+
+    def testGenericAdjClose(self):
+        paths = {"orcl": common.get_data_file_path("orcl-2000-yahoofinance.csv")}
+
+        def buildFeed():
+            ret = csvfeed.GenericBarFeed(bar.Frequency.DAY)
+            ret.setDateTimeFormat("%Y-%m-%d")
+            ret.setColumnName("datetime", "Date")
+            return ret
+        feed = self.__testFeed(buildFeed, paths)
+        self.assertTrue(feed.barsHaveAdjClose())
+
+    def testSQLite(self):
+        with common.TmpDir() as tmpPath:
+            yahooFeed = yahoofeed.Feed()
+            yahooFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            yahooFeed.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+            dbFilePath = os.path.join(tmpPath, "bars.sqlite")
+            sqliteFeed = sqlitefeed.Feed(dbFilePath, bar.Frequency.DAY)
+            sqliteFeed.getDatabase().addBarsFromFeed(yahooFeed)
+            for instrument in ["orcl", "spy"]:
+                sqliteFeed.loadBars(instrument)
+            expected = get_bars(sqliteFeed)
+            self.assertEqual(len(expected), 504)
+
+            for workerCount in [1, 2]:
+                feed = sqlitefeed.Feed(dbFilePath, bar.Frequency.DAY)
+                feed.loadBarsForInstruments(["orcl", "spy"], workerCount=workerCount)
+                self.assertEqual(get_bars(feed), expected)
+                feed.getDatabase().disconnect()
+            sqliteFeed.getDatabase().disconnect()
+
+    def testPickleBarColumns(self):
+        feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+        barColumns = csvfeed.load_bars(
+            common.get_data_file_path("30min-bitstampUSD-2.csv"), feed.createRowParser()
+        )
+        self.assertTrue(isinstance(barColumns, columnar.BarColumns))
+        barColumns[0]
+        unpickled = pickle.loads(pickle.dumps(barColumns, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(len(unpickled), len(barColumns))
+        self.assertEqual(unpickled[-1].getDateTime(), barColumns[-1].getDateTime())
+        self.assertEqual(unpickled[-1].getExtraColumns(), barColumns[-1].getExtraColumns())
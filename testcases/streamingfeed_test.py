@@ -0,0 +1,154 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+import pytz
+
+import common
+import barfeed_test
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.barfeed import sqlitefeed
+from pyalgotrade.barfeed import streamingfeed
+from pyalgotrade.barfeed import yahoofeed
+
+
+def get_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        ret.append((dateTime, dict((instrument, bars[instrument].getClose()) for instrument in bars.getInstruments())))
+    return ret
+
+
+def build_generic_parser(timezone=None):
+    return csvfeed.GenericRowParser(
+        {
+            "datetime": "Date Time", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+            "volume": "Volume", "adj_close": "Adj Close"
+        },
+        "%Y-%m-%d %H:%M:%S", None, bar.Frequency.MINUTE, timezone
+    )
+
+
+class StreamingFeedTestCase(common.TestCase):
+    def testBaseBarFeed(self):
+        feed = streamingfeed.Feed(bar.Frequency.MINUTE)
+        feed.addBarSource(
+            "spy",
+            streamingfeed.CSVSource(
+                common.get_data_file_path("nt-spy-minute-2011-03.csv"),
+                ninjatraderfeed.RowParser(bar.Frequency.MINUTE, None)
+            )
+        )
+        barfeed_test.check_base_barfeed(self, feed, False)
+
+    def testMergeMatchesMemoryFeed(self):
+        path = common.get_data_file_path("nt-spy-minute-2011-03.csv")
+        # Bitstamp bars are localized so they can be compared with NinjaTrader ones, that are in UTC.
+        bitstampSource = streamingfeed.CSVSource(
+            common.get_data_file_path("30min-bitstampUSD-2.csv"), build_generic_parser(pytz.timezone("US/Eastern"))
+        )
+        memFeed = ninjatraderfeed.Feed(bar.Frequency.MINUTE)
+        memFeed.addBarsFromCSV("spy", path)
+        memFeed.addBarsFromCSV("spy2", path)
+        memFeed.addBarsFromSequence("bitstamp", list(bitstampSource))
+
+        feed = streamingfeed.Feed(bar.Frequency.MINUTE)
+        feed.addBarSource("spy", streamingfeed.CSVSource(path, ninjatraderfeed.RowParser(bar.Frequency.MINUTE, None)))
+        feed.addBarSource("spy2", streamingfeed.CSVSource(path, ninjatraderfeed.RowParser(bar.Frequency.MINUTE, None)))
+        feed.addBarSource("bitstamp", bitstampSource)
+        streamingBars = get_bars(feed)
+        self.assertEqual(len(streamingBars), 19545)
+        self.assertEqual(streamingBars, get_bars(memFeed))
+
+    def testDatabaseSource(self):
+        with common.TmpDir() as tmpPath:
+            yahooFeed = yahoofeed.Feed()
+            yahooFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            yahooFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv"))
+            sqliteFeed = sqlitefeed.Feed(os.path.join(tmpPath, "bars.sqlite"), bar.Frequency.DAY)
+            sqliteFeed.getDatabase().addBarsFromFeed(yahooFeed)
+            sqliteFeed.loadBars("orcl")
+
+            feed = streamingfeed.Feed(bar.Frequency.DAY)
+            feed.addBarSource(
+                "orcl", streamingfeed.DatabaseSource(
+                    sqliteFeed.getDatabase(), "orcl", bar.Frequency.DAY, toDateTime=datetime.datetime(2000, 12, 31)
+                )
+            )
+            self.assertTrue(feed.barsHaveAdjClose())
+            streamingBars = get_bars(feed)
+            self.assertEqual(len(streamingBars), 252)
+            self.assertEqual(streamingBars, get_bars(sqliteFeed)[:252])
+            sqliteFeed.getDatabase().disconnect()
+
+    def testReset(self):
+        feed = streamingfeed.Feed(bar.Frequency.MINUTE)
+        feed.addBarSource(
+            "bitstamp",
+            streamingfeed.CSVSource(common.get_data_file_path("30min-bitstampUSD-2.csv"), build_generic_parser())
+        )
+        bars = get_bars(feed)
+        self.assertTrue(feed.eof())
+        feed.reset()
+        self.assertFalse(feed.eof())
+        self.assertEqual(get_bars(feed), bars)
+        with self.assertRaisesRegexp(Exception, "Can't add more bar sources once you started consuming bars"):
+            feed.addBarSource("spy", [])
+
+    def testBarColumnsSource(self):
+        path = common.get_data_file_path("30min-bitstampUSD-2.csv")
+        feed = streamingfeed.Feed(bar.Frequency.MINUTE)
+        feed.addBarSource("bitstamp", build_generic_parser().parseColumns(path))
+        memFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+        memFeed.addBarsFromCSV("bitstamp", path)
+        self.assertEqual(get_bars(feed), get_bars(memFeed))
+
+    def testUnsortedBars(self):
+        feed = streamingfeed.Feed(bar.Frequency.DAY)
+        feed.addBarSource(
+            "orcl",
+            streamingfeed.CSVSource(
+                common.get_data_file_path("orcl-2000-yahoofinance.csv"), yahoofeed.RowParser(None, bar.Frequency.DAY)
+            )
+        )
+        with self.assertRaisesRegexp(Exception, "Bars for orcl are not sorted by datetime.*"):
+            get_bars(feed)
+
+    def testDuplicateBars(self):
+        bar1 = bar.BasicBar(datetime.datetime(2000, 1, 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY)
+        bar2 = bar.BasicBar(datetime.datetime(2000, 1, 2), 1, 1, 1, 1, 1, None, bar.Frequency.DAY)
+        for sources in [[[bar1, bar1]], [[bar1, bar2], [bar2]]]:
+            feed = streamingfeed.Feed(bar.Frequency.DAY)
+            for source in sources:
+                feed.addBarSource("orcl", source)
+            with self.assertRaisesRegexp(Exception, "Duplicate bars found for .*"):
+                get_bars(feed)
+
+    def testEmpty(self):
+        feed = streamingfeed.Feed(bar.Frequency.DAY)
+        feed.addBarSource("orcl", [])
+        self.assertTrue(feed.eof())
+        self.assertEqual(feed.getNextBars(), None)
+        self.assertFalse(feed.barsHaveAdjClose())
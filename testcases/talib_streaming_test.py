@@ -0,0 +1,82 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+import common
+
+from pyalgotrade import dataseries
+from pyalgotrade.talibext import streaming
+
+
+class InputBufferTestCase(common.TestCase):
+    def testLastValues(self):
+        ds = dataseries.SequenceDataSeries()
+        inputBuffer = streaming.get_input_buffer(ds, 3)
+        for value in [1, 2]:
+            ds.append(value)
+        self.assertEqual(inputBuffer.getValues(), None)
+        for value in [3, 4]:
+            ds.append(value)
+        self.assertEqual(inputBuffer.getValues().tolist(), [2, 3, 4])
+
+    def testNoneValues(self):
+        ds = dataseries.SequenceDataSeries()
+        inputBuffer = streaming.get_input_buffer(ds, 2)
+        for value in [1, None, 3]:
+            ds.append(value)
+        self.assertEqual(inputBuffer.getValues(), None)
+        ds.append(4)
+        self.assertEqual(inputBuffer.getValues().tolist(), [3, 4])
+
+    def testExistingValues(self):
+        ds = dataseries.SequenceDataSeries()
+        for value in [1, 2, 3]:
+            ds.append(value)
+        inputBuffer = streaming.get_input_buffer(ds, 2)
+        self.assertEqual(inputBuffer.getValues().tolist(), [2, 3])
+
+    def testShared(self):
+        ds = dataseries.SequenceDataSeries()
+        inputBuffer = streaming.get_input_buffer(ds, 2)
+        self.assertTrue(streaming.get_input_buffer(ds, 2) is inputBuffer)
+        self.assertFalse(streaming.get_input_buffer(ds, 3) is inputBuffer)
+        self.assertFalse(streaming.get_input_buffer(dataseries.SequenceDataSeries(), 2) is inputBuffer)
+
+
+class StreamingCallTestCase(common.TestCase):
+    def testCall(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        call = streaming.StreamingCall(np.add, [ds1, ds2], 2)
+        ds1.append(1)
+        ds2.append(10)
+        self.assertEqual(call(), None)
+        for value in range(2, 100):
+            ds1.append(value)
+            ds2.append(value * 10)
+            self.assertEqual(call().tolist(), [(value - 1) * 11, value * 11])
+
+    def testArgs(self):
+        ds = dataseries.SequenceDataSeries()
+        call = streaming.StreamingCall(np.round, [ds], 2, 1)
+        for value in [1.23, 4.56]:
+            ds.append(value)
+        self.assertEqual(call().tolist(), [1.2, 4.6])
@@ -209,6 +209,19 @@ class TestCase(common.TestCase):
             seconds += 1
         return ret
 
+    def testReadOnlyViews(self):
+        barDs = self.__loadBarDS()
+        typedDs = dataseries.SequenceDataSeries(dtype=float)
+        for value in CLOSE_VALUES:
+            typedDs.append(value)
+        for ds in [typedDs, barDs.getCloseDataSeries()]:
+            self.assertFalse(ds.tail(252).flags.writeable)
+            values = indicator.value_ds_to_numpy(ds, 252)
+            self.assertTrue(values.flags.writeable)
+            self.assertEqual(values.tolist(), CLOSE_VALUES)
+            self.assertTrue(compare(indicator.SMA(ds, 252, 2)[1], 93.16))
+            self.assertTrue(compare(indicator.SMA(ds, 252, 2)[-1], 108.31))
+
     def testAD(self):
         barDs = self.__loadBarDS()
         self.assertTrue(compare(indicator.AD(barDs, 252)[0], -1631000.00))
@@ -21,6 +21,7 @@
 import common
 
 from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import ma
 from pyalgotrade import dataseries
 
 
@@ -73,3 +74,40 @@ class TestCase(common.TestCase):
         self.assertEqual(len(bBands.getLowerBand()), 3)
         self.assertEqual(len(bBands.getLowerBand()[:]), 3)
         self.assertEqual(len(bBands.getLowerBand().getDateTimes()), 3)
+
+    def testNoneValues(self):
+        seqDS = dataseries.SequenceDataSeries()
+        bBands = bollinger.BollingerBands(seqDS, 2, 2)
+        for value in [1, 3, None, 5]:
+            seqDS.append(value)
+
+        self.assertEqual(bBands.getMiddleBand()[:], [None, 2, 2, 4])
+        self.assertEqual(bBands.getUpperBand()[:], [None, 4, None, 6])
+        self.assertEqual(bBands.getLowerBand()[:], [None, 0, None, 2])
+
+    def testMiddleBandIsSMA(self):
+        seqDS = dataseries.SequenceDataSeries()
+        bBands = bollinger.BollingerBands(seqDS, 2, 2)
+        middleBand = bBands.getMiddleBand()
+        self.assertTrue(isinstance(middleBand, ma.SMA))
+        middleBand.setLazy(True)
+        for value in [1, 3, 5]:
+            seqDS.append(value)
+        self.assertEqual(bBands.getUpperBand()[:], [None, 4, 6])
+        self.assertEqual(middleBand.getEventWindow().getValue(), 4)
+        self.assertEqual(middleBand[:], [None, 2, 4])
+
+    def testMiddleBandInitializedAsSMA(self):
+        initialized = []
+
+        class SMA(ma.SMA):
+            def __init__(self, *args, **kwargs):
+                super(SMA, self).__init__(*args, **kwargs)
+                initialized.append(self)
+
+        class MiddleBand(bollinger.MiddleBand, SMA):
+            pass
+
+        middleBand = MiddleBand(dataseries.SequenceDataSeries(), 2)
+        self.assertEqual(initialized, [middleBand])
+        self.assertTrue(isinstance(middleBand.getEventWindow(), bollinger.MeanEventWindow))
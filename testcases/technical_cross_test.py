@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+
 import common
 
 from pyalgotrade.technical import cross
@@ -191,3 +193,46 @@ class TestCase(common.TestCase):
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1, 1], -3), 1)
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1], -3), 0)
         self.assertEqual(cross.cross_above([0, 0, 0, 0, 2], [1, 1], -3), 1)
+
+    def testLongRangesWithNones(self):
+        values1 = [None, 1, 3, 1, None, 3, 1, 1, 3, None] * 10
+        values2 = [2] * 100
+        self.assertEqual(cross.cross_above(values1, values2, 0), 20)
+        self.assertEqual(cross.cross_below(values1, values2, 0), 30)
+        self.assertEqual(cross.cross_above(values1, values2, 50), 10)
+        self.assertEqual(cross.cross_below(values1, values2, 50), 15)
+
+
+class CrossDetectorTestCase(common.TestCase):
+    def testCrosses(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crosses = cross.CrossDetector(ds1, ds2)
+        for value1, value2 in [(1, 2), (2, 2), (3, 2), (3, 2), (None, 2), (1, 2), (2, 2), (1, 2), (3, None), (3, 2)]:
+            ds1.append(value1)
+            ds2.append(value2)
+        self.assertEqual(crosses[:], [0, 0, 1, 0, 0, -1, 0, 0, 0, 1])
+
+    def testMatchesCrossAboveWithSMA(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        sma1 = ma.SMA(ds1, 15)
+        sma2 = ma.SMA(ds2, 25)
+        crosses = cross.CrossDetector(sma1, sma2)
+        for i in range(100):
+            ds1.append(i)
+            ds2.append(50)
+            self.assertEqual(crosses[-1] == 1, cross.cross_above(sma1, sma2) == 1)
+            self.assertEqual(crosses[-1] == -1, cross.cross_below(sma1, sma2) == 1)
+
+    def testDateTimesNotInBoth(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crosses = cross.CrossDetector(ds1, ds2)
+        ds1.appendWithDateTime(datetime.datetime(2000, 1, 1), 1)
+        ds2.appendWithDateTime(datetime.datetime(2000, 1, 1), 2)
+        ds2.appendWithDateTime(datetime.datetime(2000, 1, 2), 0)
+        ds1.appendWithDateTime(datetime.datetime(2000, 1, 3), 3)
+        ds2.appendWithDateTime(datetime.datetime(2000, 1, 3), 2)
+        self.assertEqual(crosses[:], [0, 1])
+        self.assertEqual(crosses.getDateTimes(), [datetime.datetime(2000, 1, 1), datetime.datetime(2000, 1, 3)])
@@ -70,3 +70,12 @@ class TestCase(common.TestCase):
         hds = build_hurst(values, num_values - 10, 2, 20)
         self.assertEquals(round(hds[-1], 1), 0)
         self.assertEquals(round(hds[-2], 1), 0)
+
+    def testSlidingWindowMatchesHurstExp(self):
+        period = 100
+        values = np.cumsum(np.random.RandomState(0).randn(1000)) + 1000
+        hds = build_hurst(values, period, 2, 20)
+        logValues = np.log10(values)
+        for i in range(period - 1, len(values)):
+            expected = hurst.hurst_exp(logValues[i - period + 1:i + 1], 2, 20)
+            self.assertTrue(abs(hds[i] - expected) < 1e-9)
@@ -20,10 +20,13 @@
 
 import datetime
 
+import numpy
+
 import common
 
 from pyalgotrade.technical import linreg
 from pyalgotrade import dataseries
+from pyalgotrade.utils import dt
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +82,24 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testMatchesLsreg(self):
+        values = numpy.cumsum(numpy.random.RandomState(1).randn(500)) + 1000
+        seqDS = dataseries.SequenceDataSeries()
+        windowSize = 20
+        lsReg = linreg.LeastSquaresRegression(seqDS, windowSize, maxLen=len(values))
+        slope = linreg.Slope(seqDS, windowSize, maxLen=len(values))
+
+        dateTimes = [datetime.datetime(2012, 1, 1) + datetime.timedelta(minutes=i * 7) for i in range(len(values))]
+        timestamps = [dt.datetime_to_timestamp(dateTime) for dateTime in dateTimes]
+        for dateTime, value in zip(dateTimes, values):
+            seqDS.appendWithDateTime(dateTime, value)
+
+        for i in range(windowSize - 1, len(values)):
+            window = values[i - windowSize + 1:i + 1]
+            a, b = linreg.lsreg(timestamps[i - windowSize + 1:i + 1], window)
+            self.assertAlmostEqual(lsReg[i], a * timestamps[i] + b, places=6)
+            self.assertAlmostEqual(slope[i], linreg.lsreg(range(windowSize), window)[0], places=9)
+
+        futureDateTime = dateTimes[-1] + datetime.timedelta(days=1)
+        self.assertAlmostEqual(lsReg.getValueAt(futureDateTime), a * dt.datetime_to_timestamp(futureDateTime) + b, places=6)
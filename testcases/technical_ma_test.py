@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 import common
 
 from pyalgotrade.technical import ma
@@ -196,6 +198,15 @@ class WMATestCase(common.TestCase):
         self.assertEqual(len(wma[:]), 2)
         self.assertEqual(len(wma.getDateTimes()), 2)
 
+    def testMatchesDotProduct(self):
+        values = np.cumsum(np.random.RandomState(0).randn(1000)) + 100
+        for weights in [range(1, 21), range(10, 0, -1), [1, 3, 2, 7]]:
+            wma = self.__buildWMA(weights, values, wmaMaxLen=len(values))
+            for i in range(len(weights) - 1, len(values)):
+                window = values[i - len(weights) + 1:i + 1]
+                expected = np.dot(window, weights) / float(sum(weights))
+                self.assertTrue(abs(wma[i] - expected) < 1e-9)
+
 
 class EMATestCase(common.TestCase):
     def testStockChartsEMA(self):
@@ -59,6 +59,21 @@ class TestCase(common.TestCase):
         self.assertEqual(stdDev[0], numpy.array([2, 3]).std())
         self.assertEqual(stdDev[1], numpy.array([3, 5]).std())
 
+    def testStdDevMatchesNumPy(self):
+        # Values with a large offset to check that rounding errors don't accumulate.
+        values = numpy.random.RandomState(1).randn(2000) + 1e6
+        seqDS = dataseries.SequenceDataSeries(maxLen=len(values))
+        period = 15
+        stdDev = stats.StdDev(seqDS, period, ddof=1, maxLen=len(values))
+        zscore = stats.ZScore(seqDS, period, maxLen=len(values))
+        for value in values:
+            seqDS.append(value)
+
+        for i in range(period - 1, len(values)):
+            window = values[i - period + 1:i + 1]
+            self.assertAlmostEqual(stdDev[i], window.std(ddof=1), places=6)
+            self.assertAlmostEqual(zscore[i], (window[-1] - window.mean()) / window.std(), places=6)
+
     def testZScore(self):
         values = [1.10, 2.20, 4.00, 5.10, 6.00, 7.10, 8.20, 9.00, 10.10, 3.00, 4.10, 5.20, 7.00, 8.10, 9.20, 16.00, 17.10, 18.20, 19.30, 20.40]
         expected = [None, None, None, None, 1.283041407, 1.317884611, 1.440611043, 1.355748299, 1.4123457, -1.831763202, -0.990484842, -0.388358578, 0.449889908, 1.408195169, 1.332948099, 1.867732104, 1.334258333, 1.063608066, 0.939656572, 1.414213562]
@@ -70,3 +85,20 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def testFlatWindow(self):
+        values = numpy.random.RandomState(2).uniform(0.1, 1000, 50).tolist()
+        seqDS = dataseries.SequenceDataSeries()
+        period = 10
+        stdDev = stats.StdDev(seqDS, period)
+        zscore = stats.ZScore(seqDS, period)
+        for value in values + [0.1] * period + [0] * period:
+            seqDS.append(value)
+            if len(seqDS) == len(values) + period:
+                self.assertEqual(stdDev[-1], 0)
+                self.assertEqual(stdDev.getEventWindow().getMean(), 0.1)
+        self.assertEqual(stdDev[-1], 0)
+        # 0 / 0.
+        with numpy.errstate(invalid="ignore"):
+            seqDS.append(0)
+        self.assertTrue(numpy.isnan(zscore[-1]))
@@ -123,3 +123,8 @@ class TestCase(common.TestCase):
         stochFilter = stoch.StochasticOscillator(barDS, 2, 2)
         self.__fillBarDataSeries(barDS, closePrices, highPrices, lowPrices)
         self.assertEqual(stochFilter[-1], 0)
+
+    def testGetLowHighValues(self):
+        bars = [self.__buildBar(2, 3, 1, 2), self.__buildBar(2, 5, 2, 4), self.__buildBar(4, 4, 0.5, 1)]
+        self.assertEqual(stoch.get_low_high_values(False, bars), (0.5, 5))
+        self.assertEqual(stoch.get_low_high_values(False, bars[:2]), (1, 5))
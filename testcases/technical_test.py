@@ -18,10 +18,16 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 import common
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
 
 
 class TestEventWindow(technical.EventWindow):
@@ -56,3 +62,189 @@ class DataSeriesFilterTest(common.TestCase):
             testFilter[20]
         ds.append(10)
         self.assertEqual(testFilter[20], 10)
+
+
+class PrecomputeTest(common.TestCase):
+    def __buildIndicators(self, barFeed):
+        closeDS = barFeed["orcl"].getCloseDataSeries()
+        sma = ma.SMA(closeDS, 15)
+        return [
+            sma,
+            ma.EMA(closeDS, 10),
+            ma.EMA(sma, 10),
+            rsi.RSI(closeDS, 14),
+            stats.StdDev(closeDS, 20),
+            stats.ZScore(barFeed["orcl"].getVolumeDataSeries(), 20),
+            # WMA doesn't support precomputing values.
+            ma.WMA(closeDS, [1, 2, 3]),
+        ]
+
+    def __run(self, precompute):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        barFeed.setPrecomputeIndicators(precompute)
+        indicators = self.__buildIndicators(barFeed)
+        barFeed.loadAll()
+        return indicators
+
+    def testSameValues(self):
+        streamed = self.__run(False)
+        precomputed = self.__run(True)
+        # SMA, StdDev and ZScore are calculated over each window instead of incrementally, and EMA(SMA) uses those SMA
+        # values. The rest should be the same.
+        tolerance = [1e-9, 0, 1e-9, 0, 1e-9, 1e-9, 0]
+        # Event windows are restored once precomputed values are used up.
+        for streamedDS, precomputedDS, relTol in zip(streamed, precomputed, tolerance):
+            streamedWindow = streamedDS.getEventWindow().getValues()
+            precomputedWindow = precomputedDS.getEventWindow().getValues()
+            self.assertEqual(len(streamedWindow), len(precomputedWindow))
+            self.assertTrue((abs(streamedWindow - precomputedWindow) <= abs(streamedWindow) * relTol).all())
+            self.assertEqual(precomputedDS.getEventWindow().getValue(), precomputedDS[-1])
+        for streamedDS, precomputedDS, relTol in zip(streamed, precomputed, tolerance):
+            self.assertEqual(len(streamedDS), 252)
+            self.assertEqual(len(streamedDS), len(precomputedDS))
+            for streamedValue, precomputedValue in zip(streamedDS, precomputedDS):
+                if streamedValue is None:
+                    self.assertEqual(precomputedValue, None)
+                else:
+                    self.assertLessEqual(abs(streamedValue - precomputedValue), abs(streamedValue) * relTol)
+
+    def testContinueAfterPrecomputed(self):
+        values = np.random.RandomState(0).uniform(1, 100, 300)
+        streamedDS = dataseries.SequenceDataSeries()
+        precomputedDS = dataseries.SequenceDataSeries()
+        indicators = []
+        for ds in [streamedDS, precomputedDS]:
+            indicators.append([
+                ma.SMA(ds, 15), ma.EMA(ds, 10), rsi.RSI(ds, 14), stats.StdDev(ds, 20), stats.ZScore(ds, 20)
+            ])
+        # Only the first values are precomputed, and the rest are calculated one at a time.
+        technical.precompute(precomputedDS, range(100), values[:100])
+        for i, value in enumerate(values.tolist()):
+            streamedDS.appendWithDateTime(i, value)
+            precomputedDS.appendWithDateTime(i, value)
+
+        for streamed, precomputed in zip(*indicators):
+            self.assertEqual(len(precomputed), len(values))
+            self.assertEqual(precomputed.getEventWindow().getValue(), precomputed[-1])
+            for streamedValue, precomputedValue in zip(streamed[100:], precomputed[100:]):
+                self.assertLessEqual(abs(streamedValue - precomputedValue), abs(streamedValue) * 1e-9)
+
+    def testNotPrecomputedWithNones(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        # Only leading None values are supported.
+        values = [None, 1, None, 2, 3]
+        technical.precompute(ds, range(len(values)), np.array(values, dtype=float))
+        for i, value in enumerate(values):
+            ds.appendWithDateTime(i, value)
+        self.assertEqual(sma[:], [None, None, None, 1.5, 2.5])
+
+    def testOutOfSync(self):
+        ds = dataseries.SequenceDataSeries()
+        ma.SMA(ds, 2)
+        technical.precompute(ds, [1, 2, 3], np.array([1, 2, 3], dtype=float))
+        with self.assertRaisesRegexp(Exception, "out of sync"):
+            ds.appendWithDateTime(2, 2)
+
+
+class SharedTest(common.TestCase):
+    def testSameParameters(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = technical.shared(ma.SMA, ds, 10)
+        self.assertTrue(technical.shared(ma.SMA, ds, 10) is sma)
+        self.assertFalse(technical.shared(ma.SMA, ds, 20) is sma)
+        self.assertFalse(technical.shared(ma.EMA, ds, 10) is sma)
+        self.assertFalse(technical.shared(ma.SMA, dataseries.SequenceDataSeries(), 10) is sma)
+        self.assertEqual(len(ds.getNewValueEvent().getHandlers()), 3)
+
+    def testListParameters(self):
+        ds = dataseries.SequenceDataSeries()
+        wma = technical.shared(ma.WMA, ds, [1, 2, 3])
+        self.assertTrue(technical.shared(ma.WMA, ds, [1, 2, 3]) is wma)
+        self.assertFalse(technical.shared(ma.WMA, ds, [3, 2, 1]) is wma)
+
+    def testLargerMaxLen(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = technical.shared(ma.SMA, ds, 10, maxLen=50)
+        self.assertEqual(sma.getMaxLen(), 50)
+        self.assertTrue(technical.shared(ma.SMA, ds, 10, maxLen=20) is sma)
+        self.assertEqual(sma.getMaxLen(), 50)
+        self.assertTrue(technical.shared(ma.SMA, ds, 10, maxLen=100) is sma)
+        self.assertEqual(sma.getMaxLen(), 100)
+
+
+class LazyTest(common.TestCase):
+    def __buildValues(self):
+        values = (np.cumsum(np.random.RandomState(0).randn(500)) + 100).tolist()
+        values[0] = None
+        values[30] = None
+        return values
+
+    def testSameValues(self):
+        for indicatorClass, period in [(ma.EMA, 10), (rsi.RSI, 14), (ma.SMA, 5), (stats.StdDev, 5)]:
+            ds = dataseries.SequenceDataSeries()
+            eager = indicatorClass(ds, period)
+            lazy = indicatorClass(ds, period)
+            lazy.setLazy(True)
+            for i, value in enumerate(self.__buildValues()):
+                ds.appendWithDateTime(i, value)
+                # Read some values while adding them.
+                if i % 7 == 0:
+                    self.assertEqual(lazy[-1], eager[-1])
+            self.assertEqual(lazy[:], eager[:])
+            self.assertEqual(lazy.getDateTimes(), eager.getDateTimes())
+
+    def testBoundedPendingValues(self):
+        for indicatorClass, period in [(ma.EMA, 10), (rsi.RSI, 14), (ma.SMA, 5), (stats.StdDev, 5)]:
+            ds = dataseries.SequenceDataSeries()
+            eager = indicatorClass(ds, period, maxLen=20)
+            lazy = indicatorClass(ds, period, maxLen=20)
+            lazy.setLazy(True)
+            for i, value in enumerate(self.__buildValues()):
+                ds.appendWithDateTime(i, value)
+                pendingLimit = 20 + lazy.getEventWindow().getWindowSize()
+                self.assertLessEqual(len(lazy._EventBasedFilter__pendingValues), pendingLimit)
+            self.assertEqual(lazy[:], eager[:])
+            self.assertEqual(lazy.getDateTimes(), eager.getDateTimes())
+
+    def testDeferred(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        sma.setLazy(True)
+        for value in [1, 2, 3]:
+            ds.append(value)
+        self.assertEqual(len(sma.getEventWindow().getValues()), 0)
+        self.assertEqual(sma[-1], 2.5)
+        self.assertEqual(len(sma), 3)
+
+    def testSubscribers(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        sma.setLazy(True)
+        ds.append(1)
+        # Values are calculated right away when something depends on them.
+        ema = ma.EMA(sma, 2)
+        for value in [2, 3, 4]:
+            ds.append(value)
+        self.assertEqual(len(sma.getEventWindow().getValues()), 2)
+        self.assertEqual(ema[:], [None, None, 2, 3])
+
+    def testSetNotLazy(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        sma.setLazy(True)
+        for value in [1, 2, 3]:
+            ds.append(value)
+        sma.setLazy(False)
+        self.assertEqual(len(sma.getEventWindow().getValues()), 2)
+        self.assertEqual(sma[:], [None, 1.5, 2.5])
+
+    def testPrecomputed(self):
+        ds = dataseries.SequenceDataSeries()
+        ema = ma.EMA(ds, 2)
+        ema.setLazy(True)
+        technical.precompute(ds, [0, 1, 2], np.array([1, 2, 3], dtype=float))
+        for i, value in enumerate([1, 2, 3]):
+            ds.appendWithDateTime(i, value)
+        self.assertEqual(ema[:], [None, 1.5, 2.5])
@@ -96,3 +96,14 @@ class VWAPTestCase(common.TestCase):
         outputValues = [14.605005665747331, 14.605416923506045]
         for i in xrange(2):
             self.assertEqual(round(vwap_[i], 4), round(outputValues[i], 4))
+
+    def testMatchesFullWindow(self):
+        barFeed = self.__getFeed()
+        bars = barFeed[VWAPTestCase.Instrument]
+        vwap_ = vwap.VWAP(bars, 20, True)
+        barFeed.loadAll()
+        for i in xrange(19, len(bars)):
+            window = bars[i - 19:i + 1]
+            cumTotal = sum(bar.getTypicalPrice() * bar.getVolume() for bar in window)
+            expected = cumTotal / float(sum(bar.getVolume() for bar in window))
+            self.assertEqual(round(vwap_[i], 8), round(expected, 8))
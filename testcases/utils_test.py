@@ -18,8 +18,12 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import bisect
 import datetime
 
+import numpy as np
+import pytz
+
 import common
 
 from pyalgotrade import utils
@@ -182,6 +186,34 @@ class IntersectTestCase(common.TestCase):
         self.assertEqual(ix1, range(size))
         self.assertEqual(ix1, ix2)
 
+    def testIntersectSorted(self):
+        cases = [
+            ([1, 2, 3], [4, 5, 6]),
+            ([], []),
+            ([1, 2, 3], [1, 2, 3]),
+            ([0, 2, 4], [1, 2, 3]),
+            ([1, 2, 5], [1, 3, 5]),
+            ([1, 2, 3], [3, 6]),
+            ([1, 1, 2, 2, 3, 3], [1, 2, 3]),
+            ([1, 2, 3], [1, 1, 2, 2, 3, 3]),
+            ([1, 1, 1, 2], [1, 1, 2, 2]),
+        ]
+        for v1, v2 in cases:
+            values, ix1, ix2 = collections.intersect_sorted(np.array(v1, dtype=np.int64), np.array(v2, dtype=np.int64))
+            self.assertEqual((values.tolist(), ix1.tolist(), ix2.tolist()), collections.intersect(v1, v2))
+
+    def testAlignDateTimes(self):
+        now = datetime.datetime(2000, 1, 1)
+        dateTimes1 = [now + datetime.timedelta(seconds=i) for i in range(0, 10, 2)]
+        dateTimes2 = [now + datetime.timedelta(seconds=i) for i in range(0, 10, 3)]
+        ix1, ix2 = collections.align_datetimes(dateTimes1, dateTimes2)
+        self.assertEqual(ix1.tolist(), [0, 3])
+        self.assertEqual(ix2.tolist(), [0, 2])
+
+        ix1, ix2 = collections.align_datetimes(collections.datetimes_to_epoch_ns(dateTimes1), dateTimes2)
+        self.assertEqual(ix1.tolist(), [0, 3])
+        self.assertEqual(ix2.tolist(), [0, 2])
+
 
 class CollectionTestCaseBase(common.TestCase):
     def buildCollection(self, maxLen):
@@ -299,6 +331,27 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
             d.append(i)
         self.assertEqual(d[0:3].sum(), 3)
 
+    def testWrapAround(self):
+        d = collections.NumPyDeque(3)
+
+        for i in range(10):
+            d.append(i)
+            expected = range(max(0, i - 2), i + 1)
+            self.assertEqual(len(d), len(expected))
+            self.assertEqual(d.data().tolist(), expected)
+            self.assertEqual(d[-1], i)
+            self.assertTrue(d.data().flags["C_CONTIGUOUS"])
+
+    def testResizeAfterWrapAround(self):
+        d = collections.NumPyDeque(4)
+        for i in range(7):
+            d.append(i)
+        d.resize(6)
+        self.assertEqual(d.data().tolist(), [3, 4, 5, 6])
+        for i in range(7, 10):
+            d.append(i)
+        self.assertEqual(d.data().tolist(), [4, 5, 6, 7, 8, 9])
+
 
 class ListDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -313,6 +366,61 @@ class ListDequeTestCase(CollectionTestCaseBase):
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
+    def testSlicesAfterDiscarding(self):
+        d = collections.ListDeque(5)
+        values = []
+
+        for i in range(23):
+            d.append(i)
+            values.append(i)
+            values = values[-5:]
+
+            self.assertEqual(len(d), len(values))
+            for j in range(-len(values), len(values)):
+                self.assertEqual(d[j], values[j])
+            for key in [slice(None), slice(-2, None), slice(1, 3), slice(-3, -1), slice(2, 10), slice(None, None, 2), slice(None, None, -1), slice(-1, 0, -1), slice(3, None, -2)]:
+                self.assertEqual(d[key], values[key])
+            with self.assertRaises(IndexError):
+                d[len(values)]
+            with self.assertRaises(IndexError):
+                d[-len(values) - 1]
+
+        self.assertEqual(d.data(), values)
+
+    def testSearchSortedAfterDiscarding(self):
+        d = collections.ListDeque(5)
+        values = []
+
+        for i in range(13):
+            d.append(i * 2)
+            values.append(i * 2)
+            values = values[-5:]
+
+            self.assertEqual(d.data(), values)
+            for value in range(-1, 27):
+                self.assertEqual(d.searchsorted(value), bisect.bisect_left(values, value))
+                self.assertEqual(d.searchsorted(value, "right"), bisect.bisect_right(values, value))
+
+
+class MonotonicWindowTestCase(common.TestCase):
+    def testEmpty(self):
+        window = collections.MonotonicWindow(3, True)
+        self.assertEqual(len(window), 0)
+        self.assertEqual(window.getValue(), None)
+
+    def testMinMax(self):
+        values = np.random.RandomState(1).randint(0, 20, 500).tolist()
+        for windowSize in [1, 2, 5, 30]:
+            minWindow = collections.MonotonicWindow(windowSize, True)
+            maxWindow = collections.MonotonicWindow(windowSize, False)
+            for i, value in enumerate(values):
+                minWindow.append(value)
+                maxWindow.append(value)
+                window = values[max(i - windowSize + 1, 0):i + 1]
+                self.assertEqual(len(minWindow), len(window))
+                self.assertEqual(minWindow.getValue(), min(window))
+                self.assertEqual(maxWindow.getValue(), max(window))
+
 
 class DateTimeTestCase(common.TestCase):
     def testTimeStampConversions(self):
@@ -329,6 +437,40 @@ class DateTimeTestCase(common.TestCase):
         dateTime = dt.as_utc(datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10))
         self.assertEqual(dt.timestamp_to_datetime(dt.datetime_to_timestamp(dateTime), True), dateTime)
 
+    def testEpochNsConversions(self):
+        dateTime = datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10)
+        self.assertEqual(dt.datetime_to_epoch_ns(dateTime), 946688461000010000)
+        self.assertEqual(dt.epoch_ns_to_datetime(dt.datetime_to_epoch_ns(dateTime)), dateTime)
+
+        dateTime = dt.localize(dateTime, pytz.timezone("US/Eastern"))
+        self.assertEqual(dt.datetime_to_epoch_ns(dateTime), 946688461000010000 + 5 * 3600 * 1000000000)
+        self.assertEqual(dt.epoch_ns_to_datetime(dt.datetime_to_epoch_ns(dateTime), dateTime.tzinfo), dateTime)
+
+    def testParseFixedWidth(self):
+        values = ["2000-01-01 01:02:03", "1965-12-31 23:59:59", "2012-02-29 00:00:00"]
+        expected = [dt.datetime_to_epoch_ns(datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")) for value in values]
+        self.assertEqual(dt.parse_fixed_width(values, "%Y-%m-%d %H:%M:%S").tolist(), expected)
+        self.assertEqual(dt.parse(values, "%Y-%m-%d %H:%M:%S").tolist(), expected)
+        # Not fixed width or invalid values.
+        self.assertEqual(dt.parse_fixed_width(["Jan 01 2000"], "%b %d %Y"), None)
+        self.assertEqual(dt.parse_fixed_width(["2000-1-01"], "%Y-%m-%d"), None)
+        self.assertEqual(dt.parse_fixed_width(["2001-02-29"], "%Y-%m-%d"), None)
+        self.assertEqual(dt.parse_fixed_width(["2001/02/28"], "%Y-%m-%d"), None)
+
+    def testParseNotFixedWidth(self):
+        values = ["Jan 01 2000", "Feb 03 2001", "Jan 01 2000"]
+        expected = [dt.datetime_to_epoch_ns(datetime.datetime.strptime(value, "%b %d %Y")) for value in values]
+        self.assertEqual(dt.parse(values, "%b %d %Y").tolist(), expected)
+        with self.assertRaises(ValueError):
+            dt.parse(["2001-02-29"], "%Y-%m-%d")
+
+    def testLocalizeEpochNs(self):
+        dateTimes = [datetime.datetime(2014, 3, 9) + datetime.timedelta(minutes=17 * i) for i in range(500)]
+        for timeZone in [pytz.timezone("US/Eastern"), pytz.timezone("Australia/Lord_Howe")]:
+            epochNs = np.array([dt.datetime_to_epoch_ns(dateTime) for dateTime in dateTimes])
+            expected = [dt.datetime_to_epoch_ns(dt.localize(dateTime, timeZone)) for dateTime in dateTimes]
+            self.assertEqual(dt.localize_epoch_ns(epochNs, timeZone).tolist(), expected)
+
     def testGetFirstMonday(self):
         self.assertEquals(dt.get_first_monday(2010), datetime.date(2010, 1, 4))
         self.assertEquals(dt.get_first_monday(2011), datetime.date(2011, 1, 3))
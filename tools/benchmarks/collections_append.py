@@ -0,0 +1,53 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures the cost of appending to bounded collections once they are full.
+# The cost per append should stay flat as maxLen grows.
+
+import sys
+import timeit
+sys.path.append("../..")
+
+from pyalgotrade.utils import collections
+
+MAX_LENS = [1000, 10000, 100000, 1000000]
+APPENDS = 1000000
+
+
+def bench(collectionClass, maxLen):
+    d = collectionClass(maxLen)
+    # Fill the collection so every append discards a value.
+    for i in xrange(maxLen):
+        d.append(i)
+    begin = timeit.default_timer()
+    for i in xrange(APPENDS):
+        d.append(i)
+    end = timeit.default_timer()
+    return (end - begin) / APPENDS * 1e9
+
+
+def main():
+    for collectionClass in [collections.ListDeque, collections.NumPyDeque]:
+        for maxLen in MAX_LENS:
+            print "%s maxLen=%d: %.1f ns/append" % (collectionClass.__name__, maxLen, bench(collectionClass, maxLen))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2015 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures how many CSV rows per second GenericBarFeed loads, parsing one row at a time and parsing every row at once.
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+sys.path.append("../..")
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+
+ROWS = [10000, 100000, 1000000]
+
+
+# Bars are parsed one row at a time when the filter doesn't support columns.
+class IncludeAllFilter(csvfeed.BarFilter):
+    def includeBar(self, bar_):
+        return True
+
+
+def write_file(path, rows):
+    rnd = random.Random(0)
+    with open(path, "w") as f:
+        f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+        for i in xrange(rows):
+            price = 100 + rnd.random()
+            f.write("%04d-%02d-%02d %02d:%02d:00,%.2f,%.2f,%.2f,%.2f,%.8f,\n" % (
+                2000 + i // 525600, i // 43200 % 12 + 1, i // 1440 % 28 + 1, i // 60 % 24, i % 60,
+                price, price + 1, price - 1, price, rnd.random() * 1000
+            ))
+
+
+def bench(path, barFilter):
+    feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+    feed.setBarFilter(barFilter)
+    begin = timeit.default_timer()
+    feed.addBarsFromCSV("spy", path)
+    return timeit.default_timer() - begin
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpDir, "bars.csv")
+        for rows in ROWS:
+            write_file(path, rows)
+            rowByRow = bench(path, IncludeAllFilter())
+            columnar = bench(path, None)
+            print "%d rows: %.0f rows/s row by row, %.0f rows/s columnar (%.1fx)" % (
+                rows, rows / rowByRow, rows / columnar, rowByRow / columnar
+            )
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()